@@ -1,73 +1,272 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from uuid import UUID
-from app.core.database import get_db
-from app.core.redis import get_redis, JOB_QUEUE_KEY
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator
+from uuid import UUID, uuid4
+from datetime import datetime
+import asyncio
+import logging
+import time
+from app.api.sse import SSE_KEEPALIVE, format_sse, sse_response
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, get_async_db
+from app.core.job_queue import enqueue_jobs, queue_position, tenant_id_for
+from app.core.memory_cache import ByteLRUCache
+from app.core.metrics import time_stage
+from app.core.redis import get_async_redis, JOB_QUEUE_KEY
 from app.models.job import Job
-from app.schemas.summarize import SummarizeRequest
-from app.schemas.job import JobSubmitResponse, JobStatusResponse, JobResultResponse
-import redis
+from app.services.content_store import BlobWriter, load_blobs
+from app.services.deduplication import JobCoalescer, get_content_hash
+from app.services.job_events import JOB_PROGRESS_KEY_PREFIX
+from app.services.providers import get_job_event_broker, get_summarizer_service, get_webhook_dispatcher
+from app.schemas.job import (
+    JobSubmitRequest, JobSubmitResponse, JobStatusResponse, JobResultResponse,
+    JobBatchItem, JobBatchSubmitResponse, JobBatchResultRequest, JobBatchResultResponse
+)
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+TERMINAL_STATUSES = ("completed", "failed")
+
+# Upper bound on job IDs followed by one event stream
+MAX_EVENT_STREAM_JOBS = 100
+
+# In-process cache of finished job results, in front of Postgres
+job_result_cache = ByteLRUCache(settings.JOB_RESULT_L1_MAX_BYTES, ttl_seconds=settings.JOB_RESULT_L1_TTL_SECONDS)
+
+def get_tenant_id(x_api_key: str | None = Header(default=None)) -> str:
+    return tenant_id_for(x_api_key)
+
+async def create_jobs(
+    requests: list[JobSubmitRequest],
+    db: AsyncSession,
+    redis_client: aioredis.Redis,
+    tenant_id: str,
+    default_lane: str
+) -> list[tuple[UUID, str]]:
+    """
+    Insert and enqueue jobs for the given requests, returning (job_id, status)
+    for each in order. Takes one summary cache round-trip, one INSERT, one
+    Redis pipeline for dedup claims and one enqueue per lane however many
+    requests there are.
+    """
+    now = datetime.utcnow()
+    rows = []
+    for request in requests:
+        rows.append({
+            "id": uuid4(),
+            "input_type": "url" if request.url else "text",
+            "input_value": request.url if request.url else request.text,
+            # Page hashes are only known once the worker has extracted the text
+            "content_hash": None if request.url else get_content_hash(request.text),
+            "status": "queued",
+            "summary": None,
+            "summary_hash": None,
+            "is_cached": False,
+            "cache_hit_type": None,
+            "processing_time_ms": None,
+            "stage_timings": None,
+            "callback_url": request.callback_url,
+            "priority": request.priority or default_lane,
+            "tenant_id": tenant_id,
+            "created_at": now,
+            "updated_at": now
+        })
+
+    # Text is hashed up front, so a cached summary completes the job immediately
+    text_rows = [row for row in rows if row["input_type"] == "text"]
+    if text_rows:
+        timings = {}
+        with time_stage("cache_lookup", timings):
+            cached_summaries = await get_summarizer_service().cache.get_many(
+                [row["content_hash"] for row in text_rows]
+            )
+        for row, cached_summary in zip(text_rows, cached_summaries):
+            if cached_summary:
+                row.update(
+                    status="completed", summary=cached_summary, is_cached=True, cache_hit_type="exact",
+                    processing_time_ms=round(timings["cache_lookup"]), stage_timings=timings
+                )
+
+    # Large texts and summaries are written once and referenced by hash
+    blobs = BlobWriter()
+    stored_rows = []
+    for row in rows:
+        stored = dict(row)
+        if row["input_type"] == "text" and blobs.put(row["input_value"], row["content_hash"]):
+            stored["input_value"] = None
+        stored["summary_hash"] = blobs.put(row["summary"])
+        if stored["summary_hash"]:
+            stored["summary"] = None
+        stored_rows.append(stored)
+    await blobs.write(db)
+    await db.execute(insert(Job).values(stored_rows))
+    await db.commit()
+
+    for row in rows:
+        if row["status"] == "completed" and row["callback_url"]:
+            result = JobResultResponse(
+                job_id=row["id"], status="completed", summary=row["summary"],
+                processing_time_ms=row["processing_time_ms"], cached=True, cache_hit_type="exact"
+            )
+            get_webhook_dispatcher().dispatch(row["callback_url"], result.model_dump(mode="json"))
+
+    queued = [row for row in rows if row["status"] == "queued"]
+
+    # Identical input already in flight: attach to that job instead of enqueueing
+    if queued and settings.SUBMIT_DEDUP_ENABLED:
+        try:
+            leaders = await JobCoalescer(redis_client).claim_many(
+                [(str(row["id"]), row["input_type"], row["input_value"], row["priority"]) for row in queued]
+            )
+        except RedisError as e:
+            logger.warning(f"Dedup claims failed for {len(queued)} job(s), enqueueing normally: {e}")
+            leaders = [None] * len(queued)
+
+        for row, leader_id in zip(queued, leaders):
+            if leader_id:
+                logger.info(f"Job {row['id']} attached to in-flight job {leader_id}")
+        queued = [row for row, leader_id in zip(queued, leaders) if not leader_id]
+
+    # Push job IDs onto the tenant's queue in each lane
+    lanes = {}
+    for row in queued:
+        lanes.setdefault(row["priority"], []).append(str(row["id"]))
+    for lane, job_ids in lanes.items():
+        await enqueue_jobs(redis_client, job_ids, lane, tenant_id, queue_key=JOB_QUEUE_KEY)
+
+    return [(row["id"], row["status"]) for row in rows]
+
 @router.post("/submit", response_model=JobSubmitResponse)
-def submit_job(
-    request: SummarizeRequest,
-    db: Session = Depends(get_db),
-    redis_client: redis.Redis = Depends(get_redis)
+async def submit_job(
+    request: JobSubmitRequest,
+    db: AsyncSession = Depends(get_async_db),
+    redis_client: aioredis.Redis = Depends(get_async_redis),
+    tenant_id: str = Depends(get_tenant_id)
 ):
-    input_type = "url" if request.url else "text"
-    input_value = request.url if request.url else request.text
-    
-    new_job = Job(
-        input_type=input_type,
-        input_value=input_value,
-        status="queued"
-    )
-    
-    db.add(new_job)
-    db.commit()
-    db.refresh(new_job)
-    
-    # Push job ID to Redis queue
-    redis_client.lpush(JOB_QUEUE_KEY, str(new_job.id))
-    
+    [(job_id, job_status)] = await create_jobs([request], db, redis_client, tenant_id, settings.QUEUE_DEFAULT_LANE)
     return JobSubmitResponse(
-        job_id=new_job.id,
-        status=new_job.status
+        job_id=job_id,
+        status=job_status
+    )
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'body'}: {e['msg']}" for e in error.errors()
     )
 
+async def _ndjson_items(request: Request) -> AsyncIterator[str]:
+    """Yield the lines of an NDJSON body as they arrive, without buffering the whole stream."""
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line.decode("utf-8", errors="replace")
+    if buffer.strip():
+        yield buffer.decode("utf-8", errors="replace")
+
+@router.post("/submit/batch", response_model=JobBatchSubmitResponse)
+async def submit_jobs_batch(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    redis_client: aioredis.Redis = Depends(get_async_redis),
+    tenant_id: str = Depends(get_tenant_id)
+):
+    """
+    Submit many jobs at once, as a JSON array of submit requests or, with
+    Content-Type application/x-ndjson, one request per line. NDJSON bodies
+    are processed in chunks of SUBMIT_BATCH_CHUNK_SIZE as they stream in.
+    Invalid items are reported per item and do not fail the rest. Jobs go
+    to the QUEUE_BATCH_LANE unless an item sets its own priority.
+    """
+    items: list[JobBatchItem] = []
+    chunk: list[tuple[int, JobSubmitRequest]] = []
+
+    async def flush():
+        created = await create_jobs(
+            [job_request for _, job_request in chunk], db, redis_client, tenant_id, settings.QUEUE_BATCH_LANE
+        )
+        for (index, _), (job_id, job_status) in zip(chunk, created):
+            items.append(JobBatchItem(index=index, job_id=job_id, status=job_status))
+        chunk.clear()
+
+    def add(index: int, parse):
+        try:
+            chunk.append((index, parse()))
+        except ValidationError as e:
+            items.append(JobBatchItem(index=index, error=_validation_message(e)))
+
+    if request.headers.get("content-type", "").split(";")[0].strip() == "application/x-ndjson":
+        index = 0
+        async for line in _ndjson_items(request):
+            add(index, lambda: JobSubmitRequest.model_validate_json(line))
+            index += 1
+            if len(chunk) >= settings.SUBMIT_BATCH_CHUNK_SIZE:
+                await flush()
+    else:
+        try:
+            body = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+        if not isinstance(body, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array of submit requests")
+        if len(body) > settings.SUBMIT_BATCH_MAX_ITEMS:
+            raise HTTPException(
+                status_code=413,
+                detail=f"At most {settings.SUBMIT_BATCH_MAX_ITEMS} items per array; stream larger batches as NDJSON"
+            )
+        for index, item in enumerate(body):
+            add(index, lambda: JobSubmitRequest.model_validate(item))
+            if len(chunk) >= settings.SUBMIT_BATCH_CHUNK_SIZE:
+                await flush()
+
+    if chunk:
+        await flush()
+
+    items.sort(key=lambda item: item.index)
+    rejected = sum(item.error is not None for item in items)
+    return JobBatchSubmitResponse(submitted=len(items) - rejected, rejected=rejected, jobs=items)
+
 @router.get("/status/{job_id}", response_model=JobStatusResponse)
-def get_job_status(
+async def get_job_status(
     job_id: UUID, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    job = db.query(Job).filter(Job.id == job_id).first()
+    job = await db.scalar(select(Job).where(Job.id == job_id))
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
+
+    position, wait = None, None
+    if job.status == "queued" and job.priority and job.tenant_id:
+        try:
+            position, wait = await queue_position(get_async_redis(), str(job.id), job.priority, job.tenant_id)
+        except RedisError as e:
+            logger.warning(f"Could not look up queue position of job {job.id}: {e}")
         
     return JobStatusResponse(
         job_id=job.id,
         status=job.status,
-        created_at=job.created_at
+        created_at=job.created_at,
+        queue_position=position,
+        estimated_wait_seconds=wait
     )
 
-@router.get("/result/{job_id}", response_model=JobResultResponse)
-def get_job_result(
-    job_id: UUID, 
-    db: Session = Depends(get_db)
-):
-    job = db.query(Job).filter(Job.id == job_id).first()
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
-    
+def build_job_result(job: Job) -> JobResultResponse:
     if job.status == "completed":
         return JobResultResponse(
             job_id=job.id,
             status=job.status,
             summary=job.summary,
             processing_time_ms=job.processing_time_ms,
-            cached=job.is_cached if job.is_cached else False
+            cached=job.is_cached if job.is_cached else False,
+            cache_hit_type=job.cache_hit_type
         )
     elif job.status == "failed":
         return JobResultResponse(
@@ -81,3 +280,175 @@ def get_job_result(
             status=job.status,
             error_message="Job still processing" 
         )
+
+def remember_job_result(result: JobResultResponse):
+    # Finished results never change, so they can be served from memory
+    if result.status in TERMINAL_STATUSES and settings.JOB_RESULT_L1_MAX_BYTES > 0:
+        size = len(result.summary or "") + len(result.error_message or "") + 256
+        job_result_cache.set(str(result.job_id), result, size)
+
+@router.get("/result/{job_id}", response_model=JobResultResponse)
+async def get_job_result(
+    job_id: UUID, 
+    wait: float = Query(
+        default=0,
+        ge=0,
+        le=settings.RESULT_MAX_WAIT_SECONDS,
+        description="Seconds to hold the request open for an unfinished job to finish"
+    ),
+    db: AsyncSession = Depends(get_async_db)
+):
+    cached_result = job_result_cache.get(str(job_id))
+    if cached_result:
+        return cached_result
+
+    if not wait:
+        job = await db.scalar(select(Job).where(Job.id == job_id))
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+
+        await load_blobs(db, [job], summaries=True)
+        result = build_job_result(job)
+        remember_job_result(result)
+        return result
+
+    # Subscribe before reading the row so a job finishing in between is not missed
+    async with get_job_event_broker().subscribe([str(job_id)]) as events:
+        job = await db.scalar(select(Job).where(Job.id == job_id))
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+
+        await load_blobs(db, [job], summaries=True)
+        result = build_job_result(job)
+        if result.status not in TERMINAL_STATUSES:
+            # Give the connection back to the pool while we wait
+            await db.close()
+            try:
+                event = await asyncio.wait_for(events.get(), timeout=wait)
+                result = JobResultResponse(**event)
+            except asyncio.TimeoutError:
+                pass
+
+    remember_job_result(result)
+    return result
+
+@router.post("/result/batch", response_model=JobBatchResultResponse)
+async def get_job_results_batch(
+    request: JobBatchResultRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Results for many jobs: finished ones from memory, the rest with one query."""
+    if len(request.job_ids) > settings.RESULT_BATCH_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.RESULT_BATCH_MAX_IDS} job IDs per request")
+
+    results = {}
+    for job_id in request.job_ids:
+        cached_result = job_result_cache.get(str(job_id))
+        if cached_result:
+            results[job_id] = cached_result
+
+    to_load = [job_id for job_id in request.job_ids if job_id not in results]
+    if to_load:
+        jobs = (await db.scalars(select(Job).where(Job.id.in_(to_load)))).all()
+        await load_blobs(db, jobs, summaries=True)
+        for job in jobs:
+            results[job.id] = build_job_result(job)
+            remember_job_result(results[job.id])
+
+    return JobBatchResultResponse(
+        results=[results[job_id] for job_id in dict.fromkeys(request.job_ids) if job_id in results],
+        missing=[job_id for job_id in dict.fromkeys(request.job_ids) if job_id not in results]
+    )
+
+@router.get("/events")
+async def stream_job_events(
+    job_ids: list[UUID] = Query(..., description="Jobs to follow; repeat the parameter for several")
+):
+    """
+    Server-Sent Events stream of results for one or more jobs. Each job yields
+    one `result` event once it has finished; the stream closes after the last one.
+    """
+    if len(job_ids) > MAX_EVENT_STREAM_JOBS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_EVENT_STREAM_JOBS} job IDs per stream")
+
+    async def event_stream():
+        waiting = {str(job_id) for job_id in job_ids}
+        async with get_job_event_broker().subscribe(list(waiting)) as events:
+            # Jobs that finished before we subscribed are answered from the database
+            async with AsyncSessionLocal() as db:
+                jobs = (await db.scalars(select(Job).where(Job.id.in_(job_ids)))).all()
+                await load_blobs(db, jobs, summaries=True)
+
+            found = {str(job.id) for job in jobs}
+            for job_id in waiting - found:
+                yield format_sse("error", {"job_id": job_id, "detail": "Job not found"})
+            waiting &= found
+
+            for job in jobs:
+                if job.status in TERMINAL_STATUSES:
+                    waiting.discard(str(job.id))
+                    yield format_sse("result", build_job_result(job).model_dump(mode="json"))
+
+            deadline = time.monotonic() + settings.EVENTS_MAX_STREAM_SECONDS
+            while waiting and time.monotonic() < deadline:
+                try:
+                    event = await asyncio.wait_for(events.get(), timeout=settings.EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield SSE_KEEPALIVE
+                    continue
+                if event["job_id"] in waiting:
+                    waiting.discard(event["job_id"])
+                    yield format_sse("result", event)
+
+    return sse_response(event_stream())
+
+@router.get("/stream/{job_id}")
+async def stream_job_summary(
+    job_id: UUID,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Server-Sent Events stream of a job's summary as the worker generates it:
+    `delta` events carry text and the character offset it starts at, and a
+    final `result` event carries the finished job.
+    """
+    job = await db.scalar(select(Job).where(Job.id == job_id))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        async with get_job_event_broker().subscribe([str(job_id)], progress=True) as events:
+            # Re-read after subscribing so a job finishing in between is not missed
+            async with AsyncSessionLocal() as session:
+                job = await session.scalar(select(Job).where(Job.id == job_id))
+                await load_blobs(session, [job], summaries=True)
+            if job.status in TERMINAL_STATUSES:
+                yield format_sse("result", build_job_result(job).model_dump(mode="json"))
+                return
+
+            # Output generated before we subscribed
+            sent = 0
+            partial = await get_async_redis().get(f"{JOB_PROGRESS_KEY_PREFIX}{job_id}")
+            if partial:
+                sent = len(partial)
+                yield format_sse("delta", {"offset": 0, "text": partial})
+
+            deadline = time.monotonic() + settings.EVENTS_MAX_STREAM_SECONDS
+            while time.monotonic() < deadline:
+                try:
+                    event = await asyncio.wait_for(events.get(), timeout=settings.EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield SSE_KEEPALIVE
+                    continue
+
+                if "status" in event:
+                    yield format_sse("result", event)
+                    return
+
+                # Skip text the snapshot already covered
+                text = event["text"][max(0, sent - event["offset"]):]
+                if text:
+                    yield format_sse("delta", {"offset": max(sent, event["offset"]), "text": text})
+                    sent = max(sent, event["offset"] + len(event["text"]))
+
+    return sse_response(event_stream())
@@ -0,0 +1,17 @@
+import json
+from typing import AsyncIterator
+
+from fastapi.responses import StreamingResponse
+
+# Comment line that keeps proxies from closing an idle stream
+SSE_KEEPALIVE = ": keep-alive\n\n"
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
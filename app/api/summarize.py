@@ -1,20 +1,20 @@
 import time
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
+from app.api.sse import format_sse, sse_response
 from app.schemas.summarize import SummarizeRequest, SummarizeResponse
+from app.services.providers import get_summarizer_service, get_url_extractor_service
 from app.services.summarizer import SummarizerService
 from app.services.url_extractor import UrlExtractorService
 
 router = APIRouter()
 
-def get_summarizer_service():
-    return SummarizerService()
-
-def get_url_extractor_service():
-    return UrlExtractorService()
-
 @router.post("/summarize", response_model=SummarizeResponse)
 async def summarize_text(
     request: SummarizeRequest,
+    stream: bool = Query(
+        default=False,
+        description="Stream the summary as Server-Sent Events (`delta` events, then `done`)"
+    ),
     summarizer_service: SummarizerService = Depends(get_summarizer_service),
     extractor_service: UrlExtractorService = Depends(get_url_extractor_service)
 ):
@@ -24,6 +24,31 @@ async def summarize_text(
         text_to_summarize = await extractor_service.extract(request.url)
     else:
         text_to_summarize = request.text
+
+    if stream:
+        pieces = summarizer_service.summarize_stream(text_to_summarize)
+        # Wait for the first piece here, so failures before any output still get a proper status code
+        try:
+            first_piece = await anext(pieces)
+        except StopAsyncIteration:
+            first_piece = ""
+
+        async def events():
+            summary = [first_piece]
+            yield format_sse("delta", {"text": first_piece})
+            try:
+                async for piece in pieces:
+                    summary.append(piece)
+                    yield format_sse("delta", {"text": piece})
+            except HTTPException as e:
+                yield format_sse("error", {"status_code": e.status_code, "detail": e.detail})
+                return
+            yield format_sse("done", {
+                "summary": "".join(summary).strip(),
+                "processing_time_ms": round((time.perf_counter() - start_time) * 1000, 2)
+            })
+
+        return sse_response(events())
         
     summary = await summarizer_service.summarize(text_to_summarize)
     end_time = time.perf_counter()
@@ -0,0 +1,456 @@
+import hashlib
+import logging
+import os
+import socket
+import time
+import uuid
+
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+from app.core.redis import JOB_QUEUE_KEY
+
+logger = logging.getLogger(__name__)
+
+WORKERS_KEY = f"{JOB_QUEUE_KEY}:workers"
+PROCESSING_KEY_PREFIX = f"{JOB_QUEUE_KEY}:processing:"
+HEARTBEAT_KEY_PREFIX = f"{JOB_QUEUE_KEY}:heartbeat:"
+COMPLETED_KEY_PREFIX = f"{JOB_QUEUE_KEY}:completed:"
+DEAD_LETTER_MAX_ITEMS = 10_000
+
+ANONYMOUS_TENANT = "anonymous"
+
+# Queue layout under a prefix P (JOB_QUEUE_KEY):
+#   P:lane:{lane}:{tenant}  list of queued items for one tenant (consumer end on the right)
+#   P:lane:{lane}:ring      tenants with queued work in the lane, rotated on every pop
+#   P:lane:{lane}:active    set mirroring the ring, for O(1) membership checks
+#   P:inflight              hash of tenant -> jobs popped but not yet acked
+#   P:wrr                   hash of lane -> smooth weighted round-robin credit
+#   P:signal                wake-up tokens for idle workers
+#   P:deliveries            hash of item -> failed deliveries so far
+#   P:dead                  items that failed QUEUE_MAX_DELIVERIES times, newest first
+# Items are "{lane}|{tenant}|{job_id}" so requeue and ack know where they belong.
+
+# KEYS: prefix; ARGV: lane, tenant, items...
+ENQUEUE_SCRIPT = """
+local prefix = KEYS[1]
+local lane_key = prefix .. ':lane:' .. ARGV[1]
+redis.call('LPUSH', lane_key .. ':' .. ARGV[2], unpack(ARGV, 3))
+if redis.call('SADD', lane_key .. ':active', ARGV[2]) == 1 then
+    redis.call('RPUSH', lane_key .. ':ring', ARGV[2])
+end
+for _ = 1, math.min(#ARGV - 2, 64) do
+    redis.call('LPUSH', prefix .. ':signal', 1)
+end
+redis.call('LTRIM', prefix .. ':signal', 0, 255)
+return #ARGV - 2
+"""
+
+# Pop up to `count` items: pick a lane by smooth weighted round-robin among
+# lanes with queued work, then the next tenant in that lane's ring that is
+# under its in-flight cap. Popped items move onto the processing list.
+# KEYS: prefix, processing list ('' to just pop), legacy FIFO list
+# ARGV: count, per-tenant cap (0 = none), then lane, weight pairs
+POP_SCRIPT = """
+local prefix, processing, legacy = KEYS[1], KEYS[2], KEYS[3]
+local count, cap = tonumber(ARGV[1]), tonumber(ARGV[2])
+local lanes, weights = {}, {}
+for i = 3, #ARGV, 2 do
+    lanes[#lanes + 1] = ARGV[i]
+    weights[#weights + 1] = tonumber(ARGV[i + 1])
+end
+local inflight_key = prefix .. ':inflight'
+local wrr_key = prefix .. ':wrr'
+
+local function take(list)
+    if processing ~= '' then
+        return redis.call('LMOVE', list, processing, 'RIGHT', 'LEFT')
+    end
+    return redis.call('RPOP', list)
+end
+
+local function pop_from_lane(lane)
+    local lane_key = prefix .. ':lane:' .. lane
+    local ring = lane_key .. ':ring'
+    for _ = 1, redis.call('LLEN', ring) do
+        local tenant = redis.call('LMOVE', ring, ring, 'LEFT', 'RIGHT')
+        local busy = tonumber(redis.call('HGET', inflight_key, tenant) or '0')
+        if cap <= 0 or busy < cap then
+            local list = lane_key .. ':' .. tenant
+            local item = take(list)
+            if redis.call('LLEN', list) == 0 then
+                redis.call('LREM', ring, 1, tenant)
+                redis.call('SREM', lane_key .. ':active', tenant)
+            end
+            if item then
+                redis.call('HINCRBY', inflight_key, tenant, 1)
+                return item
+            end
+        end
+    end
+    return false
+end
+
+local popped = {}
+while #popped < count do
+    local skipped = {}
+    local item = false
+    while not item do
+        local best, best_credit, total = nil, nil, 0
+        for i, lane in ipairs(lanes) do
+            if not skipped[i] and redis.call('LLEN', prefix .. ':lane:' .. lane .. ':ring') > 0 then
+                total = total + weights[i]
+                local credit = redis.call('HINCRBY', wrr_key, lane, weights[i])
+                if not best or credit > best_credit then
+                    best, best_credit = i, credit
+                end
+            end
+        end
+        if not best then
+            break
+        end
+        redis.call('HINCRBY', wrr_key, lanes[best], -total)
+        item = pop_from_lane(lanes[best])
+        -- Every tenant in this lane is at its cap; try the other lanes
+        skipped[best] = true
+    end
+    -- Jobs enqueued on the single FIFO list before lanes existed
+    if not item then
+        item = take(legacy)
+    end
+    if not item then
+        break
+    end
+    popped[#popped + 1] = item
+end
+return popped
+"""
+
+# Put items back on their tenants' queues: the given items, or with none
+# everything on the processing list. Given items are only requeued if they
+# were still on the processing list ('' when there is none). With a positive
+# max deliveries each requeue counts as a failed delivery, and an item that
+# reaches it goes to the dead-letter list instead.
+# KEYS: prefix, processing list
+# ARGV: max deliveries (0 = not counted), dead-letter list cap, items...
+# Returns {requeued, dead-lettered items}
+REQUEUE_SCRIPT = """
+local prefix, processing = KEYS[1], KEYS[2]
+local max_deliveries = tonumber(ARGV[1])
+local deliveries_key = prefix .. ':deliveries'
+local dead = {}
+
+local function release_tenant(tenant)
+    if redis.call('HINCRBY', prefix .. ':inflight', tenant, -1) <= 0 then
+        redis.call('HDEL', prefix .. ':inflight', tenant)
+    end
+end
+
+local function requeue(item)
+    local lane, tenant = string.match(item, '^([^|]+)|([^|]+)|')
+    if max_deliveries > 0 and redis.call('HINCRBY', deliveries_key, item, 1) >= max_deliveries then
+        redis.call('HDEL', deliveries_key, item)
+        redis.call('LPUSH', prefix .. ':dead', item)
+        redis.call('LTRIM', prefix .. ':dead', 0, tonumber(ARGV[2]) - 1)
+        dead[#dead + 1] = item
+        if tenant then
+            release_tenant(tenant)
+        end
+        return
+    end
+    if not lane then
+        -- Legacy FIFO item
+        redis.call('RPUSH', prefix, item)
+        return
+    end
+    local lane_key = prefix .. ':lane:' .. lane
+    -- Back on the consumer end, so requeued jobs run next
+    redis.call('RPUSH', lane_key .. ':' .. tenant, item)
+    if redis.call('SADD', lane_key .. ':active', tenant) == 1 then
+        redis.call('RPUSH', lane_key .. ':ring', tenant)
+    end
+    release_tenant(tenant)
+end
+
+local count = 0
+if #ARGV > 2 then
+    for i = 3, #ARGV do
+        local item = ARGV[i]
+        if processing == '' or redis.call('LREM', processing, 1, item) > 0 then
+            requeue(item)
+            count = count + 1
+        end
+    end
+else
+    while true do
+        local item = redis.call('RPOP', processing)
+        if not item then
+            break
+        end
+        requeue(item)
+        count = count + 1
+    end
+end
+count = count - #dead
+if count > 0 then
+    redis.call('LPUSH', prefix .. ':signal', 1)
+end
+return {count, dead}
+"""
+
+# Finish items: only those still on the processing list ('' when there is none)
+# release their tenant's in-flight slot and delivery count, so an item the
+# reaper or a nack already requeued is not released a second time.
+# KEYS: prefix, processing list, completions counter for this minute
+# ARGV: items...
+# Returns the number acked
+ACK_SCRIPT = """
+local prefix, processing = KEYS[1], KEYS[2]
+local acked = 0
+for _, item in ipairs(ARGV) do
+    if processing == '' or redis.call('LREM', processing, 1, item) > 0 then
+        redis.call('HDEL', prefix .. ':deliveries', item)
+        local tenant = string.match(item, '^[^|]+|([^|]+)|')
+        if tenant and redis.call('HINCRBY', prefix .. ':inflight', tenant, -1) <= 0 then
+            redis.call('HDEL', prefix .. ':inflight', tenant)
+        end
+        acked = acked + 1
+    end
+end
+if acked > 0 then
+    -- Per-minute completions feed the wait estimate in /status
+    redis.call('INCRBY', KEYS[3], acked)
+    redis.call('EXPIRE', KEYS[3], 180)
+    -- A tenant that was at its cap may have work that can run now
+    redis.call('LPUSH', prefix .. ':signal', 1)
+end
+return acked
+"""
+
+# Items per ENQUEUE_SCRIPT call, keeping Lua's unpack() well inside its stack limit
+ENQUEUE_BATCH_SIZE = 1000
+
+def new_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+def tenant_id_for(api_key: str | None) -> str:
+    """Tenants are identified by a hash of their API key, never the key itself."""
+    if not api_key:
+        return ANONYMOUS_TENANT
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+def parse_lanes(spec: str) -> list[tuple[str, int]]:
+    """Parse "interactive:4,bulk:1" into [("interactive", 4), ("bulk", 1)]; weights default to 1."""
+    lanes = []
+    for item in spec.split(","):
+        name, _, weight = item.strip().partition(":")
+        if name:
+            lanes.append((name.lower(), max(1, int(weight)) if weight else 1))
+    return lanes
+
+QUEUE_LANES = parse_lanes(settings.QUEUE_LANES)
+LANE_NAMES = [name for name, _ in QUEUE_LANES]
+
+def encode_item(lane: str, tenant: str, job_id: str) -> str:
+    return f"{lane}|{tenant}|{job_id}"
+
+def decode_item(item: str) -> tuple[str | None, str | None, str]:
+    """Return (lane, tenant, job_id); lane and tenant are None for items from the legacy FIFO list."""
+    if "|" in item:
+        lane, tenant, job_id = item.split("|", 2)
+        return lane, tenant, job_id
+    return None, None, item
+
+def tenant_queue_key(lane: str, tenant: str, queue_key: str = JOB_QUEUE_KEY) -> str:
+    return f"{queue_key}:lane:{lane}:{tenant}"
+
+async def enqueue_jobs(redis_client: aioredis.Redis, job_ids: list[str], lane: str, tenant: str,
+                       queue_key: str = JOB_QUEUE_KEY) -> int:
+    """Producer side: queue jobs for a tenant in one lane with a single round-trip."""
+    items = [encode_item(lane, tenant, job_id) for job_id in job_ids]
+    for start in range(0, len(items), ENQUEUE_BATCH_SIZE):
+        await redis_client.eval(ENQUEUE_SCRIPT, 1, queue_key, lane, tenant, *items[start:start + ENQUEUE_BATCH_SIZE])
+    return len(items)
+
+async def queue_position(redis_client: aioredis.Redis, job_id: str, lane: str, tenant: str) -> tuple[int | None, float | None]:
+    """
+    Jobs ahead of this one in its tenant's queue, and an estimated wait.
+
+    The estimate assumes the tenant gets its round-robin share of its lane
+    and the lane its weighted share of recent cluster throughput. The scan is
+    bounded by QUEUE_POSITION_SCAN_LIMIT from the consumer end, so jobs deep
+    in a large backlog report no position.
+    """
+    list_key = tenant_queue_key(lane, tenant)
+    minute = int(time.time() // 60)
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.llen(list_key)
+        pipe.lpos(list_key, encode_item(lane, tenant, job_id), rank=-1, maxlen=settings.QUEUE_POSITION_SCAN_LIMIT)
+        for name in LANE_NAMES:
+            pipe.llen(f"{JOB_QUEUE_KEY}:lane:{name}:ring")
+        pipe.get(f"{COMPLETED_KEY_PREFIX}{minute - 1}")
+        length, index, *ring_sizes, completed = await pipe.execute()
+
+    if index is None:
+        return None, None
+    ahead = length - 1 - index
+
+    throughput = int(completed or 0) / 60
+    tenants = dict(zip(LANE_NAMES, ring_sizes)).get(lane) or 1
+    busy_weight = sum(weight for (_, weight), size in zip(QUEUE_LANES, ring_sizes) if size) or 1
+    lane_share = dict(QUEUE_LANES).get(lane, 1) / busy_weight
+    rate = throughput * min(1.0, lane_share) / tenants
+    if rate <= 0:
+        return ahead, None
+    return ahead, round((ahead + 1) / rate, 1)
+
+async def queue_depth(redis_client: aioredis.Redis) -> dict[str, int]:
+    """Queued jobs per lane, plus any left on the legacy FIFO list under "legacy"."""
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for name in LANE_NAMES:
+            pipe.lrange(f"{JOB_QUEUE_KEY}:lane:{name}:ring", 0, -1)
+        rings = await pipe.execute()
+
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for name, tenants in zip(LANE_NAMES, rings):
+            for tenant in tenants:
+                pipe.llen(tenant_queue_key(name, tenant))
+        pipe.llen(JOB_QUEUE_KEY)
+        *lengths, legacy = await pipe.execute()
+
+    depth = {}
+    lengths = iter(lengths)
+    for name, tenants in zip(LANE_NAMES, rings):
+        depth[name] = sum(next(lengths) for _ in tenants)
+    depth["legacy"] = legacy
+    return depth
+
+class JobQueue:
+    """
+    Consumer side of the summary job queue.
+
+    Jobs are queued per priority lane and per tenant. Each pop picks a lane
+    by weighted round-robin (QUEUE_LANES) and then rotates through that
+    lane's tenants, skipping any at QUEUE_TENANT_MAX_IN_FLIGHT, so a bulk
+    backfill from one tenant cannot starve interactive work or other tenants.
+
+    In reliable mode a popped job is atomically moved onto a per-worker
+    processing list and only removed once acked. Workers heartbeat while alive;
+    the reaper moves the processing list of any worker whose heartbeat expired
+    back onto the queue, giving at-least-once delivery. A job requeued by the
+    reaper or a nack QUEUE_MAX_DELIVERIES times is dead-lettered instead, so a
+    job that keeps crashing its worker cannot cycle through the fleet forever.
+    """
+
+    def __init__(self, redis_client: aioredis.Redis, worker_id: str | None = None):
+        self.redis = redis_client
+        self.worker_id = worker_id or new_worker_id()
+        self.reliable = settings.QUEUE_RELIABLE
+        self.processing_key = f"{PROCESSING_KEY_PREFIX}{self.worker_id}"
+        self.heartbeat_key = f"{HEARTBEAT_KEY_PREFIX}{self.worker_id}"
+        self._pop = redis_client.register_script(POP_SCRIPT)
+        self._requeue_script = redis_client.register_script(REQUEUE_SCRIPT)
+        self._ack = redis_client.register_script(ACK_SCRIPT)
+        # Queue items of jobs handed out by this worker, by job ID
+        self._items: dict[str, str] = {}
+
+    async def _pop_now(self, count: int) -> list[str]:
+        # Caps rely on in-flight counts that only the reaper repairs after a crash
+        args = [count, settings.QUEUE_TENANT_MAX_IN_FLIGHT if self.reliable else 0]
+        for name, weight in QUEUE_LANES:
+            args += [name, weight]
+        items = await self._pop(
+            keys=[JOB_QUEUE_KEY, self.processing_key if self.reliable else "", JOB_QUEUE_KEY],
+            args=args
+        )
+        job_ids = []
+        for item in items:
+            job_id = decode_item(item)[2]
+            self._items[job_id] = item
+            job_ids.append(job_id)
+        return job_ids
+
+    async def pop_many(self, count: int, timeout: int) -> list[str]:
+        """Take up to count job IDs, waiting up to timeout seconds for the first."""
+        deadline = time.monotonic() + timeout
+        while True:
+            job_ids = await self._pop_now(count)
+            remaining = deadline - time.monotonic()
+            if job_ids or remaining <= 0:
+                return job_ids
+            # Sleep until something is enqueued or acked (freeing a tenant's slot);
+            # the short cap covers wake-ups taken by other workers
+            await self.redis.brpop(f"{JOB_QUEUE_KEY}:signal", timeout=max(1, min(int(remaining), settings.QUEUE_IDLE_POLL_SECONDS)))
+
+    async def ack(self, job_ids: list[str]) -> int:
+        """Remove finished jobs from the processing list; returns how many were still on it."""
+        items = [self._items.pop(job_id, job_id) for job_id in job_ids]
+        minute = int(time.time() // 60)
+        return await self._ack(
+            keys=[JOB_QUEUE_KEY, self.processing_key if self.reliable else "", f"{COMPLETED_KEY_PREFIX}{minute}"],
+            args=items
+        )
+
+    async def nack(self, job_ids: list[str], failed: bool = True) -> list[str]:
+        """
+        Put jobs that could not be finished back on the consumer end of their
+        queue. Returns the IDs of those dead-lettered instead. With failed=False
+        the jobs are deferred rather than failed (e.g. the provider is down)
+        and the delivery does not count towards QUEUE_MAX_DELIVERIES.
+        """
+        items = [self._items.pop(job_id, job_id) for job_id in job_ids]
+        _, dead = await self._requeue_script(
+            keys=[JOB_QUEUE_KEY, self.processing_key if self.reliable else ""],
+            args=[settings.QUEUE_MAX_DELIVERIES if failed else 0, DEAD_LETTER_MAX_ITEMS, *items]
+        )
+        return [decode_item(item)[2] for item in dead]
+
+    async def heartbeat(self):
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.sadd(WORKERS_KEY, self.worker_id)
+            pipe.set(self.heartbeat_key, int(time.time()), ex=settings.QUEUE_VISIBILITY_TIMEOUT_SECONDS)
+            await pipe.execute()
+
+    async def release(self) -> int:
+        """Hand unacked jobs back to the queue and deregister (used on shutdown)."""
+        # Jobs cut off by a drain did not fail, so this is not counted as a delivery
+        requeued, _ = await self._requeue(self.processing_key, max_deliveries=0)
+        self._items.clear()
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.srem(WORKERS_KEY, self.worker_id)
+            pipe.delete(self.heartbeat_key)
+            await pipe.execute()
+        return requeued
+
+    async def reap(self) -> tuple[int, list[str]]:
+        """
+        Requeue jobs held by workers whose heartbeat has expired. Returns the
+        number requeued and the IDs of jobs dead-lettered instead.
+        """
+        requeued, dead = 0, []
+        for worker_id in await self.redis.smembers(WORKERS_KEY):
+            if worker_id == self.worker_id:
+                continue
+            if await self.redis.exists(f"{HEARTBEAT_KEY_PREFIX}{worker_id}"):
+                continue
+
+            count, dead_ids = await self._requeue(f"{PROCESSING_KEY_PREFIX}{worker_id}")
+            await self.redis.srem(WORKERS_KEY, worker_id)
+            if count:
+                logger.warning(f"Requeued {count} job(s) from stale worker {worker_id}")
+            requeued += count
+            dead += dead_ids
+        return requeued, dead
+
+    async def _requeue(self, processing_key: str,
+                       max_deliveries: int | None = None) -> tuple[int, list[str]]:
+        # The script runs atomically, so concurrent reapers never requeue the same entry twice
+        if max_deliveries is None:
+            max_deliveries = settings.QUEUE_MAX_DELIVERIES
+        count, dead = await self._requeue_script(
+            keys=[JOB_QUEUE_KEY, processing_key],
+            args=[max_deliveries, DEAD_LETTER_MAX_ITEMS]
+        )
+        if dead:
+            logger.error(f"Dead-lettered {len(dead)} job(s) after {max_deliveries} failed deliveries")
+        return count, [decode_item(item)[2] for item in dead]
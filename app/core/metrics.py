@@ -0,0 +1,64 @@
+import time
+from contextlib import contextmanager
+
+import redis.asyncio as aioredis
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.core.job_queue import queue_depth
+
+STAGES = ("queue_wait", "db_load", "fetch", "parse", "cache_lookup", "llm", "commit")
+
+STAGE_SECONDS = Histogram(
+    "summarizer_stage_seconds",
+    "Time spent in each stage of processing a job",
+    ["stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+)
+JOBS_FINISHED = Counter(
+    "summarizer_jobs_finished_total",
+    "Jobs finished by the worker",
+    ["status", "cached"]
+)
+JOBS_IN_FLIGHT = Gauge(
+    "summarizer_jobs_in_flight",
+    "Jobs this worker process is currently running"
+)
+QUEUE_DEPTH = Gauge(
+    "summarizer_queue_depth",
+    "Jobs waiting in the queue, per lane",
+    ["lane"]
+)
+CACHE_LOOKUPS = Counter(
+    "summarizer_cache_lookups_total",
+    "Cache lookups by cache and result; hit ratio is hit / (hit + miss)",
+    ["cache", "result"]
+)
+LLM_REQUESTS = Counter(
+    "summarizer_llm_requests_total",
+    "LLM provider calls by outcome",
+    ["provider", "outcome"]
+)
+LLM_REQUEST_SECONDS = Histogram(
+    "summarizer_llm_request_seconds",
+    "Latency of successful LLM provider calls",
+    ["provider"],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+)
+
+@contextmanager
+def time_stage(stage: str, timings: dict | None = None):
+    """Observe the block's duration for `stage`, and add it in ms to `timings` if given."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start, timings)
+
+def observe_stage(stage: str, seconds: float, timings: dict | None = None):
+    STAGE_SECONDS.labels(stage).observe(seconds)
+    if timings is not None:
+        timings[stage] = round(timings.get(stage, 0) + seconds * 1000, 1)
+
+async def refresh_queue_depth(redis_client: aioredis.Redis):
+    for lane, depth in (await queue_depth(redis_client)).items():
+        QUEUE_DEPTH.labels(lane).set(depth)
@@ -1,10 +1,32 @@
 import redis
+import redis.asyncio as aioredis
 from app.core.config import settings
 
 # Create a Redis client instance
 redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
 
+# Async client backed by a shared connection pool, for the worker and async routes
+async_redis_client = aioredis.from_url(
+    settings.REDIS_URL,
+    decode_responses=True,
+    max_connections=settings.REDIS_MAX_CONNECTIONS
+)
+
+# Binary-safe client for the summary cache. Point CACHE_REDIS_URL at a separate
+# instance so cache eviction under maxmemory can never touch the job queue.
+cache_redis_client = aioredis.from_url(
+    settings.CACHE_REDIS_URL or settings.REDIS_URL,
+    decode_responses=False,
+    max_connections=settings.REDIS_MAX_CONNECTIONS
+)
+
 JOB_QUEUE_KEY = "summary_jobs"
 
 def get_redis():
     return redis_client
+
+def get_async_redis():
+    return async_redis_client
+
+def get_cache_redis():
+    return cache_redis_client
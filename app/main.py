@@ -1,13 +1,37 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.api import summarize, jobs
 from app.core.config import settings
+from app.core.database import async_engine
+from app.core.redis import async_redis_client, cache_redis_client
+from app.services.providers import get_job_event_broker, get_summarizer_service, startup_services, shutdown_services
+from sqlalchemy import text
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
-from fastapi import Request
+from fastapi import Request, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from app.core.metrics import refresh_queue_depth
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open pooled connections and build shared services before taking traffic
+    await async_redis_client.ping()
+    async with async_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    await startup_services()
+    # One pub/sub subscription per process feeds every long-poll and event stream
+    get_job_event_broker().start()
+    yield
+    # Release pooled connections on shutdown
+    await shutdown_services()
+    await async_redis_client.aclose()
+    await cache_redis_client.aclose()
+    await async_engine.dispose()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
 app.include_router(summarize.router, prefix="", tags=["summarize"])
@@ -23,3 +47,13 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return await get_summarizer_service().cache.stats()
+
+@app.get("/metrics")
+async def metrics():
+    # Queue depth is read at scrape time; everything else is recorded as it happens
+    await refresh_queue_depth(async_redis_client)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, Text, Integer, DateTime
+from datetime import datetime
+from app.core.database import Base
+
+class ContentBlob(Base):
+    """Large inputs and summaries, stored once per distinct content and referenced from jobs by hash."""
+    __tablename__ = "content_blobs"
+
+    hash = Column(String(64), primary_key=True) # sha256 hex of body
+    body = Column(Text, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_referenced_at = Column(DateTime, default=datetime.utcnow) # retention drops blobs older than every remaining job
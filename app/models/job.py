@@ -1,20 +1,32 @@
-from sqlalchemy import Column, String, Text, Integer, DateTime, Boolean
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Text, Integer, DateTime, Boolean, Index
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 import uuid
 from datetime import datetime
 from app.core.database import Base
 
 class Job(Base):
     __tablename__ = "jobs"
+    # Range-partitioned by month on created_at in the database (see migrations/); the
+    # database key is (id, created_at), but id alone identifies a job
+    __table_args__ = (
+        Index("ix_jobs_status_created_at", "status", "created_at"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     input_type = Column(String, nullable=False) # text, url
-    input_value = Column(Text, nullable=False)
+    input_value = Column(Text, nullable=True) # NULL when the text is stored in content_blobs under content_hash
+    content_hash = Column(String(64), nullable=True, index=True) # sha256 of the text summarized (input text or extracted page)
     status = Column(String, default="queued") # queued, processing, completed, failed
-    summary = Column(Text, nullable=True)
+    summary = Column(Text, nullable=True) # NULL when stored in content_blobs under summary_hash
+    summary_hash = Column(String(64), nullable=True)
     error_message = Column(Text, nullable=True)
     processing_time_ms = Column(Integer, nullable=True)
+    stage_timings = Column(JSONB, nullable=True) # ms per stage: queue_wait, db_load, fetch, parse, cache_lookup, llm
     is_cached = Column(Boolean, default=False)
+    cache_hit_type = Column(String, nullable=True) # exact, near (similar content's summary reused); NULL when not cached
+    callback_url = Column(Text, nullable=True) # webhook notified when the job finishes
+    priority = Column(String, nullable=True) # queue lane, e.g. interactive, bulk
+    tenant_id = Column(String, nullable=True) # hash of the submitting API key
 
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
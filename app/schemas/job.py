@@ -1,6 +1,34 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
 from uuid import UUID
+from app.core.job_queue import LANE_NAMES
+from app.schemas.summarize import SummarizeRequest
+
+class JobSubmitRequest(SummarizeRequest):
+    callback_url: str | None = Field(
+        default=None,
+        description="URL that receives a POST with the job result when it finishes",
+        examples=["https://example.com/hooks/summary"]
+    )
+    priority: str | None = Field(
+        default=None,
+        description="Queue lane, e.g. interactive or bulk; defaults by endpoint",
+        examples=["interactive"]
+    )
+
+    @field_validator("callback_url")
+    @classmethod
+    def check_callback_url(cls, value: str | None) -> str | None:
+        if value and not value.startswith(("http://", "https://")):
+            raise ValueError("callback_url must be an http(s) URL")
+        return value
+
+    @field_validator("priority")
+    @classmethod
+    def check_priority(cls, value: str | None) -> str | None:
+        if value and value not in LANE_NAMES:
+            raise ValueError(f"priority must be one of: {', '.join(LANE_NAMES)}")
+        return value
 
 class JobSubmitResponse(BaseModel):
     job_id: UUID
@@ -10,6 +38,8 @@ class JobStatusResponse(BaseModel):
     job_id: UUID
     status: str
     created_at: datetime
+    queue_position: int | None = None  # jobs ahead of this one in its tenant's queue
+    estimated_wait_seconds: float | None = None
 
 class JobResultResponse(BaseModel):
     job_id: UUID
@@ -17,4 +47,23 @@ class JobResultResponse(BaseModel):
     summary: str | None = None
     processing_time_ms: int | None = None
     cached: bool = False
+    cache_hit_type: str | None = None  # exact or near when cached
     error_message: str | None = None
+
+class JobBatchItem(BaseModel):
+    index: int
+    job_id: UUID | None = None
+    status: str | None = None
+    error: str | None = None
+
+class JobBatchSubmitResponse(BaseModel):
+    submitted: int
+    rejected: int
+    jobs: list[JobBatchItem]
+
+class JobBatchResultRequest(BaseModel):
+    job_ids: list[UUID] = Field(..., min_length=1)
+
+class JobBatchResultResponse(BaseModel):
+    results: list[JobResultResponse]
+    missing: list[UUID]
@@ -1,10 +1,11 @@
 from pydantic import BaseModel, Field, model_validator
+from app.core.config import settings
 
 class SummarizeRequest(BaseModel):
     text: str | None = Field(
         default=None,
         min_length=50, 
-        max_length=12000, 
+        max_length=settings.MAX_INPUT_CHARS, 
         description="Text content to summarize",
         examples=["This is a long text that needs to be summarized..."]
     )
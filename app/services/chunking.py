@@ -0,0 +1,54 @@
+import math
+import re
+
+# Rough average for English prose across the supported providers; avoids
+# shipping a tokenizer per model just to size chunks
+CHARS_PER_TOKEN = 4
+
+PARAGRAPH_BOUNDARY = re.compile(r"\n\s*\n")
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+def estimate_tokens(text: str) -> int:
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+def _split_oversized(piece: str, max_tokens: int) -> list[str]:
+    """Break a paragraph that exceeds the budget on sentences, then on characters."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    parts = []
+    for sentence in SENTENCE_BOUNDARY.split(piece):
+        if estimate_tokens(sentence) <= max_tokens:
+            parts.append(sentence)
+        else:
+            parts.extend(sentence[i:i + max_chars] for i in range(0, len(sentence), max_chars))
+    return parts
+
+def split_into_chunks(text: str, max_tokens: int) -> list[str]:
+    """
+    Split text into chunks of at most max_tokens (estimated).
+
+    Paragraphs, then sentences, are packed greedily so chunk boundaries fall
+    on natural breaks; an edit to one part of a document mostly leaves the
+    other chunks, and their cached summaries, unchanged.
+    """
+    pieces = []
+    for paragraph in PARAGRAPH_BOUNDARY.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if estimate_tokens(paragraph) <= max_tokens:
+            pieces.append(paragraph)
+        else:
+            pieces.extend(_split_oversized(paragraph, max_tokens))
+
+    chunks, current, current_tokens = [], [], 0
+    for piece in pieces:
+        piece_tokens = estimate_tokens(piece)
+        if current and current_tokens + piece_tokens > max_tokens:
+            chunks.append("\n\n".join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += piece_tokens
+
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
@@ -0,0 +1,79 @@
+"""
+Deduplicated storage for large job inputs and summaries.
+
+Texts of at least CONTENT_BLOB_MIN_BYTES are written once to content_blobs,
+keyed by their sha256, and job rows keep only the hash (input text under
+content_hash, summaries under summary_hash). An article submitted a thousand
+times is stored once instead of a thousand times.
+"""
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.config import settings
+from app.models.content_blob import ContentBlob
+from app.models.job import Job
+from app.services.deduplication import get_content_hash
+
+class BlobWriter:
+    """Collects the large texts of one transaction and writes each distinct body once."""
+
+    def __init__(self):
+        self.bodies: dict[str, str] = {}
+
+    def put(self, text: str | None, text_hash: str | None = None) -> str | None:
+        """Return the hash to store in place of `text`, or None if it stays inline."""
+        if text is None or settings.CONTENT_BLOB_MIN_BYTES <= 0:
+            return None
+        if len(text) < settings.CONTENT_BLOB_MIN_BYTES and len(text.encode("utf-8")) < settings.CONTENT_BLOB_MIN_BYTES:
+            return None
+        text_hash = text_hash or get_content_hash(text)
+        self.bodies[text_hash] = text
+        return text_hash
+
+    async def write(self, db: AsyncSession):
+        """Upsert the collected blobs in the caller's transaction."""
+        if not self.bodies:
+            return
+        now = datetime.utcnow()
+        # Sorted so concurrent writers lock shared rows in the same order
+        stmt = insert(ContentBlob).values([
+            {
+                "hash": text_hash,
+                "body": body,
+                "size_bytes": len(body.encode("utf-8")),
+                "created_at": now,
+                "last_referenced_at": now
+            }
+            for text_hash, body in sorted(self.bodies.items())
+        ])
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[ContentBlob.hash],
+            set_={"last_referenced_at": stmt.excluded.last_referenced_at}
+        ))
+
+async def load_blobs(db: AsyncSession, jobs: list[Job], inputs: bool = False, summaries: bool = False):
+    """
+    Fill in input_value and/or summary of jobs whose text lives in
+    content_blobs, with one query. The values are set as loaded state, so
+    flushing the session does not write them back into the job rows.
+    """
+    wanted = set()
+    if inputs:
+        wanted.update(job.content_hash for job in jobs if job.input_value is None and job.content_hash)
+    if summaries:
+        wanted.update(job.summary_hash for job in jobs if job.summary is None and job.summary_hash)
+    if not wanted:
+        return
+
+    bodies = dict((await db.execute(
+        select(ContentBlob.hash, ContentBlob.body).where(ContentBlob.hash.in_(wanted))
+    )).all())
+    for job in jobs:
+        if inputs and job.input_value is None and job.content_hash in bodies:
+            set_committed_value(job, "input_value", bodies[job.content_hash])
+        if summaries and job.summary is None and job.summary_hash in bodies:
+            set_committed_value(job, "summary", bodies[job.summary_hash])
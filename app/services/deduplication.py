@@ -0,0 +1,136 @@
+import hashlib
+import logging
+import time
+
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+INFLIGHT_KEY_PREFIX = "summary_inflight:"
+FOLLOWERS_KEY_PREFIX = "summary_followers:"
+# Sorted set of leaders with followers, scored by their first follower or last sweep check
+LEADERS_KEY = "summary_followers:leaders"
+
+# Become the leader for this input, or join the current leader's followers.
+# Follower sets do not expire: they are removed once the leader's result is
+# copied onto them, or by the sweep if the leader is gone.
+# KEYS: in-flight key, leaders index; ARGV: job ID, TTL, followers prefix
+CLAIM_SCRIPT = """
+local leader = redis.call('GET', KEYS[1])
+if leader then
+    redis.call('SADD', ARGV[3] .. leader, ARGV[1])
+    local t = redis.call('TIME')
+    redis.call('ZADD', KEYS[2], 'NX', t[1], leader)
+    return leader
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return false
+"""
+
+# Stop accepting followers and return the ones attached so far
+DETACH_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+end
+return redis.call('SMEMBERS', KEYS[2])
+"""
+
+# Take the followers of a leader the sweep found gone; only one caller gets them
+# KEYS: leaders index, followers set; ARGV: leader ID
+TAKE_FOLLOWERS_SCRIPT = """
+if redis.call('ZREM', KEYS[1], ARGV[1]) == 0 then
+    return {}
+end
+local followers = redis.call('SMEMBERS', KEYS[2])
+redis.call('DEL', KEYS[2])
+return followers
+"""
+
+def get_content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def get_inflight_key(input_type: str, input_value: str, lane: str) -> str:
+    # Per lane, so an interactive job never waits behind a bulk leader (or the reverse)
+    return f"{INFLIGHT_KEY_PREFIX}{lane}:{input_type}:{get_content_hash(input_value.strip())}"
+
+class JobCoalescer:
+    """
+    Coalesces identical in-flight submissions onto a single leader job.
+
+    The first job for an input in a queue lane claims it and is enqueued.
+    Identical jobs submitted to the same lane while it runs become followers: they are not enqueued, and the
+    worker copies the leader's result onto them when it finishes. Should
+    the leader finish without doing so (e.g. it was dead-lettered), the
+    worker's sweep enqueues its remaining followers on their own.
+    """
+
+    def __init__(self, redis_client: aioredis.Redis):
+        self.redis = redis_client
+        self._claim = redis_client.register_script(CLAIM_SCRIPT)
+        self._detach = redis_client.register_script(DETACH_SCRIPT)
+        self._take_followers = redis_client.register_script(TAKE_FOLLOWERS_SCRIPT)
+
+    async def claim(self, input_type: str, input_value: str, lane: str, job_id: str) -> str | None:
+        """Return the leader's job ID if one is in flight in the lane, otherwise make job_id the leader."""
+        return await self._claim(
+            keys=[get_inflight_key(input_type, input_value, lane), LEADERS_KEY],
+            args=[job_id, settings.DEDUP_INFLIGHT_TTL_SECONDS, FOLLOWERS_KEY_PREFIX]
+        )
+
+    async def claim_many(self, jobs: list[tuple[str, str, str, str]]) -> list[str | None]:
+        """
+        claim() for several jobs, given as (job_id, input_type, input_value, lane),
+        in one pipelined round-trip. Claims run in order, so repeats within the
+        batch follow the first occurrence in the same lane.
+        """
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for job_id, input_type, input_value, lane in jobs:
+                await self._claim(
+                    keys=[get_inflight_key(input_type, input_value, lane), LEADERS_KEY],
+                    args=[job_id, settings.DEDUP_INFLIGHT_TTL_SECONDS, FOLLOWERS_KEY_PREFIX],
+                    client=pipe
+                )
+            return await pipe.execute()
+
+    async def detach_followers(self, leaders: list[tuple[str, str, str, str]]) -> dict[str, list[str]]:
+        """
+        Close the in-flight entries of finished leaders, given as
+        (job_id, input_type, input_value, lane), and return their followers.
+
+        The follower sets survive until clear_followers(), so a leader that is
+        redelivered after a crash still finds them.
+        """
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for job_id, input_type, input_value, lane in leaders:
+                await self._detach(
+                    keys=[get_inflight_key(input_type, input_value, lane), f"{FOLLOWERS_KEY_PREFIX}{job_id}"],
+                    args=[job_id],
+                    client=pipe
+                )
+            results = await pipe.execute()
+        return {job_id: followers for (job_id, *_), followers in zip(leaders, results) if followers}
+
+    async def clear_followers(self, leader_ids: list[str]):
+        if leader_ids:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.delete(*[f"{FOLLOWERS_KEY_PREFIX}{job_id}" for job_id in leader_ids])
+                pipe.zrem(LEADERS_KEY, *leader_ids)
+                await pipe.execute()
+
+    async def leaders_to_check(self, older_than: float, limit: int = 500) -> list[str]:
+        """Leaders with followers that were last checked more than older_than seconds ago."""
+        return await self.redis.zrangebyscore(LEADERS_KEY, "-inf", time.time() - older_than, start=0, num=limit)
+
+    async def mark_checked(self, leader_ids: list[str]):
+        """Push leaders that are still in flight to the back of the sweep order."""
+        if leader_ids:
+            await self.redis.zadd(LEADERS_KEY, {job_id: time.time() for job_id in leader_ids}, xx=True)
+
+    async def take_followers(self, leader_id: str) -> list[str]:
+        """Remove a gone leader's follower set and return its members."""
+        return await self._take_followers(
+            keys=[LEADERS_KEY, f"{FOLLOWERS_KEY_PREFIX}{leader_id}"],
+            args=[leader_id]
+        )
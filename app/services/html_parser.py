@@ -0,0 +1,29 @@
+from readability import Document
+from bs4 import BeautifulSoup
+
+# Non-content tags stripped before taking the page text
+NON_CONTENT_TAGS = ["script", "style", "noscript", "iframe", "header", "footer", "nav"]
+
+def extract_article_text(html: str, parser: str = "html.parser") -> str | None:
+    """
+    Extracts the main article text from an HTML page.
+
+    Returns None when readability finds no main content. This is the CPU-heavy
+    part of URL extraction; it is a plain module-level function so it can run
+    in a worker process.
+    """
+    # Use readability to extract main content
+    doc = Document(html)
+    summary_html = doc.summary()
+
+    if not summary_html:
+        return None
+
+    # Clean with BeautifulSoup
+    soup = BeautifulSoup(summary_html, parser)
+
+    # Remove scripts, styles, and other non-content tags
+    for element in soup(NON_CONTENT_TAGS):
+        element.decompose()
+
+    return soup.get_text(separator=' ', strip=True)
@@ -0,0 +1,141 @@
+import asyncio
+import json
+import logging
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+from app.core.config import settings
+
+JOB_EVENTS_CHANNEL = "summary_job_events"
+JOB_PROGRESS_CHANNEL = "summary_job_progress"
+JOB_PROGRESS_KEY_PREFIX = "summary_job_progress:"
+
+async def publish_job_events(redis_client: aioredis.Redis, events: list[dict]):
+    """Publish job state changes; each event carries job_id, status and, when finished, the result."""
+    if not events:
+        return
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for event in events:
+                pipe.publish(JOB_EVENTS_CHANNEL, json.dumps(event, default=str))
+            await pipe.execute()
+    except RedisError as e:
+        # Waiters fall back to their timeout and a database read
+        logger.warning(f"Could not publish {len(events)} job event(s): {e}")
+
+class JobProgressWriter:
+    """
+    Records a job's partial summary as it is generated: appended to a Redis
+    string that late subscribers read first, and published as `delta` events
+    with the character offset they start at. Writes are batched every
+    JOB_PROGRESS_FLUSH_SECONDS rather than sent per token.
+    """
+
+    def __init__(self, redis_client: aioredis.Redis, job_id: str):
+        self.redis = redis_client
+        self.job_id = job_id
+        self.key = f"{JOB_PROGRESS_KEY_PREFIX}{job_id}"
+        self.offset = 0
+        self._pending = []
+        self._last_flush = time.monotonic()
+
+    async def reset(self):
+        # A redelivered job starts its summary over
+        await self.redis.delete(self.key)
+
+    async def add(self, text: str):
+        self._pending.append(text)
+        if time.monotonic() - self._last_flush >= settings.JOB_PROGRESS_FLUSH_SECONDS:
+            await self.flush()
+
+    async def flush(self):
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        text = "".join(self._pending)
+        self._pending = []
+        event = {"job_id": self.job_id, "offset": self.offset, "text": text}
+        self.offset += len(text)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.append(self.key, text)
+                pipe.expire(self.key, settings.JOB_PROGRESS_TTL_SECONDS)
+                pipe.publish(JOB_PROGRESS_CHANNEL, json.dumps(event))
+                await pipe.execute()
+        except RedisError as e:
+            # Progress is best effort; the final result is still written and published
+            logger.warning(f"Could not record progress for job {self.job_id}: {e}")
+
+async def clear_job_progress(redis_client: aioredis.Redis, job_ids: list[str]):
+    if job_ids:
+        try:
+            await redis_client.delete(*[f"{JOB_PROGRESS_KEY_PREFIX}{job_id}" for job_id in job_ids])
+        except RedisError as e:
+            logger.warning(f"Could not clear progress of {len(job_ids)} job(s): {e}")
+
+class JobEventBroker:
+    """
+    Fans job events out to waiters in this process over a single pub/sub
+    subscription, so long-polls and event streams don't each hold a Redis
+    connection.
+    """
+
+    def __init__(self, redis_client: aioredis.Redis):
+        self.redis = redis_client
+        self._waiters: dict[str, set[asyncio.Queue]] = defaultdict(set)
+        self._progress_waiters: dict[str, set[asyncio.Queue]] = defaultdict(set)
+        self._listener: asyncio.Task | None = None
+
+    def start(self):
+        if not self._listener:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def aclose(self):
+        if self._listener:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    @asynccontextmanager
+    async def subscribe(self, job_ids: list[str], progress: bool = False):
+        """
+        Yield a queue that receives result events for the given jobs until the
+        block exits, and with progress=True their `delta` events as well.
+        """
+        queue = asyncio.Queue()
+        registries = [self._waiters, self._progress_waiters] if progress else [self._waiters]
+        for registry in registries:
+            for job_id in job_ids:
+                registry[job_id].add(queue)
+        try:
+            yield queue
+        finally:
+            for registry in registries:
+                for job_id in job_ids:
+                    waiters = registry.get(job_id)
+                    if waiters is not None:
+                        waiters.discard(queue)
+                        if not waiters:
+                            del registry[job_id]
+
+    async def _listen(self):
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(JOB_EVENTS_CHANNEL, JOB_PROGRESS_CHANNEL)
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        registry = self._progress_waiters if message["channel"] == JOB_PROGRESS_CHANNEL else self._waiters
+                        event = json.loads(message["data"])
+                        for queue in registry.get(event["job_id"], ()):
+                            queue.put_nowait(event)
+            except RedisError as e:
+                logger.warning(f"Job event listener lost Redis, resubscribing: {e}")
+                await asyncio.sleep(1)
@@ -1,17 +1,51 @@
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import AsyncIterator
 from openai import AsyncOpenAI
 import openai
 import google.generativeai as genai
 from app.core.config import settings
 from google.api_core import exceptions as google_exceptions
 
+SUMMARY_PROMPT = "Summarize the following text clearly and concisely in 5–7 sentences:\n\n{text}"
+# Bump whenever SUMMARY_PROMPT changes so cached summaries from the old prompt are not reused
+SUMMARY_PROMPT_VERSION = "1"
+
+class RateLimitError(RuntimeError):
+    """The provider rejected the request for exceeding its rate limit (HTTP 429)."""
+
+class CircuitOpenError(ConnectionError):
+    """Requests to the provider are paused because it has been failing."""
+
 class LLMClient(ABC):
+    name = "llm"
+
+    @property
+    def model_id(self) -> str:
+        """Identifies the model behind this client, e.g. for cache keys."""
+        return self.name
+
     @abstractmethod
     async def summarize(self, text: str) -> str:
         """Summarize the given text."""
         pass
 
+    async def summarize_stream(self, text: str) -> AsyncIterator[str]:
+        """Summarize the given text, yielding the summary in pieces as it is generated."""
+        # Providers without streaming deliver the whole summary as one piece
+        yield await self.summarize(text)
+
+    async def is_available(self) -> bool:
+        """Whether the client is currently accepting requests."""
+        return True
+
+    async def warm_up(self):
+        """Prepare connections or other state so the first request doesn't pay for it."""
+        pass
+
 class OpenAILLMClient(LLMClient):
+    name = "openai"
+
     def __init__(self):
         if not settings.OPENAI_API_KEY:
             pass
@@ -19,16 +53,36 @@ class OpenAILLMClient(LLMClient):
         self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
         self.model = settings.OPENAI_MODEL
 
+    @property
+    def model_id(self) -> str:
+        return f"openai/{self.model}"
+
+    @contextmanager
+    def _translate_errors(self):
+        try:
+            yield
+        except openai.APIConnectionError as e:
+            raise ConnectionError(f"Connection error to OpenAI: {e}")
+        except openai.APITimeoutError as e:
+            raise TimeoutError(f"OpenAI request timed out: {e}")
+        except openai.AuthenticationError as e:
+            raise ValueError(f"OpenAI authentication failed: {e}")
+        except openai.RateLimitError as e:
+            raise RateLimitError(f"OpenAI rate limit exceeded: {e}")
+        except openai.APIError as e:
+            raise RuntimeError(f"OpenAI API returned an error: {e}")
+
+    def _messages(self, text: str) -> list[dict]:
+        return [{"role": "user", "content": SUMMARY_PROMPT.format(text=text)}]
+
     async def summarize(self, text: str) -> str:
         if not settings.OPENAI_API_KEY:
              raise ValueError("OpenAI API key is missing. Please set OPENAI_API_KEY environment variable.")
 
-        try:
+        with self._translate_errors():
             response = await self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "user", "content": f"Summarize the following text clearly and concisely in 5–7 sentences:\n\n{text}"}
-                ],
+                messages=self._messages(text),
                 max_tokens=500, 
             )
             
@@ -37,44 +91,58 @@ class OpenAILLMClient(LLMClient):
                 raise ValueError("Received empty response from OpenAI")
                 
             return content.strip()
-            
-        except openai.APIConnectionError as e:
-            raise ConnectionError(f"Connection error to OpenAI: {e}")
-        except openai.APITimeoutError as e:
-            raise TimeoutError(f"OpenAI request timed out: {e}")
-        except openai.AuthenticationError as e:
-            raise ValueError(f"OpenAI authentication failed: {e}")
-        except openai.APIError as e:
-            raise RuntimeError(f"OpenAI API returned an error: {e}")
+
+    async def summarize_stream(self, text: str) -> AsyncIterator[str]:
+        if not settings.OPENAI_API_KEY:
+             raise ValueError("OpenAI API key is missing. Please set OPENAI_API_KEY environment variable.")
+
+        with self._translate_errors():
+            stream = await self.client.chat.completions.create(
+                model=self.model,
+                messages=self._messages(text),
+                max_tokens=500,
+                stream=True,
+            )
+
+            started = False
+            async for chunk in stream:
+                content = chunk.choices[0].delta.content if chunk.choices else None
+                if not started and content:
+                    content = content.lstrip()
+                if content:
+                    started = True
+                    yield content
+
+            if not started:
+                raise ValueError("Received empty response from OpenAI")
 
 
 class GeminiLLMClient(LLMClient):
+    name = "gemini"
+
     def __init__(self):
         if settings.GEMINI_API_KEY:
             genai.configure(api_key=settings.GEMINI_API_KEY)
         self.model_name = settings.GEMINI_MODEL
+        # Built once and reused; the model object is stateless between calls
+        self.model = genai.GenerativeModel(self.model_name)
 
-    async def summarize(self, text: str) -> str:
-        if not settings.GEMINI_API_KEY:
-            raise ValueError("Gemini API key is missing. Please set GEMINI_API_KEY environment variable.")
+    @property
+    def model_id(self) -> str:
+        return f"gemini/{self.model_name}"
 
+    @contextmanager
+    def _translate_errors(self):
         try:
-            model = genai.GenerativeModel(self.model_name)
-            prompt = f"Summarize the following text clearly and concisely in 5–7 sentences:\n\n{text}"
-            
-            response = await model.generate_content_async(prompt)
-            
-            if not response.text:
-                 raise ValueError("Received empty response from Gemini")
-            
-            return response.text.strip()
-
+            yield
         except google_exceptions.ServiceUnavailable as e:
             raise ConnectionError(f"Gemini service unavailable: {e}")
         except google_exceptions.DeadlineExceeded as e:
             raise TimeoutError(f"Gemini request timed out: {e}")
         except google_exceptions.Unauthenticated as e:
             raise ValueError(f"Gemini authentication failed: {e}")
+        except google_exceptions.ResourceExhausted as e:
+            raise RateLimitError(f"Gemini rate limit exceeded: {e}")
         except google_exceptions.GoogleAPICallError as e:
             raise RuntimeError(f"Gemini API returned an error: {e}")
         except Exception as e:
@@ -82,3 +150,36 @@ class GeminiLLMClient(LLMClient):
             if "UserLocation" in str(e) or "stop" in str(e): 
                  pass
             raise RuntimeError(f"Gemini processing failed (possibly safety block or other): {e}")
+
+    async def summarize(self, text: str) -> str:
+        if not settings.GEMINI_API_KEY:
+            raise ValueError("Gemini API key is missing. Please set GEMINI_API_KEY environment variable.")
+
+        with self._translate_errors():
+            prompt = SUMMARY_PROMPT.format(text=text)
+            
+            response = await self.model.generate_content_async(prompt)
+            
+            if not response.text:
+                 raise ValueError("Received empty response from Gemini")
+            
+            return response.text.strip()
+
+    async def summarize_stream(self, text: str) -> AsyncIterator[str]:
+        if not settings.GEMINI_API_KEY:
+            raise ValueError("Gemini API key is missing. Please set GEMINI_API_KEY environment variable.")
+
+        with self._translate_errors():
+            response = await self.model.generate_content_async(SUMMARY_PROMPT.format(text=text), stream=True)
+
+            started = False
+            async for chunk in response:
+                content = chunk.text
+                if not started and content:
+                    content = content.lstrip()
+                if content:
+                    started = True
+                    yield content
+
+            if not started:
+                raise ValueError("Received empty response from Gemini")
@@ -0,0 +1,292 @@
+import asyncio
+import logging
+import random
+import time
+from typing import AsyncIterator
+
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.metrics import LLM_REQUESTS, LLM_REQUEST_SECONDS
+from app.core.redis import get_async_redis
+from app.services.chunking import estimate_tokens
+from app.services.llm_client import LLMClient, RateLimitError, CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on output tokens requested per call, counted against the token budget
+MAX_OUTPUT_TOKENS = 500
+
+# Refill every bucket, then take `cost` from all of them only if all can pay.
+# Returns 0 when granted, otherwise the milliseconds until they could.
+# KEYS: bucket keys; ARGV: per bucket (capacity, refill per ms, cost)
+TOKEN_BUCKET_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 3 - 2])
+    local rate = tonumber(ARGV[i * 3 - 1])
+    local cost = math.min(tonumber(ARGV[i * 3]), capacity)
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    levels[i] = tokens
+    if tokens < cost then
+        wait = math.max(wait, math.ceil((cost - tokens) / rate))
+    end
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 3 - 2])
+    local rate = tonumber(ARGV[i * 3 - 1])
+    local tokens = levels[i]
+    if wait == 0 then
+        tokens = tokens - math.min(tonumber(ARGV[i * 3]), capacity)
+    end
+    redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(capacity / rate) + 1000)
+end
+return wait
+"""
+
+# KEYS: failures, open, tripped; ARGV: threshold, window ms, cooldown ms
+RECORD_FAILURE_SCRIPT = """
+local cooldown = tonumber(ARGV[3])
+local function trip()
+    redis.call('SET', KEYS[2], 1, 'PX', cooldown)
+    redis.call('SET', KEYS[3], 1, 'PX', cooldown + tonumber(ARGV[2]))
+    redis.call('DEL', KEYS[1])
+    return 1
+end
+-- Half-open: the first failure after the cooldown reopens the breaker
+if redis.call('EXISTS', KEYS[3]) == 1 and redis.call('EXISTS', KEYS[2]) == 0 then
+    return trip()
+end
+local failures = redis.call('INCR', KEYS[1])
+if failures == 1 then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+if failures >= tonumber(ARGV[1]) then
+    return trip()
+end
+return 0
+"""
+
+class RedisRateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute token buckets for one provider,
+    held in Redis so every worker process draws from the same budget.
+    A limit of 0 disables that bucket.
+    """
+
+    def __init__(self, provider: str, redis_client: aioredis.Redis,
+                 requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        self.redis = redis_client
+        self._script = redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+        self.buckets = [
+            (kind, f"llm_ratelimit:{provider}:{kind}", limit)
+            for kind, limit in (("requests", requests_per_minute), ("tokens", tokens_per_minute))
+            if limit > 0
+        ]
+
+    async def acquire(self, tokens: int):
+        if not self.buckets:
+            return
+
+        costs = {"requests": 1, "tokens": tokens}
+        keys, args = [], []
+        for kind, key, limit in self.buckets:
+            keys.append(key)
+            args += [limit, limit / 60_000, costs[kind]]
+
+        while True:
+            try:
+                wait_ms = await self._script(keys=keys, args=args)
+            except RedisError as e:
+                # Limiter unavailable: fail open rather than stall every job
+                logger.warning(f"Rate limiter unavailable, proceeding without it: {e}")
+                return
+            if not wait_ms:
+                return
+            await asyncio.sleep(wait_ms / 1000)
+
+class CircuitBreaker:
+    """
+    Shared circuit breaker for one provider. After LLM_BREAKER_FAILURE_THRESHOLD
+    failures within the window it opens for LLM_BREAKER_COOLDOWN_SECONDS; the
+    first failure after the cooldown reopens it, the first success closes it.
+    Rate limiting (429) is not a failure: the provider is up and asking us to
+    slow down, which the limiter and retry backoff already do.
+    """
+
+    def __init__(self, provider: str, redis_client: aioredis.Redis):
+        self.redis = redis_client
+        self._record_failure = redis_client.register_script(RECORD_FAILURE_SCRIPT)
+        self.failures_key = f"llm_breaker:{provider}:failures"
+        self.open_key = f"llm_breaker:{provider}:open"
+        self.tripped_key = f"llm_breaker:{provider}:tripped"
+        self.provider = provider
+
+    async def is_open(self) -> bool:
+        try:
+            return bool(await self.redis.exists(self.open_key))
+        except RedisError:
+            return False
+
+    async def cooldown_remaining(self) -> float:
+        """Seconds until an open breaker lets a trial call through; 0 when closed."""
+        try:
+            remaining_ms = await self.redis.pttl(self.open_key)
+        except RedisError:
+            return 0.0
+        return max(0, remaining_ms) / 1000
+
+    async def record_success(self):
+        try:
+            await self.redis.delete(self.failures_key, self.tripped_key)
+        except RedisError:
+            pass
+
+    async def record_failure(self):
+        try:
+            tripped = await self._record_failure(
+                keys=[self.failures_key, self.open_key, self.tripped_key],
+                args=[
+                    settings.LLM_BREAKER_FAILURE_THRESHOLD,
+                    int(settings.LLM_BREAKER_WINDOW_SECONDS * 1000),
+                    int(settings.LLM_BREAKER_COOLDOWN_SECONDS * 1000)
+                ]
+            )
+        except RedisError:
+            return
+        if tripped:
+            logger.error(f"Circuit breaker opened for {self.provider}")
+
+class ResilientLLMClient(LLMClient):
+    """
+    Wraps a provider client with shared rate limiting, jittered exponential
+    retries for retryable errors, and a circuit breaker.
+    """
+
+    RETRYABLE_ERRORS = (RateLimitError, ConnectionError, TimeoutError)
+
+    def __init__(self, client: LLMClient, redis_client: aioredis.Redis | None = None):
+        redis_client = redis_client or get_async_redis()
+        self.client = client
+        self.name = client.name
+        self.limiter = RedisRateLimiter(
+            client.name,
+            redis_client,
+            requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+            tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE
+        )
+        self.breaker = CircuitBreaker(client.name, redis_client)
+
+    @property
+    def model_id(self) -> str:
+        return self.client.model_id
+
+    async def is_available(self) -> bool:
+        return not await self.breaker.is_open()
+
+    async def warm_up(self):
+        await self.client.warm_up()
+        # Load the Lua scripts now rather than on the first call
+        await self.limiter.redis.script_load(TOKEN_BUCKET_SCRIPT)
+        await self.breaker.redis.script_load(RECORD_FAILURE_SCRIPT)
+
+    def _record(self, outcome: str, seconds: float | None = None):
+        LLM_REQUESTS.labels(self.name, outcome).inc()
+        if seconds is not None:
+            LLM_REQUEST_SECONDS.labels(self.name).observe(seconds)
+
+    def _error_outcome(self, error: Exception) -> str:
+        return "rate_limited" if isinstance(error, RateLimitError) else "error"
+
+    def _retry_delay(self, attempt: int) -> float:
+        # Full jitter keeps retrying workers from moving in lockstep
+        backoff = settings.LLM_RETRY_BASE_DELAY_SECONDS * 2 ** attempt
+        return random.uniform(0, min(settings.LLM_RETRY_MAX_DELAY_SECONDS, backoff))
+
+    async def _check_breaker(self, attempt: int):
+        """
+        Refuse new calls while the breaker is open. A call that is already
+        retrying waits out the cooldown instead, so a breaker tripped by other
+        workers does not throw away the retries it has left.
+        """
+        if not await self.breaker.is_open():
+            return
+        if attempt == 0:
+            self._record("circuit_open")
+            raise CircuitOpenError(f"{self.name} is unavailable (circuit open)")
+        remaining = await self.breaker.cooldown_remaining()
+        logger.warning(f"{self.name} circuit is open; retry {attempt} waits {remaining:.1f}s for the cooldown")
+        # Jittered so waiting callers do not all probe the half-open breaker at once
+        await asyncio.sleep(remaining + random.uniform(0, settings.LLM_RETRY_BASE_DELAY_SECONDS))
+
+    async def _record_retryable(self, error: Exception):
+        self._record(self._error_outcome(error))
+        if not isinstance(error, RateLimitError):
+            await self.breaker.record_failure()
+
+    async def summarize(self, text: str) -> str:
+        for attempt in range(settings.LLM_MAX_RETRIES + 1):
+            await self._check_breaker(attempt)
+
+            await self.limiter.acquire(estimate_tokens(text) + MAX_OUTPUT_TOKENS)
+            start = time.perf_counter()
+            try:
+                summary = await self.client.summarize(text)
+            except self.RETRYABLE_ERRORS as e:
+                await self._record_retryable(e)
+                if attempt == settings.LLM_MAX_RETRIES:
+                    raise
+                delay = self._retry_delay(attempt)
+                logger.warning(f"{self.name} call failed ({e}); retry {attempt + 1} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            except (RuntimeError, ValueError) as e:
+                self._record("error")
+                if isinstance(e, RuntimeError):
+                    await self.breaker.record_failure()
+                raise
+
+            self._record("success", time.perf_counter() - start)
+            await self.breaker.record_success()
+            return summary
+
+    async def summarize_stream(self, text: str) -> AsyncIterator[str]:
+        """
+        Stream with the same limiter and breaker. Retries only happen before
+        the first piece: once output has been yielded a failure is raised as is.
+        """
+        for attempt in range(settings.LLM_MAX_RETRIES + 1):
+            await self._check_breaker(attempt)
+
+            await self.limiter.acquire(estimate_tokens(text) + MAX_OUTPUT_TOKENS)
+            start = time.perf_counter()
+            started = False
+            try:
+                async for piece in self.client.summarize_stream(text):
+                    started = True
+                    yield piece
+            except self.RETRYABLE_ERRORS as e:
+                await self._record_retryable(e)
+                if started or attempt == settings.LLM_MAX_RETRIES:
+                    raise
+                delay = self._retry_delay(attempt)
+                logger.warning(f"{self.name} stream failed ({e}); retry {attempt + 1} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            except (RuntimeError, ValueError) as e:
+                self._record("error")
+                if isinstance(e, RuntimeError):
+                    await self.breaker.record_failure()
+                raise
+
+            self._record("success", time.perf_counter() - start)
+            await self.breaker.record_success()
+            return
@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import AsyncIterator
+
+from app.core.config import settings
+from app.services.llm_client import LLMClient, GeminiLLMClient, OpenAILLMClient
+from app.services.llm_resilience import ResilientLLMClient
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_CLIENTS = {
+    "gemini": GeminiLLMClient,
+    "openai": OpenAILLMClient,
+}
+
+class LatencyHistogram:
+    """Rolling window of recent successful call latencies and outcomes for one provider."""
+
+    def __init__(self, window: int):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+
+    def record_success(self, seconds: float):
+        self.latencies.append(seconds)
+        self.outcomes.append(True)
+
+    def record_error(self):
+        self.outcomes.append(False)
+
+    def percentile(self, pct: float) -> float | None:
+        if len(self.latencies) < settings.LLM_LATENCY_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+class ProviderRoute:
+    def __init__(self, client: LLMClient, weight: float):
+        self.client = client
+        self.weight = weight
+        self.histogram = LatencyHistogram(settings.LLM_LATENCY_WINDOW)
+
+    def effective_weight(self) -> float:
+        # Faster and healthier providers get proportionally more traffic
+        p50 = self.histogram.percentile(0.5) or 1.0
+        return self.weight * max(0.01, 1.0 - self.histogram.error_rate()) / max(p50, 0.001)
+
+    def hedge_delay(self) -> float:
+        latency = self.histogram.percentile(settings.LLM_HEDGE_PERCENTILE)
+        if latency is None:
+            return settings.LLM_HEDGE_DEFAULT_DELAY_SECONDS
+        return max(settings.LLM_HEDGE_MIN_DELAY_SECONDS, latency)
+
+class RoutingLLMClient(LLMClient):
+    """
+    Spreads traffic across several providers by weight, adjusted by each
+    provider's observed latency and error rate, and fails over on errors.
+
+    With hedging enabled, if the primary has not answered by its latency
+    percentile (LLM_HEDGE_PERCENTILE) a backup request goes to the next
+    provider and whichever answers first wins.
+    """
+
+    name = "router"
+
+    def __init__(self, providers: list[tuple[LLMClient, float]]):
+        self.routes = [ProviderRoute(client, weight) for client, weight in providers]
+
+    @property
+    def model_id(self) -> str:
+        return "+".join(sorted(route.client.model_id for route in self.routes))
+
+    async def is_available(self) -> bool:
+        for route in self.routes:
+            if await route.client.is_available():
+                return True
+        return False
+
+    async def warm_up(self):
+        await asyncio.gather(*(route.client.warm_up() for route in self.routes))
+
+    async def _ordered_routes(self) -> list[ProviderRoute]:
+        routes = [route for route in self.routes if await route.client.is_available()] or list(self.routes)
+        weights = [route.effective_weight() for route in routes]
+        primary = random.choices(routes, weights=weights)[0]
+        backups = sorted((route for route in routes if route is not primary), key=ProviderRoute.effective_weight, reverse=True)
+        return [primary] + backups
+
+    async def _call(self, route: ProviderRoute, text: str) -> str:
+        start = time.perf_counter()
+        try:
+            summary = await route.client.summarize(text)
+        except Exception:
+            route.histogram.record_error()
+            raise
+        route.histogram.record_success(time.perf_counter() - start)
+        return summary
+
+    async def summarize(self, text: str) -> str:
+        routes = await self._ordered_routes()
+        pending = {}
+        last_error = None
+        hedge_deadline = routes[0].hedge_delay() if settings.LLM_HEDGE_ENABLED else None
+
+        def launch():
+            route = routes.pop(0)
+            pending[asyncio.create_task(self._call(route, text))] = route
+
+        launch()
+        try:
+            while pending:
+                timeout = hedge_deadline if routes else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # Primary is slower than usual: hedge once with the next provider
+                    logger.info(f"Hedging slow {next(iter(pending.values())).client.name} call with {routes[0].client.name}")
+                    hedge_deadline = None
+                    launch()
+                    continue
+
+                for task in done:
+                    route = pending.pop(task)
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+                    logger.warning(f"{route.client.name} failed: {last_error}")
+
+                # Fail over when nothing else is still running
+                if not pending and routes:
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise last_error
+
+    async def summarize_stream(self, text: str) -> AsyncIterator[str]:
+        """
+        Stream from one provider. Until the first piece arrives this behaves
+        like summarize(): a primary with no output by its hedge delay gets a
+        backup stream on the next provider, errors fail over, and the first
+        stream to produce a piece wins. After that the stream can't switch
+        models mid-way, so a later failure is raised as is.
+        """
+        routes = await self._ordered_routes()
+        pending = {}
+        last_error = None
+        winner = None
+        hedge_deadline = routes[0].hedge_delay() if settings.LLM_HEDGE_ENABLED else None
+
+        async def first_piece(stream: AsyncIterator[str]) -> str | None:
+            try:
+                return await stream.__anext__()
+            except StopAsyncIteration:
+                return None
+
+        def launch():
+            route = routes.pop(0)
+            stream = route.client.summarize_stream(text)
+            pending[asyncio.create_task(first_piece(stream))] = (route, stream, time.perf_counter())
+
+        launch()
+        try:
+            while pending and winner is None:
+                timeout = hedge_deadline if routes else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # No output from the primary yet: hedge once with the next provider
+                    logger.info(f"Hedging slow {next(iter(pending.values()))[0].client.name} stream with {routes[0].client.name}")
+                    hedge_deadline = None
+                    launch()
+                    continue
+
+                for task in done:
+                    route, stream, start = pending.pop(task)
+                    if task.exception() is None and winner is None:
+                        winner = (route, stream, start, task.result())
+                        continue
+                    if task.exception() is not None:
+                        route.histogram.record_error()
+                        last_error = task.exception()
+                        logger.warning(f"{route.client.name} stream failed before any output: {last_error}")
+                    await stream.aclose()
+
+                # Fail over when nothing else is still running
+                if winner is None and not pending and routes:
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for _, stream, _ in pending.values():
+                await stream.aclose()
+
+        if winner is None:
+            raise last_error
+
+        route, stream, start, piece = winner
+        try:
+            if piece is not None:
+                yield piece
+                async for piece in stream:
+                    yield piece
+        except Exception:
+            route.histogram.record_error()
+            raise
+        finally:
+            await stream.aclose()
+        route.histogram.record_success(time.perf_counter() - start)
+
+def parse_providers(spec: str) -> list[tuple[str, float]]:
+    """Parse "gemini:3,openai:1" into [("gemini", 3.0), ("openai", 1.0)]; weights default to 1."""
+    providers = []
+    for item in spec.split(","):
+        name, _, weight = item.strip().partition(":")
+        if name:
+            providers.append((name.lower(), float(weight) if weight else 1.0))
+    return providers
+
+def build_llm_client() -> LLMClient:
+    """Build the configured provider client(s), each behind rate limiting, retries and a breaker."""
+    providers = []
+    for name, weight in parse_providers(settings.LLM_PROVIDERS):
+        if name not in PROVIDER_CLIENTS:
+            raise ValueError(f"Unknown LLM provider {name!r} in LLM_PROVIDERS")
+        providers.append((ResilientLLMClient(PROVIDER_CLIENTS[name]()), weight))
+
+    if not providers:
+        raise ValueError("LLM_PROVIDERS must name at least one provider")
+    if len(providers) == 1:
+        return providers[0][0]
+    return RoutingLLMClient(providers)
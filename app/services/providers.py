@@ -0,0 +1,65 @@
+from app.core.redis import get_async_redis
+from app.services.job_events import JobEventBroker
+from app.services.summarizer import SummarizerService
+from app.services.url_extractor import UrlExtractorService
+from app.services.webhooks import WebhookDispatcher
+
+# Application-scoped instances shared by every request (API) or job (worker),
+# so LLM clients, HTTP pools and parse processes are built once
+_summarizer_service: SummarizerService | None = None
+_url_extractor_service: UrlExtractorService | None = None
+_webhook_dispatcher: WebhookDispatcher | None = None
+_job_event_broker: JobEventBroker | None = None
+
+def get_summarizer_service() -> SummarizerService:
+    global _summarizer_service
+    if _summarizer_service is None:
+        _summarizer_service = SummarizerService()
+    return _summarizer_service
+
+def get_url_extractor_service() -> UrlExtractorService:
+    global _url_extractor_service
+    if _url_extractor_service is None:
+        _url_extractor_service = UrlExtractorService()
+    return _url_extractor_service
+
+def get_webhook_dispatcher() -> WebhookDispatcher:
+    global _webhook_dispatcher
+    if _webhook_dispatcher is None:
+        _webhook_dispatcher = WebhookDispatcher()
+    return _webhook_dispatcher
+
+def get_job_event_broker() -> JobEventBroker:
+    global _job_event_broker
+    if _job_event_broker is None:
+        _job_event_broker = JobEventBroker(get_async_redis())
+    return _job_event_broker
+
+def configure_services(summarizer: SummarizerService | None = None, extractor: UrlExtractorService | None = None):
+    """Install specific instances, e.g. a summarizer with a stub LLM client."""
+    global _summarizer_service, _url_extractor_service
+    if summarizer:
+        _summarizer_service = summarizer
+    if extractor:
+        _url_extractor_service = extractor
+
+async def startup_services():
+    """Build the shared services and warm them up."""
+    await get_summarizer_service().warm_up()
+    get_summarizer_service().cache.start()
+    await get_url_extractor_service().warm_up()
+
+async def shutdown_services():
+    global _summarizer_service, _url_extractor_service, _webhook_dispatcher, _job_event_broker
+    if _job_event_broker:
+        await _job_event_broker.aclose()
+    if _summarizer_service:
+        await _summarizer_service.cache.aclose()
+    if _url_extractor_service:
+        await _url_extractor_service.aclose()
+    if _webhook_dispatcher:
+        await _webhook_dispatcher.aclose()
+    _summarizer_service = None
+    _url_extractor_service = None
+    _webhook_dispatcher = None
+    _job_event_broker = None
@@ -0,0 +1,126 @@
+"""
+Near-duplicate summary reuse. Each summarized document gets a 64-bit SimHash
+of its word shingles, indexed in LSH bands on the cache Redis; a document
+whose fingerprint is within SIMILARITY_CACHE_THRESHOLD of an indexed one
+(syndicated copy, re-fetch with a changed timestamp or ad block) reuses that
+document's cached summary instead of calling the LLM.
+"""
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from collections import Counter
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.metrics import CACHE_LOOKUPS
+from app.services.summary_cache import SummaryCache, decode_value
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_BITS = 64
+SHINGLE_WORDS = 3
+WORD_RE = re.compile(r"\w+")
+
+def simhash(text: str) -> int | None:
+    """SimHash of the text's 3-word shingles, or None for texts too short to fingerprint reliably."""
+    words = WORD_RE.findall(text.lower())
+    if len(words) < max(settings.SIMILARITY_CACHE_MIN_WORDS, SHINGLE_WORDS):
+        return None
+    shingles = Counter(" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1))
+
+    # Votes are tallied per digest byte, so a shingle costs 8 counter updates instead of 64 bit tests
+    byte_votes = [Counter() for _ in range(FINGERPRINT_BITS // 8)]
+    for shingle, weight in shingles.items():
+        digest = hashlib.blake2b(shingle.encode("utf-8"), digest_size=FINGERPRINT_BITS // 8).digest()
+        for position, value in enumerate(digest):
+            byte_votes[position][value] += weight
+
+    total = sum(shingles.values())
+    fingerprint = 0
+    for position, votes in enumerate(byte_votes):
+        for bit in range(8):
+            if 2 * sum(weight for value, weight in votes.items() if value >> bit & 1) > total:
+                fingerprint |= 1 << (position * 8 + bit)
+    return fingerprint
+
+def similarity(a: int, b: int) -> float:
+    return 1 - bin(a ^ b).count("1") / FINGERPRINT_BITS
+
+def bands(fingerprint: int, count: int) -> list[int]:
+    width = FINGERPRINT_BITS // count
+    return [(fingerprint >> (band * width)) & ((1 << width) - 1) for band in range(count)]
+
+class SimilarityCache:
+    """
+    LSH index over SimHash fingerprints, next to the summary cache it points
+    into. Fingerprints are split into SIMILARITY_CACHE_BANDS bands; documents
+    sharing any band are candidates, and the closest candidate at or above
+    the threshold whose summary is still cached wins. Documents differing in
+    fewer bits than there are bands always share a band.
+
+    Each band bucket is a sorted set of "fingerprint:content_hash" members,
+    trimmed to the newest SIMILARITY_CACHE_MAX_BUCKET and expiring with the
+    summaries, so lookups stay bounded however many documents are indexed.
+    """
+
+    def __init__(self, cache: SummaryCache):
+        self.cache = cache
+        self.redis = cache.redis
+
+    def band_keys(self, fingerprint: int) -> list[str]:
+        return [
+            f"{self.cache.namespace}:simhash:{band}:{value:x}"
+            for band, value in enumerate(bands(fingerprint, settings.SIMILARITY_CACHE_BANDS))
+        ]
+
+    async def fingerprint(self, content: str) -> int | None:
+        # Pure Python over up to MAX_INPUT_CHARS; a thread keeps the event loop responsive
+        return await asyncio.to_thread(simhash, content)
+
+    async def lookup(self, fingerprint: int) -> tuple[str, float] | None:
+        """Summary and similarity of the closest indexed document at or above the threshold."""
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key in self.band_keys(fingerprint):
+                    pipe.zrange(key, 0, -1)
+                buckets = await pipe.execute()
+
+            candidates = {}
+            for members in buckets:
+                for member in members:
+                    fingerprint_hex, content_hash = member.decode().split(":", 1)
+                    candidates[content_hash] = similarity(fingerprint, int(fingerprint_hex, 16))
+            matches = sorted(
+                (score, content_hash) for content_hash, score in candidates.items()
+                if score >= settings.SIMILARITY_CACHE_THRESHOLD
+            )[::-1][:settings.SIMILARITY_CACHE_MAX_CANDIDATES]
+
+            # Read directly rather than through SummaryCache.get, which would count these as exact lookups
+            values = await self.redis.mget([self.cache.key(content_hash) for _, content_hash in matches]) if matches else []
+        except RedisError as e:
+            logger.warning(f"Similarity cache lookup failed: {e}")
+            CACHE_LOOKUPS.labels("similarity", "miss").inc()
+            return None
+
+        for (score, _), value in zip(matches, values):
+            if value is not None:
+                CACHE_LOOKUPS.labels("similarity", "hit").inc()
+                return decode_value(value), score
+        CACHE_LOOKUPS.labels("similarity", "miss").inc()
+        return None
+
+    async def add(self, fingerprint: int, content_hash: str):
+        """Index a document whose summary has just been cached under content_hash."""
+        member = f"{fingerprint:016x}:{content_hash}"
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key in self.band_keys(fingerprint):
+                    pipe.zadd(key, {member: time.time()})
+                    pipe.zremrangebyrank(key, 0, -settings.SIMILARITY_CACHE_MAX_BUCKET - 1)
+                    pipe.expire(key, settings.SUMMARY_CACHE_TTL_SECONDS)
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Similarity cache write failed: {e}")
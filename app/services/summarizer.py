@@ -1,16 +1,37 @@
+import asyncio
 import logging, time
+from contextlib import contextmanager
+from typing import AsyncIterator
 from fastapi import HTTPException, status
-from app.services.llm_client import GeminiLLMClient
+from app.core.config import settings
+from app.services.chunking import estimate_tokens, split_into_chunks
+from app.services.deduplication import get_content_hash
+from app.services.llm_client import CircuitOpenError, LLMClient
+from app.services.llm_router import build_llm_client
+from app.services.similarity_cache import SimilarityCache
+from app.services.summary_cache import SummaryCache
 
 logger = logging.getLogger(__name__)
 
 class SummarizerService:
-    def __init__(self):
-        self.llm_client = GeminiLLMClient()
+    def __init__(self, llm_client: LLMClient | None = None):
+        self.llm_client = llm_client or build_llm_client()
+        self.cache = SummaryCache(self.llm_client.model_id)
+        self.similarity_cache = SimilarityCache(self.cache)
+        # Shared by every long document this service handles, bounding chunk calls in flight
+        self._chunk_slots = asyncio.Semaphore(settings.SUMMARY_MAX_CONCURRENT_CHUNKS)
 
-    async def summarize(self, text: str) -> str:
+    async def warm_up(self):
+        await self.llm_client.warm_up()
+
+    @contextmanager
+    def _translate_errors(self):
         try:
-            return await self.llm_client.summarize(text)
+            yield
+
+        except CircuitOpenError:
+            # Not a failure of this input: the worker requeues the job until the provider recovers
+            raise
 
         except ValueError as e:
             logger.error(f"Value error in summarizer service: {str(e)}")
@@ -46,3 +67,64 @@ class SummarizerService:
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Internal server error during summarization"
             )
+
+    async def summarize(self, text: str) -> str:
+        with self._translate_errors():
+            if estimate_tokens(text) > settings.SUMMARY_CHUNK_TOKENS:
+                return await self._summarize_long(text)
+            return await self.llm_client.summarize(text)
+
+    async def summarize_stream(self, text: str) -> AsyncIterator[str]:
+        """
+        Yield the summary in pieces as the model generates it. Long documents
+        run the map steps as usual and stream only the final reduce call.
+        """
+        with self._translate_errors():
+            final_input = text
+            if estimate_tokens(text) > settings.SUMMARY_CHUNK_TOKENS:
+                chunks = self._split(text)
+                logger.info(f"Long document ({estimate_tokens(text)} tokens) split into {len(chunks)} chunks")
+                while len(chunks) > 1:
+                    partials = await self._summarize_chunks(chunks)
+                    chunks = self._split("\n\n".join(partials))
+                final_input = chunks[0]
+
+            async for piece in self.llm_client.summarize_stream(final_input):
+                yield piece
+
+    async def _summarize_long(self, text: str) -> str:
+        """
+        Map-reduce summarization: summarize token-sized chunks concurrently,
+        then summarize groups of partial summaries until one remains.
+        """
+        chunks = self._split(text)
+        logger.info(f"Long document ({estimate_tokens(text)} tokens) split into {len(chunks)} chunks")
+
+        partials = await self._summarize_chunks(chunks)
+        while len(partials) > 1:
+            groups = self._split("\n\n".join(partials))
+            partials = await self._summarize_chunks(groups)
+        return partials[0]
+
+    def _split(self, text: str) -> list[str]:
+        # Blank paragraphs are dropped, so whitespace-only text (or all-blank partial summaries) yields nothing
+        chunks = split_into_chunks(text, settings.SUMMARY_CHUNK_TOKENS)
+        if not chunks:
+            raise ValueError("Nothing to summarize: the text is empty or whitespace only")
+        return chunks
+
+    async def _summarize_chunks(self, chunks: list[str]) -> list[str]:
+        return await asyncio.gather(*(self._summarize_chunk(chunk) for chunk in chunks))
+
+    async def _summarize_chunk(self, chunk: str) -> str:
+        # Cached per chunk, so editing a document only re-summarizes the chunks that changed
+        chunk_hash = get_content_hash(chunk)
+        cached_summary = await self.cache.get(chunk_hash, kind="chunk")
+        if cached_summary:
+            return cached_summary
+
+        async with self._chunk_slots:
+            summary = await self.llm_client.summarize(chunk)
+
+        await self.cache.set(chunk_hash, summary, kind="chunk")
+        return summary
@@ -0,0 +1,237 @@
+import asyncio
+import logging
+import time
+import zlib
+
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.metrics import CACHE_LOOKUPS
+from app.core.memory_cache import ByteLRUCache
+from app.core.redis import get_cache_redis
+from app.services.llm_client import SUMMARY_PROMPT_VERSION
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "summary_cache"
+STATS_KEY = f"{CACHE_KEY_PREFIX}:stats"
+INVALIDATION_CHANNEL = f"{CACHE_KEY_PREFIX}:invalidate"
+STATS_FLUSH_INTERVAL_SECONDS = 10.0
+
+# One-byte header on every value, so entries stay readable when the codec setting changes
+RAW, ZLIB, ZSTD = b"n", b"z", b"s"
+
+def encode_value(summary: str) -> bytes:
+    data = summary.encode("utf-8")
+    if len(data) < settings.SUMMARY_CACHE_COMPRESS_MIN_BYTES or settings.SUMMARY_CACHE_COMPRESSION == "none":
+        return RAW + data
+    if settings.SUMMARY_CACHE_COMPRESSION == "zstd" and zstandard:
+        return ZSTD + zstandard.ZstdCompressor(level=3).compress(data)
+    return ZLIB + zlib.compress(data, 6)
+
+def decode_value(value: bytes) -> str:
+    codec, data = value[:1], value[1:]
+    if codec == ZLIB:
+        data = zlib.decompress(data)
+    elif codec == ZSTD:
+        if not zstandard:
+            raise ValueError("Cache entry is zstd-compressed but zstandard is not installed")
+        data = zstandard.ZstdDecompressor().decompress(data)
+    return data.decode("utf-8")
+
+class SummaryCache:
+    """
+    Summaries keyed by content hash, namespaced by model and prompt version
+    so a model or prompt change never serves summaries from the old one.
+
+    Entries are compressed, expire after SUMMARY_CACHE_TTL_SECONDS (extended
+    on every hit with sliding expiry), and live on the cache Redis.
+    Hit, miss and byte counters are kept per process and periodically added
+    to a shared stats hash.
+
+    Hot entries are also kept in a per-process L1 (byte-bounded LRU with a
+    short TTL). Writes publish the key on a pub/sub channel so every
+    process drops its L1 copy.
+    """
+
+    def __init__(self, model_id: str, redis_client: aioredis.Redis | None = None):
+        self.redis = redis_client or get_cache_redis()
+        self.namespace = f"{CACHE_KEY_PREFIX}:{model_id}:p{SUMMARY_PROMPT_VERSION}"
+        self.counters = {
+            "hits": 0, "l1_hits": 0, "misses": 0, "errors": 0, "bytes_read": 0, "bytes_written": 0, "writes": 0
+        }
+        self.local = None
+        if settings.SUMMARY_CACHE_L1_MAX_BYTES > 0:
+            self.local = ByteLRUCache(settings.SUMMARY_CACHE_L1_MAX_BYTES, ttl_seconds=settings.SUMMARY_CACHE_L1_TTL_SECONDS)
+        self._listener: asyncio.Task | None = None
+        self._unflushed = dict.fromkeys(self.counters, 0)
+        self._last_flush = time.monotonic()
+
+        if settings.SUMMARY_CACHE_COMPRESSION == "zstd" and not zstandard:
+            logger.warning("SUMMARY_CACHE_COMPRESSION=zstd but zstandard is not installed; using zlib")
+
+    def key(self, content_hash: str, kind: str = "doc") -> str:
+        return f"{self.namespace}:{kind}:{content_hash}"
+
+    def _count(self, **increments: int):
+        for name, value in increments.items():
+            self.counters[name] += value
+            self._unflushed[name] += value
+        if increments.get("hits"):
+            CACHE_LOOKUPS.labels("summary", "hit").inc(increments["hits"])
+        if increments.get("misses"):
+            CACHE_LOOKUPS.labels("summary", "miss").inc(increments["misses"])
+
+    async def get(self, content_hash: str, kind: str = "doc") -> str | None:
+        key = self.key(content_hash, kind)
+        if self.local:
+            summary = self.local.get(key)
+            if summary is not None:
+                self._count(hits=1, l1_hits=1)
+                return summary
+
+        try:
+            if settings.SUMMARY_CACHE_SLIDING_EXPIRY:
+                value = await self.redis.getex(key, ex=settings.SUMMARY_CACHE_TTL_SECONDS)
+            else:
+                value = await self.redis.get(key)
+        except RedisError as e:
+            # The cache is an optimization; treat an unreachable cache as a miss
+            logger.warning(f"Summary cache lookup failed: {e}")
+            self._count(errors=1, misses=1)
+            return None
+
+        if value is None:
+            self._count(misses=1)
+            await self._maybe_flush_stats()
+            return None
+
+        self._count(hits=1, bytes_read=len(value))
+        await self._maybe_flush_stats()
+        summary = decode_value(value)
+        if self.local:
+            self.local.set(key, summary, len(value) + len(key))
+        return summary
+
+    async def get_many(self, content_hashes: list[str], kind: str = "doc") -> list[str | None]:
+        """Look up several summaries with one pipelined round-trip for the L1 misses."""
+        keys = [self.key(content_hash, kind) for content_hash in content_hashes]
+        summaries = [self.local.get(key) if self.local else None for key in keys]
+        l1_hits = sum(summary is not None for summary in summaries)
+        self._count(hits=l1_hits, l1_hits=l1_hits)
+
+        missing = [i for i, summary in enumerate(summaries) if summary is None]
+        if not missing:
+            return summaries
+
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for i in missing:
+                    if settings.SUMMARY_CACHE_SLIDING_EXPIRY:
+                        pipe.getex(keys[i], ex=settings.SUMMARY_CACHE_TTL_SECONDS)
+                    else:
+                        pipe.get(keys[i])
+                values = await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Summary cache lookup failed: {e}")
+            self._count(errors=1, misses=len(missing))
+            return summaries
+
+        for i, value in zip(missing, values):
+            if value is None:
+                self._count(misses=1)
+                continue
+            self._count(hits=1, bytes_read=len(value))
+            summaries[i] = decode_value(value)
+            if self.local:
+                self.local.set(keys[i], summaries[i], len(value) + len(keys[i]))
+        await self._maybe_flush_stats()
+        return summaries
+
+    async def set(self, content_hash: str, summary: str, kind: str = "doc"):
+        value = encode_value(summary)
+        if len(value) > settings.SUMMARY_CACHE_MAX_ENTRY_BYTES:
+            logger.info(f"Not caching {len(value)}-byte summary (limit {settings.SUMMARY_CACHE_MAX_ENTRY_BYTES})")
+            return
+
+        key = self.key(content_hash, kind)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.set(key, value, ex=settings.SUMMARY_CACHE_TTL_SECONDS)
+                # An overwrite must not leave older copies in other processes' L1
+                pipe.publish(INVALIDATION_CHANNEL, key)
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Summary cache write failed: {e}")
+            self._count(errors=1)
+            return
+        self._count(writes=1, bytes_written=len(value))
+        await self._maybe_flush_stats()
+
+    async def invalidate(self, content_hash: str, kind: str = "doc"):
+        key = self.key(content_hash, kind)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.delete(key)
+            pipe.publish(INVALIDATION_CHANNEL, key)
+            await pipe.execute()
+
+    def start(self):
+        """Start dropping L1 entries invalidated by any process."""
+        if self.local and not self._listener:
+            self._listener = asyncio.create_task(self._listen_for_invalidations())
+
+    async def aclose(self):
+        if self._listener:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    async def _listen_for_invalidations(self):
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(INVALIDATION_CHANNEL)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.local.pop(message["data"].decode())
+            except RedisError as e:
+                # Missed messages could leave stale entries; start over with an empty L1
+                logger.warning(f"Cache invalidation listener lost Redis, resubscribing: {e}")
+                self.local.clear()
+                await asyncio.sleep(1)
+
+    async def _maybe_flush_stats(self):
+        if time.monotonic() - self._last_flush < STATS_FLUSH_INTERVAL_SECONDS:
+            return
+        self._last_flush = time.monotonic()
+        pending, self._unflushed = self._unflushed, dict.fromkeys(self.counters, 0)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for name, value in pending.items():
+                    if value:
+                        pipe.hincrby(STATS_KEY, name, value)
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Could not publish summary cache stats: {e}")
+
+    async def stats(self) -> dict:
+        """Cluster-wide counters plus this process's unflushed ones and cache memory use."""
+        shared = {name.decode(): int(value) for name, value in (await self.redis.hgetall(STATS_KEY)).items()}
+        totals = {name: shared.get(name, 0) + self._unflushed[name] for name in self.counters}
+        lookups = totals["hits"] + totals["misses"]
+        memory = await self.redis.info("memory")
+        return {
+            **totals,
+            "hit_ratio": round(totals["hits"] / lookups, 4) if lookups else None,
+            "l1": self.local.stats() if self.local else None,
+            "used_memory_bytes": memory.get("used_memory"),
+            "maxmemory_bytes": memory.get("maxmemory"),
+            "maxmemory_policy": memory.get("maxmemory_policy"),
+            "namespace": self.namespace
+        }
@@ -0,0 +1,51 @@
+import time
+from dataclasses import dataclass
+
+from app.core.config import settings
+from app.core.memory_cache import ByteLRUCache
+
+@dataclass
+class CachedPage:
+    text: str
+    etag: str | None
+    last_modified: str | None
+    fetched_at: float
+
+    def is_fresh(self) -> bool:
+        return time.time() - self.fetched_at < settings.URL_CACHE_TTL_SECONDS
+
+    def validators(self) -> dict:
+        """Conditional request headers that let the origin answer 304 Not Modified."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+class UrlContentCache:
+    """
+    Extracted page text per URL, kept with the origin's validators.
+
+    Entries are served directly while fresh (URL_CACHE_TTL_SECONDS) and are
+    revalidated with a conditional request once stale. Total size is capped
+    at URL_CACHE_MAX_BYTES with LRU eviction.
+    """
+
+    def __init__(self, max_bytes: int | None = None):
+        self._pages = ByteLRUCache(max_bytes or settings.URL_CACHE_MAX_BYTES)
+
+    def get(self, url: str) -> CachedPage | None:
+        return self._pages.get(url)
+
+    def put(self, url: str, text: str, etag: str | None = None, last_modified: str | None = None):
+        page = CachedPage(text=text, etag=etag, last_modified=last_modified, fetched_at=time.time())
+        size = len(text.encode("utf-8")) + len(url) + len(etag or "") + len(last_modified or "")
+        self._pages.set(url, page, size)
+
+    def revalidated(self, url: str, page: CachedPage):
+        """Mark a page fresh again after the origin answered 304."""
+        page.fetched_at = time.time()
+
+    def stats(self) -> dict:
+        return self._pages.stats()
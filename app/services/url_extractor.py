@@ -1,28 +1,177 @@
+import asyncio
+import codecs
 import httpx
-from readability import Document
-from bs4 import BeautifulSoup
 from fastapi import HTTPException, status
 import logging
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from concurrent.futures.process import BrokenProcessPool
 
 from app.core.config import settings
+from app.core.metrics import CACHE_LOOKUPS, time_stage
+from app.services.html_parser import extract_article_text
+from app.services.url_cache import UrlContentCache
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+HTML_CONTENT_TYPES = {"text/html", "application/xhtml+xml"}
+
+class HostLimiter:
+    """
+    Caps concurrent requests per host. A host's semaphore only exists while
+    requests to it are running or waiting, so crawling many distinct hosts
+    does not grow the map without bound.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        # host -> (semaphore, requests holding or waiting for it)
+        self._hosts: dict[str, tuple[asyncio.Semaphore, int]] = {}
+
+    @asynccontextmanager
+    async def slot(self, host: str):
+        semaphore, users = self._hosts.get(host) or (asyncio.Semaphore(self.limit), 0)
+        self._hosts[host] = (semaphore, users + 1)
+        try:
+            async with semaphore:
+                yield
+        finally:
+            semaphore, users = self._hosts[host]
+            if users == 1:
+                del self._hosts[host]
+            else:
+                self._hosts[host] = (semaphore, users - 1)
+
+    def __len__(self) -> int:
+        return len(self._hosts)
+
 class UrlExtractorService:
-    async def extract(self, url: str) -> str:
+    def __init__(self):
+        headers = {
+            "User-Agent": settings.SCRAPER_USER_AGENT,
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8",
+            "Accept-Language": "en-US,en;q=0.9",
+            "Referer": "https://www.google.com/"
+        }
+        # One long-lived client so DNS, TCP and TLS setup is reused across fetches
+        self.client = httpx.AsyncClient(
+            follow_redirects=True,
+            timeout=settings.SCRAPER_TIMEOUT_SECONDS,
+            headers=headers,
+            http2=settings.SCRAPER_HTTP2 and HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=settings.SCRAPER_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.SCRAPER_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.SCRAPER_KEEPALIVE_EXPIRY_SECONDS
+            )
+        )
+        self._host_limiter = HostLimiter(settings.SCRAPER_MAX_CONNECTIONS_PER_HOST)
+        self._parse_pool = self._new_parse_pool()
+        self.url_cache = UrlContentCache() if settings.URL_CACHE_ENABLED else None
+
+    def _new_parse_pool(self) -> ProcessPoolExecutor | None:
+        if settings.SCRAPER_PARSE_WORKERS <= 0:
+            return None
+        return ProcessPoolExecutor(max_workers=settings.SCRAPER_PARSE_WORKERS)
+
+    async def warm_up(self):
+        # Start the parse processes and import readability/bs4 in them ahead of the first page
+        if self._parse_pool:
+            await self._parse("<html><body><p>warm-up</p></body></html>")
+
+    async def aclose(self):
+        await self.client.aclose()
+        if self._parse_pool:
+            self._parse_pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _parse(self, html: str) -> str | None:
+        if not self._parse_pool:
+            return extract_article_text(html, settings.SCRAPER_HTML_PARSER)
+
+        # Parsing is CPU-bound; run it in a worker process so the event loop keeps serving other jobs
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                self._parse_pool, extract_article_text, html, settings.SCRAPER_HTML_PARSER
+            )
+        except BrokenProcessPool:
+            logger.error("HTML parse pool died, starting a new one")
+            self._parse_pool = self._new_parse_pool()
+            raise
+
+    async def _fetch(self, url: str, headers: dict | None = None) -> tuple[httpx.Response, str]:
+        """
+        Streams the page body, stopping at SCRAPER_MAX_DOWNLOAD_BYTES, and
+        returns the response with the decoded HTML. Non-HTML bodies and
+        oversized declared lengths are rejected before the body is read.
+        """
+        # Cap concurrent requests per host so one popular domain can't take the whole pool
+        async with self._host_limiter.slot(httpx.URL(url).host):
+            async with self.client.stream("GET", url, headers=headers) as response:
+                if response.status_code != 200:
+                    return response, ""
+
+                content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+                if content_type and content_type not in HTML_CONTENT_TYPES:
+                    raise HTTPException(
+                        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                        detail=f"URL does not point to an HTML page (Content-Type: {content_type})"
+                    )
+
+                content_length = response.headers.get("Content-Length", "")
+                if content_length.isdigit() and int(content_length) > settings.SCRAPER_MAX_CONTENT_LENGTH_BYTES:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail="Page is too large to process"
+                    )
+
+                try:
+                    decoder = codecs.getincrementaldecoder(response.charset_encoding or "utf-8")(errors="replace")
+                except LookupError:
+                    # Unknown charset label from the server
+                    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+                parts = []
+                remaining = settings.SCRAPER_MAX_DOWNLOAD_BYTES
+                async for chunk in response.aiter_bytes():
+                    chunk = chunk[:remaining]
+                    parts.append(decoder.decode(chunk))
+                    remaining -= len(chunk)
+                    if remaining <= 0:
+                        # Article text sits early in the page; the truncated tail is not worth reading
+                        logger.info(f"Stopped reading {url} at {settings.SCRAPER_MAX_DOWNLOAD_BYTES} bytes")
+                        break
+                parts.append(decoder.decode(b"", final=True))
+
+        return response, "".join(parts)
+
+    async def extract(self, url: str, timings: dict | None = None) -> str:
         """
         Fetches the content from the given URL, extracts the main article text,
-        cleans it, and returns the plain text.
+        cleans it, and returns the plain text. Fetch and parse durations are
+        added (in ms) to `timings` when given.
         """
+        cached_page = self.url_cache.get(url) if self.url_cache else None
+        if cached_page and cached_page.is_fresh():
+            CACHE_LOOKUPS.labels("url", "hit").inc()
+            return cached_page.text
+
         try:
-            headers = {
-                "User-Agent": settings.SCRAPER_USER_AGENT,
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8",
-                "Accept-Language": "en-US,en;q=0.9",
-                "Referer": "https://www.google.com/"
-            }
-            async with httpx.AsyncClient(follow_redirects=True, timeout=settings.SCRAPER_TIMEOUT_SECONDS, headers=headers) as client:
-                response = await client.get(url)
+            with time_stage("fetch", timings):
+                response, html = await self._fetch(url, headers=cached_page.validators() if cached_page else None)
+
+            # Unchanged since we cached it: skip the download and the parse
+            if response.status_code == 304 and cached_page:
+                CACHE_LOOKUPS.labels("url", "revalidated").inc()
+                self.url_cache.revalidated(url, cached_page)
+                return cached_page.text
+            if self.url_cache:
+                CACHE_LOOKUPS.labels("url", "miss").inc()
                 
             if response.status_code != 200:
                 logger.warning(f"URL fetch failed {url}: {response.status_code}")
@@ -31,24 +180,14 @@ class UrlExtractorService:
                     detail=f"Failed to fetch content from URL. Status code: {response.status_code}"
                 )
                 
-            # Use readability to extract main content
-            doc = Document(response.text)
-            summary_html = doc.summary()
+            with time_stage("parse", timings):
+                text = await self._parse(html)
             
-            if not summary_html:
+            if text is None:
                 raise HTTPException(
                     status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
                     detail="Could not extract content from the page"
                 )
-
-            # Clean with BeautifulSoup
-            soup = BeautifulSoup(summary_html, "html.parser")
-            
-            # Remove scripts, styles, and other non-content tags
-            for element in soup(["script", "style", "noscript", "iframe", "header", "footer", "nav"]):
-                element.decompose()
-                
-            text = soup.get_text(separator=' ', strip=True)
             
             if not text or len(text) < 50:
                  raise HTTPException(
@@ -56,8 +195,12 @@ class UrlExtractorService:
                     detail="Extracted content is too short or empty"
                 )
                 
-            # Limit to 12,000 characters
-            return text[:12000]
+            # Long pages are summarized in chunks; only cap pathological sizes
+            text = text[:settings.MAX_INPUT_CHARS]
+
+            if self.url_cache:
+                self.url_cache.put(url, text, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+            return text
 
         except httpx.InvalidURL:
              raise HTTPException(
@@ -0,0 +1,40 @@
+import asyncio
+import logging
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class WebhookDispatcher:
+    """Delivers job results to client callback URLs in the background, with retries."""
+
+    def __init__(self):
+        self.client = httpx.AsyncClient(timeout=settings.WEBHOOK_TIMEOUT_SECONDS)
+        self._deliveries: set[asyncio.Task] = set()
+
+    def dispatch(self, url: str, payload: dict):
+        task = asyncio.create_task(self._deliver(url, payload))
+        self._deliveries.add(task)
+        task.add_done_callback(self._deliveries.discard)
+
+    async def _deliver(self, url: str, payload: dict):
+        for attempt in range(1, settings.WEBHOOK_MAX_ATTEMPTS + 1):
+            try:
+                response = await self.client.post(url, json=payload)
+                if response.status_code < 400:
+                    return
+                logger.warning(f"Webhook {url} for job {payload['job_id']} returned {response.status_code}")
+            except httpx.HTTPError as e:
+                logger.warning(f"Webhook {url} for job {payload['job_id']} failed: {e}")
+
+            if attempt < settings.WEBHOOK_MAX_ATTEMPTS:
+                await asyncio.sleep(2 ** attempt)
+        logger.error(f"Giving up on webhook {url} for job {payload['job_id']}")
+
+    async def aclose(self):
+        # Let deliveries already under way finish (bounded by their retries)
+        if self._deliveries:
+            await asyncio.gather(*self._deliveries, return_exceptions=True)
+        await self.client.aclose()
@@ -0,0 +1,123 @@
+"""
+Compare worker throughput with WORKER_BATCH_SIZE=1 and a larger batch size
+against the configured Postgres and Redis.
+
+Jobs are enqueued on the real queue and consumed like run_worker does:
+pops fill the free slots up to the batch size, and each batch goes through
+run_batch, with its per-job acks and the windowed FinalStateWriter. Every
+job is a text job whose summary is already cached, so the run measures
+queue and database overhead rather than LLM latency. Use scratch instances:
+the run pops whatever is queued.
+
+Usage:
+    python -m benchmarks.bench_batch_dequeue --jobs 2000 --batch-size 16
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import delete, insert
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, Base, async_engine
+from app.core.job_queue import JobQueue, enqueue_jobs, tenant_id_for
+from app.core.redis import get_async_redis, get_cache_redis
+from app.models.job import Job
+from app.services.deduplication import get_content_hash
+from app.services.providers import get_summarizer_service, get_url_extractor_service
+from worker import FinalStateWriter, run_batch
+
+BENCH_TEXT = "Benchmark article body used to exercise the cache-hit path of the worker. " * 4
+
+async def create_jobs(count: int) -> list[str]:
+    job_ids = [uuid.uuid4() for _ in range(count)]
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            insert(Job),
+            [{"id": job_id, "input_type": "text", "input_value": BENCH_TEXT, "status": "queued"} for job_id in job_ids]
+        )
+        await db.commit()
+    return [str(job_id) for job_id in job_ids]
+
+async def delete_jobs(job_ids: list[str]):
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Job).where(Job.id.in_([uuid.UUID(job_id) for job_id in job_ids])))
+        await db.commit()
+
+async def run(job_ids: list[str], batch_size: int, concurrency: int) -> tuple[float, int]:
+    """Drain the jobs through run_batch; returns the seconds until the last ack and the jobs requeued."""
+    settings.WORKER_BATCH_SIZE = batch_size
+    summarizer = get_summarizer_service()
+    extractor = get_url_extractor_service()
+    redis_client = get_async_redis()
+    queue = JobQueue(redis_client)
+    writer = FinalStateWriter()
+    await enqueue_jobs(redis_client, job_ids, settings.QUEUE_BATCH_LANE, tenant_id_for("bench-batch-dequeue"))
+
+    # Same number of jobs in flight for both modes
+    slots = asyncio.Semaphore(concurrency)
+    remaining = len(job_ids)
+    requeued = 0
+    finished = asyncio.Event()
+    finished_at = 0.0
+    in_flight = set()
+
+    def job_done(seconds: float, ok: bool):
+        nonlocal remaining, requeued, finished_at
+        slots.release()
+        # A requeued job counts as done, so a persistent failure cannot stall the run
+        requeued += not ok
+        remaining -= 1
+        if remaining == 0:
+            finished_at = time.perf_counter()
+            finished.set()
+
+    start = time.perf_counter()
+    while not finished.is_set():
+        await slots.acquire()
+        reserved = 1
+        while reserved < batch_size and not slots.locked():
+            await slots.acquire()
+            reserved += 1
+        popped = await queue.pop_many(reserved, timeout=1)
+        for _ in range(reserved - len(popped)):
+            slots.release()
+        if popped:
+            task = asyncio.create_task(run_batch(popped, queue, summarizer, extractor, writer, job_done))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+
+    await asyncio.gather(*in_flight)
+    await writer.flush()
+    await queue.release()
+    return finished_at - start, requeued
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=32, help="jobs in flight at once")
+    args = parser.parse_args()
+
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await get_summarizer_service().cache.set(get_content_hash(BENCH_TEXT), "Cached benchmark summary.")
+
+    for label, batch_size in (("per-job", 1), ("batched", args.batch_size)):
+        job_ids = await create_jobs(args.jobs)
+        try:
+            elapsed, requeued = await run(job_ids, batch_size, args.concurrency)
+        finally:
+            await delete_jobs(job_ids)
+        print(
+            f"{label:>8} (batch={batch_size:>3}): {elapsed:7.2f}s  {args.jobs / elapsed:9.1f} jobs/s"
+            + (f"  ({requeued} requeued)" if requeued else "")
+        )
+
+    await get_async_redis().aclose()
+    await get_cache_redis().aclose()
+    await async_engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
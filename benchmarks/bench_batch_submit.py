@@ -0,0 +1,98 @@
+"""
+Submission throughput: N documents sent one POST /submit at a time (with
+the given client concurrency), then as a JSON array and as an NDJSON stream
+to POST /submit/batch.
+
+Jobs go to a scratch queue key and are deleted afterwards. Requests go
+straight into the ASGI app, so the numbers are server-side cost.
+
+Usage:
+    python -m benchmarks.bench_batch_submit --docs 5000 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import httpx
+from sqlalchemy import delete
+
+from app.api import jobs
+from app.core.database import AsyncSessionLocal, Base, async_engine
+from app.core.redis import get_async_redis, get_cache_redis
+from app.main import app
+from app.models.job import Job
+from app.services.providers import shutdown_services
+
+BENCH_QUEUE_KEY = "bench:summary_jobs"
+
+def make_docs(count: int) -> list[dict]:
+    # Unique text per document so the summary cache and dedup don't short-circuit
+    return [{"text": f"Benchmark document {uuid.uuid4()}. " + "Filler sentence for the summarizer. " * 10}
+            for _ in range(count)]
+
+async def submit_single(client: httpx.AsyncClient, docs: list[dict], concurrency: int) -> list[str]:
+    slots = asyncio.Semaphore(concurrency)
+
+    async def submit(doc: dict) -> str:
+        async with slots:
+            response = await client.post("/submit", json=doc)
+            response.raise_for_status()
+            return response.json()["job_id"]
+
+    return await asyncio.gather(*(submit(doc) for doc in docs))
+
+async def submit_array(client: httpx.AsyncClient, docs: list[dict]) -> list[str]:
+    response = await client.post("/submit/batch", json=docs)
+    response.raise_for_status()
+    return [item["job_id"] for item in response.json()["jobs"]]
+
+async def submit_ndjson(client: httpx.AsyncClient, docs: list[dict]) -> list[str]:
+    async def body():
+        for doc in docs:
+            yield (json.dumps(doc) + "\n").encode()
+
+    response = await client.post(
+        "/submit/batch", content=body(), headers={"Content-Type": "application/x-ndjson"}
+    )
+    response.raise_for_status()
+    return [item["job_id"] for item in response.json()["jobs"]]
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    jobs.JOB_QUEUE_KEY = BENCH_QUEUE_KEY
+    job_ids = []
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for label, submit in (
+                ("single", lambda docs: submit_single(client, docs, args.concurrency)),
+                ("array", lambda docs: submit_array(client, docs)),
+                ("ndjson", lambda docs: submit_ndjson(client, docs)),
+            ):
+                docs = make_docs(args.docs)
+                start = time.perf_counter()
+                job_ids += await submit(docs)
+                elapsed = time.perf_counter() - start
+                print(f"{label:>6}: {args.docs / elapsed:9.1f} docs/s ({elapsed:.2f}s)")
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(Job).where(Job.id.in_([uuid.UUID(job_id) for job_id in job_ids])))
+            await db.commit()
+        async for key in get_async_redis().scan_iter(match=f"{BENCH_QUEUE_KEY}*"):
+            await get_async_redis().delete(key)
+        await shutdown_services()
+        await get_async_redis().aclose()
+        await get_cache_redis().aclose()
+        await async_engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+"""
+Queue fairness: one tenant floods the bulk lane with a backlog while another
+submits interactive jobs at a steady rate. Simulated workers pop with the
+real scheduling script and "process" each job for a fixed time. Reports the
+queue wait of interactive jobs and the bulk throughput soaked up meanwhile.
+
+Runs against a scratch Redis database (--db), which it flushes.
+
+Usage:
+    python -m benchmarks.bench_fair_queue --bulk 20000 --interactive-rate 20 --workers 8
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+from app.core.job_queue import JobQueue, enqueue_jobs, tenant_id_for
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", type=int, default=15, help="Scratch Redis database, flushed by the run")
+    parser.add_argument("--bulk", type=int, default=20000)
+    parser.add_argument("--interactive-rate", type=float, default=20.0, help="Interactive jobs per second")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--job-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    redis_client = aioredis.from_url(settings.REDIS_URL, db=args.db, decode_responses=True)
+    await redis_client.flushdb()
+
+    bulk_tenant, interactive_tenant = tenant_id_for("bulk-client"), tenant_id_for("interactive-client")
+    await enqueue_jobs(redis_client, [str(uuid.uuid4()) for _ in range(args.bulk)], settings.QUEUE_BATCH_LANE, bulk_tenant)
+
+    submitted_at = {}
+    waits = []
+    bulk_done = 0
+    stop = asyncio.Event()
+
+    async def submit_interactive():
+        while not stop.is_set():
+            job_id = str(uuid.uuid4())
+            submitted_at[job_id] = time.perf_counter()
+            await enqueue_jobs(redis_client, [job_id], settings.QUEUE_DEFAULT_LANE, interactive_tenant)
+            await asyncio.sleep(1 / args.interactive_rate)
+
+    async def worker():
+        nonlocal bulk_done
+        queue = JobQueue(redis_client)
+        while not stop.is_set():
+            job_ids = await queue.pop_many(1, timeout=1)
+            for job_id in job_ids:
+                if job_id in submitted_at:
+                    waits.append(time.perf_counter() - submitted_at.pop(job_id))
+                else:
+                    bulk_done += 1
+            await asyncio.sleep(args.job_ms / 1000)
+            await queue.ack(job_ids)
+
+    tasks = [asyncio.create_task(submit_interactive())]
+    tasks += [asyncio.create_task(worker()) for _ in range(args.workers)]
+    await asyncio.sleep(args.duration)
+    stop.set()
+    await asyncio.gather(*tasks)
+
+    waits.sort()
+    if waits:
+        print(
+            f"interactive: {len(waits)} jobs  wait p50 {waits[len(waits) // 2] * 1000:7.1f} ms  "
+            f"p95 {waits[int(len(waits) * 0.95)] * 1000:7.1f} ms  max {waits[-1] * 1000:7.1f} ms"
+        )
+    print(f"bulk: {bulk_done} jobs ({bulk_done / args.duration:.1f}/s) behind a backlog of {args.bulk}")
+
+    await redis_client.flushdb()
+    await redis_client.aclose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+"""
+Measure HTML extraction latency and event-loop lag with parsing inline on
+the event loop versus in the process pool.
+
+Pages come from a directory of saved .html files, or are synthesized at a
+range of sizes when no corpus is given. Event-loop lag is how late a 10 ms
+ticker coroutine wakes up while extractions run.
+
+Usage:
+    python -m benchmarks.bench_html_parse --corpus ./saved_pages --parser lxml
+"""
+import argparse
+import asyncio
+import time
+from pathlib import Path
+
+from app.core.config import settings
+from app.services.url_extractor import UrlExtractorService
+
+TICK_SECONDS = 0.01
+
+def load_corpus(corpus: str | None) -> list[str]:
+    if corpus:
+        return [path.read_text(encoding="utf-8", errors="replace") for path in sorted(Path(corpus).glob("*.html"))]
+
+    pages = []
+    for paragraphs in (20, 100, 400, 1500):
+        body = "".join(
+            f"<div class='ad'>Sponsored {i}</div><p>Paragraph {i} with a sentence of article text, "
+            f"a <a href='/link/{i}'>link</a> and some <b>formatting</b> to chew through.</p>"
+            for i in range(paragraphs)
+        )
+        pages.append(f"<html><body><nav>Menu</nav><article>{body}</article><footer>Footer</footer></body></html>")
+    return pages
+
+def percentile(values: list[float], pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+async def measure(extractor: UrlExtractorService, pages: list[str], rounds: int, concurrency: int):
+    latencies, lags = [], []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK_SECONDS)
+            lags.append((time.perf_counter() - start - TICK_SECONDS) * 1000)
+
+    slots = asyncio.Semaphore(concurrency)
+
+    async def parse_one(html: str):
+        async with slots:
+            start = time.perf_counter()
+            await extractor._parse(html)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    tick_task = asyncio.create_task(ticker())
+    await asyncio.gather(*(parse_one(html) for _ in range(rounds) for html in pages))
+    done.set()
+    await tick_task
+    return latencies, lags
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="directory of saved .html pages")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=settings.SCRAPER_PARSE_WORKERS or 2)
+    parser.add_argument("--parser", default=settings.SCRAPER_HTML_PARSER, choices=["html.parser", "lxml"])
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus)
+    settings.SCRAPER_HTML_PARSER = args.parser
+    print(f"{len(pages)} page(s) x {args.rounds} round(s), parser={args.parser}")
+
+    for label, workers in (("inline", 0), (f"pool x{args.workers}", args.workers)):
+        settings.SCRAPER_PARSE_WORKERS = workers
+        extractor = UrlExtractorService()
+        try:
+            await extractor._parse(pages[0])  # start pool processes outside the measurement
+            latencies, lags = await measure(extractor, pages, args.rounds, args.concurrency)
+        finally:
+            await extractor.aclose()
+        print(
+            f"{label:>10}: extract p50 {percentile(latencies, 0.5):8.2f} ms  p99 {percentile(latencies, 0.99):8.2f} ms"
+            f" | loop lag p50 {percentile(lags, 0.5):7.2f} ms  p99 {percentile(lags, 0.99):7.2f} ms  max {max(lags):7.2f} ms"
+        )
+
+if __name__ == "__main__":
+    asyncio.run(main())
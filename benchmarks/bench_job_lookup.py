@@ -0,0 +1,191 @@
+"""
+Lookup latency and storage of the jobs table at scale, in three layouts built
+side by side in a scratch schema of the configured Postgres:
+
+- flat:        the pre-migration table, primary key only, texts inline
+- indexed:     flat plus ix_jobs_content_hash and ix_jobs_status_created_at
+- partitioned: monthly partitions with the same indexes and large inputs
+               stored once in a blob table (migrations 0004-0006)
+
+Inputs repeat: --rows jobs share --distinct input texts of --input-bytes each,
+so the storage columns show what deduplicated blobs save.
+
+Usage:
+    python -m benchmarks.bench_job_lookup --rows 2000000 --months 12 --samples 500
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+import statistics
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import text
+
+from app.core.database import async_engine
+
+SCHEMA = "bench_lookup"
+
+COLUMNS = """
+    id UUID NOT NULL,
+    input_type VARCHAR NOT NULL,
+    input_value TEXT,
+    content_hash VARCHAR(64),
+    status VARCHAR,
+    summary TEXT,
+    created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    updated_at TIMESTAMP WITHOUT TIME ZONE
+"""
+
+# Row i: deterministic id, one of `distinct` inputs, mostly completed, created within the last `span` seconds
+ROWS_SELECT = """
+    SELECT
+        md5(i::text)::uuid,
+        'text',
+        {input_value},
+        encode(sha256(convert_to('doc' || (i % :distinct), 'UTF8')), 'hex'),
+        CASE WHEN i % 50 = 0 THEN 'queued' WHEN i % 33 = 0 THEN 'failed' ELSE 'completed' END,
+        'Summary of document ' || (i % :distinct),
+        CAST(:now AS TIMESTAMP) - make_interval(secs => (i::bigint * 7919) % :span),
+        CAST(:now AS TIMESTAMP)
+    FROM generate_series(1, :rows) AS i
+"""
+
+INPUT_BODY = "repeat(md5('doc' || (i % :distinct)), :repeat)"
+
+QUERIES = {
+    "by id": "SELECT * FROM {table} WHERE id = :id",
+    "by content_hash": "SELECT id FROM {table} WHERE content_hash = :hash AND status = 'completed' LIMIT 1",
+    "oldest queued": "SELECT id FROM {table} WHERE status = 'queued' AND created_at < :before ORDER BY created_at LIMIT 100",
+    "failed last day": "SELECT count(*) FROM {table} WHERE status = 'failed' AND created_at >= :since",
+}
+
+def row_id(i: int) -> uuid.UUID:
+    return uuid.UUID(hashlib.md5(str(i).encode()).hexdigest())
+
+def row_hash(k: int) -> str:
+    return hashlib.sha256(f"doc{k}".encode()).hexdigest()
+
+def months_back(today: date, count: int) -> list[date]:
+    months = [today.replace(day=1)]
+    while len(months) <= count:
+        first = months[-1]
+        months.append((first - timedelta(days=1)).replace(day=1))
+    return sorted(months)
+
+async def build(conn, args, now: datetime):
+    params = {"distinct": args.distinct, "rows": args.rows, "span": args.months * 30 * 86400, "now": now,
+              "repeat": max(1, args.input_bytes // 32)}
+
+    await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+
+    await conn.execute(text(f"CREATE TABLE {SCHEMA}.flat ({COLUMNS}, PRIMARY KEY (id))"))
+    await conn.execute(text(
+        f"INSERT INTO {SCHEMA}.flat " + ROWS_SELECT.format(input_value=INPUT_BODY)
+    ), params)
+    await conn.execute(text(f"CREATE TABLE {SCHEMA}.indexed (LIKE {SCHEMA}.flat INCLUDING ALL)"))
+    await conn.execute(text(f"INSERT INTO {SCHEMA}.indexed SELECT * FROM {SCHEMA}.flat"))
+    await conn.execute(text(f"CREATE INDEX ON {SCHEMA}.indexed (content_hash)"))
+    await conn.execute(text(f"CREATE INDEX ON {SCHEMA}.indexed (status, created_at)"))
+
+    await conn.execute(text(
+        f"CREATE TABLE {SCHEMA}.partitioned ({COLUMNS}, PRIMARY KEY (id, created_at)) PARTITION BY RANGE (created_at)"
+    ))
+    months = months_back(now.date(), args.months + 1)
+    for month in months:
+        end = (month + timedelta(days=32)).replace(day=1)
+        await conn.execute(text(
+            f"CREATE TABLE {SCHEMA}.partitioned_{month:%Y_%m} PARTITION OF {SCHEMA}.partitioned "
+            f"FOR VALUES FROM ('{month}') TO ('{end}')"
+        ))
+    await conn.execute(text(f"CREATE TABLE {SCHEMA}.partitioned_default PARTITION OF {SCHEMA}.partitioned DEFAULT"))
+    await conn.execute(text(
+        f"INSERT INTO {SCHEMA}.partitioned " + ROWS_SELECT.format(input_value="NULL")
+    ), params)
+    await conn.execute(text(f"CREATE INDEX ON {SCHEMA}.partitioned (content_hash)"))
+    await conn.execute(text(f"CREATE INDEX ON {SCHEMA}.partitioned (status, created_at)"))
+
+    await conn.execute(text(f"CREATE TABLE {SCHEMA}.blobs (hash VARCHAR(64) PRIMARY KEY, body TEXT NOT NULL)"))
+    await conn.execute(text(
+        f"INSERT INTO {SCHEMA}.blobs SELECT encode(sha256(convert_to('doc' || i, 'UTF8')), 'hex'), "
+        f"repeat(md5('doc' || i), :repeat) FROM generate_series(0, CAST(:distinct AS INTEGER) - 1) AS i"
+    ), params)
+
+    await conn.execute(text(f"ANALYZE {SCHEMA}.flat, {SCHEMA}.indexed, {SCHEMA}.partitioned, {SCHEMA}.blobs"))
+    await conn.commit()
+
+async def total_size(conn, table: str) -> int:
+    # For a partitioned table, sum its partitions
+    return await conn.scalar(text(
+        "SELECT COALESCE(sum(pg_total_relation_size(c.oid)), 0) FROM pg_class c "
+        "WHERE c.oid = CAST(:table AS regclass) OR c.oid IN "
+        "(SELECT inhrelid FROM pg_inherits WHERE inhparent = CAST(:table AS regclass))"
+    ), {"table": table})
+
+async def time_query(conn, sql: str, params_for, samples: int) -> dict:
+    durations = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        (await conn.execute(text(sql), params_for())).fetchall()
+        durations.append((time.perf_counter() - start) * 1000)
+    durations.sort()
+    return {
+        "p50": durations[len(durations) // 2],
+        "p95": durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+        "mean": statistics.fmean(durations),
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--distinct", type=int, default=50_000, help="Distinct input texts")
+    parser.add_argument("--input-bytes", type=int, default=4096)
+    parser.add_argument("--months", type=int, default=12, help="Months of history the rows are spread over")
+    parser.add_argument("--samples", type=int, default=300)
+    parser.add_argument("--keep", action="store_true", help=f"Keep the {SCHEMA} schema afterwards")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    query_params = {
+        "by id": lambda: {"id": row_id(rng.randint(1, args.rows))},
+        "by content_hash": lambda: {"hash": row_hash(rng.randrange(args.distinct))},
+        "oldest queued": lambda: {"before": now - timedelta(minutes=rng.randint(10, 600))},
+        "failed last day": lambda: {"since": now - timedelta(days=1, minutes=rng.randint(0, 60))},
+    }
+
+    try:
+        async with async_engine.connect() as conn:
+            print(f"Building {args.rows} rows in three layouts...")
+            start = time.perf_counter()
+            await build(conn, args, now)
+            print(f"Built in {time.perf_counter() - start:.1f}s\n")
+
+            sizes = {
+                "flat": await total_size(conn, f"{SCHEMA}.flat"),
+                "indexed": await total_size(conn, f"{SCHEMA}.indexed"),
+                "partitioned": await total_size(conn, f"{SCHEMA}.partitioned") + await total_size(conn, f"{SCHEMA}.blobs"),
+            }
+
+            print(f"{'query':<18}{'layout':<14}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}")
+            for name, sql in QUERIES.items():
+                for layout in ("flat", "indexed", "partitioned"):
+                    stats = await time_query(conn, sql.format(table=f"{SCHEMA}.{layout}"), query_params[name], args.samples)
+                    print(f"{name:<18}{layout:<14}{stats['p50']:>10.2f}{stats['p95']:>10.2f}{stats['mean']:>10.2f}")
+            await conn.rollback()
+
+            print(f"\n{'layout':<14}{'storage MB':>12}")
+            for layout, size in sizes.items():
+                print(f"{layout:<14}{size / 1e6:>12.1f}")
+
+            if not args.keep:
+                await conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+                await conn.commit()
+    finally:
+        await async_engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
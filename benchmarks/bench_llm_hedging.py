@@ -0,0 +1,68 @@
+"""
+Compare tail latency of a single fake provider against routing with
+hedged requests across two fake providers, both with occasional slow calls.
+
+Usage:
+    python -m benchmarks.bench_llm_hedging --calls 1000 --tail-rate 0.05
+"""
+import argparse
+import asyncio
+import time
+
+from app.core.config import settings
+from app.services.llm_router import RoutingLLMClient
+from benchmarks.fakes import FakeLLMClient
+
+SAMPLE_TEXT = "The quick brown fox jumps over the lazy dog. " * 40
+
+def percentile(values: list[float], pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+async def run(client, calls: int, concurrency: int) -> list[float]:
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def call_one():
+        async with slots:
+            start = time.perf_counter()
+            await client.summarize(SAMPLE_TEXT)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(call_one() for _ in range(calls)))
+    return latencies
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--tail-rate", type=float, default=0.05)
+    parser.add_argument("--tail-factor", type=float, default=20.0)
+    args = parser.parse_args()
+
+    settings.LLM_HEDGE_MIN_DELAY_SECONDS = 0.05
+    settings.LLM_HEDGE_DEFAULT_DELAY_SECONDS = args.latency_ms * 3 / 1000
+
+    def fake(name: str, seed: int) -> FakeLLMClient:
+        return FakeLLMClient(name=name, latency_ms=args.latency_ms, tail_rate=args.tail_rate,
+                             tail_factor=args.tail_factor, seed=seed)
+
+    scenarios = [
+        ("single", fake("primary", 1)),
+        ("routed", RoutingLLMClient([(fake("primary", 1), 1.0), (fake("secondary", 2), 1.0)])),
+    ]
+    for hedge in (False, True):
+        settings.LLM_HEDGE_ENABLED = hedge
+        for label, client in scenarios:
+            if label == "single" and hedge:
+                continue
+            latencies = await run(client, args.calls, args.concurrency)
+            name = f"{label}{' + hedge' if hedge else ''}"
+            print(
+                f"{name:>15}: p50 {percentile(latencies, 0.5):7.1f} ms  p95 {percentile(latencies, 0.95):7.1f} ms"
+                f"  p99 {percentile(latencies, 0.99):7.1f} ms"
+            )
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+"""
+Drive a fake LLM that injects 429s and latency, with and without the
+ResilientLLMClient wrapper, and check that the wrapper rides out the rate
+limiting under the default breaker settings: the run fails (exit status 1)
+if fewer than --min-success-rate of the calls succeed or the breaker opens.
+
+Needs the configured Redis for the shared limiter and breaker state.
+
+Usage:
+    python -m benchmarks.bench_llm_resilience --calls 200 --rate-limit-rate 0.3
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+
+from app.core.config import settings
+from app.core.redis import get_async_redis
+from app.services.llm_resilience import ResilientLLMClient
+from benchmarks.fakes import FakeLLMClient
+
+SAMPLE_TEXT = "The quick brown fox jumps over the lazy dog. " * 40
+
+async def run(client, calls: int, concurrency: int) -> tuple[int, list[float]]:
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+    succeeded = 0
+
+    async def call_one():
+        nonlocal succeeded
+        async with slots:
+            start = time.perf_counter()
+            try:
+                await client.summarize(SAMPLE_TEXT)
+                succeeded += 1
+            except Exception:
+                pass
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(call_one() for _ in range(calls)))
+    return succeeded, latencies
+
+async def main() -> bool:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.3)
+    parser.add_argument("--requests-per-minute", type=int, default=0)
+    parser.add_argument("--min-success-rate", type=float, default=0.97)
+    args = parser.parse_args()
+
+    # Short retry delays so the run finishes quickly; breaker settings stay at their defaults
+    settings.LLM_RETRY_BASE_DELAY_SECONDS = 0.05
+    settings.LLM_RETRY_MAX_DELAY_SECONDS = 1.0
+    settings.LLM_REQUESTS_PER_MINUTE = args.requests_per_minute
+    print(
+        f"breaker: {settings.LLM_BREAKER_FAILURE_THRESHOLD} failures in {settings.LLM_BREAKER_WINDOW_SECONDS:g}s, "
+        f"cooldown {settings.LLM_BREAKER_COOLDOWN_SECONDS:g}s"
+    )
+
+    ok = True
+    # Fresh provider names, so breaker state left by an earlier run cannot leak in
+    run_id = uuid.uuid4().hex[:8]
+    for label, wrap in (("raw", False), ("resilient", True)):
+        fake = FakeLLMClient(
+            name=f"bench-{label}-{run_id}", latency_ms=args.latency_ms, rate_limit_rate=args.rate_limit_rate, seed=1
+        )
+        client = ResilientLLMClient(fake) if wrap else fake
+        succeeded, latencies = await run(client, args.calls, args.concurrency)
+        print(
+            f"{label:>10}: {succeeded}/{args.calls} succeeded, {fake.calls} provider calls, "
+            f"p50 {statistics.median(latencies):7.1f} ms  max {max(latencies):7.1f} ms"
+        )
+        if not wrap:
+            continue
+
+        success_rate = succeeded / args.calls
+        breaker_tripped = bool(await client.breaker.redis.exists(client.breaker.tripped_key))
+        if success_rate < args.min_success_rate:
+            print(f"FAIL: success rate {success_rate:.1%} is below {args.min_success_rate:.1%}")
+            ok = False
+        if breaker_tripped:
+            print("FAIL: the circuit breaker opened on rate limiting alone")
+            ok = False
+        await client.breaker.record_success()
+
+    await get_async_redis().aclose()
+    return ok
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
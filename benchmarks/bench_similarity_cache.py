@@ -0,0 +1,138 @@
+"""
+Hit rate and lookup cost of the near-duplicate summary cache on perturbed
+documents. Base articles are summarized (a placeholder summary is cached and
+fingerprinted as the worker would), then variants of each are looked up the
+way the worker does it: exact hash first, SimHash/LSH second.
+
+Variants mimic what defeats the exact cache in practice: a changed timestamp
+line, an inserted ad block, different syndication boilerplate, word-level
+edits and truncation. Unrelated articles measure false positives, and every
+near hit is checked against the article it should have matched.
+
+Runs against a scratch Redis database (--db), which it flushes.
+
+Usage:
+    python -m benchmarks.bench_similarity_cache --docs 2000 --threshold 0.9 --bands 4
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+from app.services.deduplication import get_content_hash
+from app.services.similarity_cache import SimilarityCache, simhash, similarity
+from app.services.summary_cache import SummaryCache
+from benchmarks.corpus import _paragraph, _sentence
+
+def edit_words(rng: random.Random, text: str, rate: float) -> str:
+    words = text.split()
+    for _ in range(max(1, int(len(words) * rate))):
+        words[rng.randrange(len(words))] = rng.choice(("update", "reported", "officials", "new", "local"))
+    return " ".join(words)
+
+PERTURBATIONS = {
+    "identical": lambda rng, text: text,
+    "timestamp": lambda rng, text: f"Updated {rng.randint(1, 28)} May 2024 {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d} UTC\n\n{text}",
+    "ad block": lambda rng, text: text.replace(". ", f". ADVERTISEMENT {_sentence(rng)} Subscribe now. ", 1),
+    "boilerplate": lambda rng, text: f"Syndicated from Wire Service. {_sentence(rng)}\n\n{text}\n\nShare this article. Copyright {rng.randint(2000, 2030)}.",
+    "1% edits": lambda rng, text: edit_words(rng, text, 0.01),
+    "5% edits": lambda rng, text: edit_words(rng, text, 0.05),
+    "truncated 10%": lambda rng, text: text[:int(len(text) * 0.9)],
+}
+
+def build_article(rng: random.Random) -> str:
+    return "\n\n".join(_paragraph(rng) for _ in range(rng.randint(4, 30)))
+
+def pct(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] if ordered else 0.0
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", type=int, default=15, help="Scratch Redis database, flushed by the run")
+    parser.add_argument("--docs", type=int, default=2000, help="Base articles indexed")
+    parser.add_argument("--variants", type=int, default=200, help="Articles perturbed per perturbation")
+    parser.add_argument("--threshold", type=float, default=settings.SIMILARITY_CACHE_THRESHOLD)
+    parser.add_argument("--bands", type=int, default=settings.SIMILARITY_CACHE_BANDS)
+    args = parser.parse_args()
+
+    settings.SIMILARITY_CACHE_THRESHOLD = args.threshold
+    settings.SIMILARITY_CACHE_BANDS = args.bands
+    settings.SUMMARY_CACHE_L1_MAX_BYTES = 0
+
+    redis_client = aioredis.from_url(settings.REDIS_URL, db=args.db, decode_responses=False)
+    await redis_client.flushdb()
+    cache = SummaryCache("bench-model", redis_client)
+    similarity_cache = SimilarityCache(cache)
+
+    rng = random.Random(0)
+    articles = [build_article(rng) for _ in range(args.docs)]
+    summaries = {}
+    start = time.perf_counter()
+    for i, article in enumerate(articles):
+        content_hash = get_content_hash(article)
+        summaries[content_hash] = f"Summary of article {i}"
+        await cache.set(content_hash, summaries[content_hash])
+        fingerprint = simhash(article)
+        if fingerprint is not None:
+            await similarity_cache.add(fingerprint, content_hash)
+    print(f"Indexed {args.docs} articles in {time.perf_counter() - start:.1f}s "
+          f"(threshold {args.threshold}, {args.bands} bands)\n")
+
+    async def resolve(text: str) -> tuple[str | None, str | None, float, float]:
+        """(hit type, summary, fingerprint ms, lookup ms) the way the worker resolves a document."""
+        lookup_start = time.perf_counter()
+        summary = await cache.get(get_content_hash(text))
+        if summary:
+            return "exact", summary, 0.0, (time.perf_counter() - lookup_start) * 1000
+        fingerprint_start = time.perf_counter()
+        fingerprint = simhash(text)
+        fingerprint_ms = (time.perf_counter() - fingerprint_start) * 1000
+        near = await similarity_cache.lookup(fingerprint) if fingerprint is not None else None
+        lookup_ms = (time.perf_counter() - lookup_start) * 1000 - fingerprint_ms
+        return ("near", near[0], fingerprint_ms, lookup_ms) if near else (None, None, fingerprint_ms, lookup_ms)
+
+    fingerprint_times, lookup_times = [], []
+    print(f"{'variant':<16}{'exact':>8}{'near':>8}{'miss':>8}{'wrong':>8}{'mean sim':>10}")
+    for name, perturb in PERTURBATIONS.items():
+        counts = {"exact": 0, "near": 0, None: 0}
+        wrong = 0
+        scores = []
+        for i in rng.sample(range(args.docs), min(args.variants, args.docs)):
+            variant = perturb(rng, articles[i])
+            expected = summaries[get_content_hash(articles[i])]
+            fingerprints = simhash(articles[i]), simhash(variant)
+            if None not in fingerprints:
+                scores.append(similarity(*fingerprints))
+
+            hit_type, summary, fingerprint_ms, lookup_ms = await resolve(variant)
+            counts[hit_type] += 1
+            wrong += hit_type is not None and summary != expected
+            if hit_type != "exact":
+                fingerprint_times.append(fingerprint_ms)
+            lookup_times.append(lookup_ms)
+        total = sum(counts.values())
+        print(f"{name:<16}{counts['exact'] / total:>8.1%}{counts['near'] / total:>8.1%}{counts[None] / total:>8.1%}"
+              f"{wrong:>8}{statistics.fmean(scores) if scores else 0:>10.3f}")
+
+    false_positives = 0
+    for _ in range(args.variants):
+        hit_type, _, fingerprint_ms, lookup_ms = await resolve(build_article(rng))
+        false_positives += hit_type is not None
+        fingerprint_times.append(fingerprint_ms)
+        lookup_times.append(lookup_ms)
+    print(f"{'unrelated':<16}{'':>8}{false_positives / args.variants:>8.1%}{'':>8}{false_positives:>8}")
+
+    print(f"\nfingerprint ms  p50 {pct(fingerprint_times, 0.5):.2f}  p95 {pct(fingerprint_times, 0.95):.2f}")
+    print(f"lookup ms       p50 {pct(lookup_times, 0.5):.2f}  p95 {pct(lookup_times, 0.95):.2f}")
+    print(f"index memory    {(await redis_client.info('memory'))['used_memory'] / 1e6:.1f} MB (whole database)")
+
+    await redis_client.flushdb()
+    await redis_client.aclose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+"""
+Check that URL downloads stay bounded in memory against a local server
+serving a huge declared body, an endless chunked body, a huge body with no
+length, and a non-HTML body.
+
+Peak memory is measured with tracemalloc around each fetch, and should stay
+near SCRAPER_MAX_DOWNLOAD_BYTES whatever the server sends.
+
+Usage:
+    python -m benchmarks.bench_streaming_fetch
+"""
+import asyncio
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.services.url_extractor import UrlExtractorService
+from benchmarks.origin import start_origin
+
+CHUNK = b"<p>" + b"endless filler text " * 400 + b"</p>\n"
+
+class HostileHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/declared-huge":
+            self._start("text/html", length=5_000_000_000)
+            self.wfile.write(CHUNK)
+        elif self.path == "/infinite-chunked":
+            self._start("text/html", chunked=True)
+            try:
+                while True:
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(CHUNK), CHUNK))
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+        elif self.path == "/huge-no-length":
+            self.protocol_version = "HTTP/1.0"
+            self._start("text/html")
+            try:
+                for _ in range(200_000):
+                    self.wfile.write(CHUNK)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+        else:
+            self._start("application/octet-stream", length=len(CHUNK))
+            self.wfile.write(CHUNK)
+
+    def _start(self, content_type: str, length: int | None = None, chunked: bool = False):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        if length is not None:
+            self.send_header("Content-Length", str(length))
+        if chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+async def main():
+    server, base_url = start_origin(handler=HostileHandler)
+    extractor = UrlExtractorService()
+    print(f"download budget: {settings.SCRAPER_MAX_DOWNLOAD_BYTES / 1e6:.1f} MB")
+
+    try:
+        for path in ("/declared-huge", "/infinite-chunked", "/huge-no-length", "/binary"):
+            tracemalloc.start()
+            start = time.perf_counter()
+            try:
+                _, html = await extractor._fetch(base_url + path)
+                outcome = f"read {len(html) / 1e6:.2f} M chars"
+            except HTTPException as e:
+                outcome = f"rejected ({e.status_code}: {e.detail})"
+            elapsed = (time.perf_counter() - start) * 1000
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{path:>18}: {outcome:<60} peak {peak / 1e6:6.2f} MB  {elapsed:8.1f} ms")
+    finally:
+        await extractor.aclose()
+        server.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main())
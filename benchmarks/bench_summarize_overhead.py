@@ -0,0 +1,65 @@
+"""
+Measure per-request overhead of POST /summarize with a zero-latency stub
+LLM: services rebuilt on every request (the old dependency behaviour)
+versus the application-scoped singletons.
+
+Requests go straight into the ASGI app, so no network or LLM time is counted.
+
+Usage:
+    python -m benchmarks.bench_summarize_overhead --requests 2000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from app.api import summarize
+from app.main import app
+from app.services.providers import configure_services, shutdown_services, startup_services
+from app.services.summarizer import SummarizerService
+from app.services.url_extractor import UrlExtractorService
+from benchmarks.fakes import FakeLLMClient
+
+PAYLOAD = {"text": "A short article body that is long enough to pass request validation for the benchmark."}
+
+async def measure(requests: int) -> list[float]:
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = await client.post("/summarize", json=PAYLOAD)
+            latencies.append((time.perf_counter() - start) * 1000)
+            response.raise_for_status()
+    return latencies
+
+def report(label: str, latencies: list[float]):
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{label:>12}: mean {statistics.fmean(latencies):6.3f} ms  p50 {statistics.median(latencies):6.3f} ms  p99 {p99:6.3f} ms")
+
+def stub_llm() -> FakeLLMClient:
+    return FakeLLMClient(name="stub", latency_ms=0.0, jitter=0.0)
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    # Old behaviour: a new summarizer (and LLM client) and extractor per request
+    app.dependency_overrides[summarize.get_summarizer_service] = lambda: SummarizerService(llm_client=stub_llm())
+    app.dependency_overrides[summarize.get_url_extractor_service] = UrlExtractorService
+    report("per-request", await measure(args.requests))
+    app.dependency_overrides.clear()
+
+    configure_services(summarizer=SummarizerService(llm_client=stub_llm()))
+    await startup_services()
+    try:
+        report("singleton", await measure(args.requests))
+    finally:
+        await shutdown_services()
+
+if __name__ == "__main__":
+    asyncio.run(main())
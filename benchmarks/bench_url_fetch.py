@@ -0,0 +1,63 @@
+"""
+Compare URL fetch latency with a fresh httpx client per fetch (the old
+behaviour) against UrlExtractorService's shared, pooled client, using a
+local HTTP stand-in server.
+
+Usage:
+    python -m benchmarks.bench_url_fetch --requests 500
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from app.core.config import settings
+from app.services.url_extractor import UrlExtractorService
+from benchmarks.origin import start_origin
+
+async def fetch_with_new_client(url: str):
+    async with httpx.AsyncClient(follow_redirects=True, timeout=settings.SCRAPER_TIMEOUT_SECONDS) as client:
+        await client.get(url)
+
+async def measure(fetch, urls: list[str], concurrency: int) -> list[float]:
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def run_one(url: str):
+        async with slots:
+            start = time.perf_counter()
+            await fetch(url)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(run_one(url) for url in urls))
+    return latencies
+
+def report(label: str, latencies: list[float]):
+    latencies.sort()
+    p50 = statistics.median(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{label:>14}: p50 {p50:7.2f} ms  p99 {p99:7.2f} ms  mean {statistics.fmean(latencies):7.2f} ms")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    # Matches the per-host cap, so both modes run the same number of fetches at once
+    parser.add_argument("--concurrency", type=int, default=settings.SCRAPER_MAX_CONNECTIONS_PER_HOST)
+    args = parser.parse_args()
+
+    server, base_url = start_origin()
+    urls = [f"{base_url}/article/{i}" for i in range(args.requests)]
+
+    report("new client", await measure(fetch_with_new_client, urls, args.concurrency))
+
+    extractor = UrlExtractorService()
+    try:
+        report("shared client", await measure(extractor._fetch, urls, args.concurrency))
+    finally:
+        await extractor.aclose()
+        server.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main())
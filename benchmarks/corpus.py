@@ -0,0 +1,84 @@
+"""
+Deterministic HTML corpus and request workloads for the benchmarks.
+
+Pages vary in length (including documents long enough to be summarized in
+chunks), boilerplate and markup, so fetch, parse and chunking costs look
+like real article traffic rather than one repeated page.
+
+Usage (write a workload file for benchmarks.loadgen):
+    python -m benchmarks.corpus --requests 1000 --url-ratio 0.7 --output workload.jsonl
+"""
+import argparse
+import json
+import random
+
+WORDS = (
+    "market report council policy energy climate research team analysts season growth city "
+    "investment schools hospital network election budget technology court study river harvest "
+    "exports league museum transport housing survey vaccine regulators festival ministers"
+).split()
+
+# (share of pages, paragraphs range); the last bucket exceeds SUMMARY_CHUNK_TOKENS
+PAGE_SIZES = ((0.6, (8, 20)), (0.3, (30, 80)), (0.1, (150, 400)))
+
+def _sentence(rng: random.Random) -> str:
+    words = rng.choices(WORDS, k=rng.randint(8, 20))
+    return " ".join(words).capitalize() + "."
+
+def _paragraph(rng: random.Random) -> str:
+    return " ".join(_sentence(rng) for _ in range(rng.randint(2, 6)))
+
+def build_page(rng: random.Random, title: str) -> bytes:
+    roll, paragraphs = rng.random(), (8, 20)
+    for share, size in PAGE_SIZES:
+        if roll < share:
+            paragraphs = size
+            break
+        roll -= share
+
+    body = "".join(f"<p>{_paragraph(rng)}</p>" for _ in range(rng.randint(*paragraphs)))
+    sidebar = "".join(f"<li><a href='/related/{i}'>{_sentence(rng)}</a></li>" for i in range(rng.randint(5, 30)))
+    return (
+        f"<html><head><title>{title}</title>"
+        f"<script>{'var tracking = 1;' * rng.randint(10, 200)}</script></head><body>"
+        f"<nav>Home | World | Business | Sport</nav>"
+        f"<aside><ul>{sidebar}</ul></aside>"
+        f"<article><h1>{title}</h1>{body}</article>"
+        f"<footer>Copyright</footer></body></html>"
+    ).encode("utf-8")
+
+def build_corpus(pages: int = 200, seed: int = 0) -> dict[str, bytes]:
+    """Return path -> HTML body for `pages` articles, identical for the same seed."""
+    rng = random.Random(seed)
+    return {f"/articles/{i}": build_page(rng, f"Article {i}") for i in range(pages)}
+
+def build_workload(requests: int, pages: int, url_ratio: float = 0.7, seed: int = 0) -> list[dict]:
+    """
+    Submit bodies: URL requests point at corpus paths relative to the origin
+    ("url_path"), text requests carry generated article text.
+    """
+    rng = random.Random(seed + 1)
+    workload = []
+    for _ in range(requests):
+        if rng.random() < url_ratio:
+            workload.append({"url_path": f"/articles/{rng.randrange(pages)}"})
+        else:
+            workload.append({"text": " ".join(_paragraph(rng) for _ in range(rng.randint(3, 30)))})
+    return workload
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--url-ratio", type=float, default=0.7)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="workload.jsonl")
+    args = parser.parse_args()
+
+    with open(args.output, "w") as f:
+        for item in build_workload(args.requests, args.pages, args.url_ratio, args.seed):
+            f.write(json.dumps(item) + "\n")
+    print(f"Wrote {args.requests} requests to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Offline stand-ins for external services used by the benchmarks."""
+import asyncio
+import random
+from typing import AsyncIterator
+
+from app.services.llm_client import LLMClient, RateLimitError
+
+class FakeLLMClient(LLMClient):
+    """
+    LLMClient with configurable latency and failure injection.
+
+    Latency is drawn from a log-normal distribution around latency_ms, with
+    tail_rate of calls taking tail_factor times longer. rate_limit_rate and
+    error_rate inject RateLimitError (429) and ConnectionError respectively.
+    """
+
+    def __init__(self, name: str = "fake", latency_ms: float = 200.0, jitter: float = 0.3,
+                 tail_rate: float = 0.0, tail_factor: float = 10.0,
+                 rate_limit_rate: float = 0.0, error_rate: float = 0.0, seed: int | None = None):
+        self.name = name
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.tail_rate = tail_rate
+        self.tail_factor = tail_factor
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.calls = 0
+
+    def sample_latency(self) -> float:
+        latency = self.latency_ms * self.random.lognormvariate(0, self.jitter)
+        if self.random.random() < self.tail_rate:
+            latency *= self.tail_factor
+        return latency / 1000
+
+    async def summarize(self, text: str) -> str:
+        self.calls += 1
+        roll = self.random.random()
+        if roll < self.rate_limit_rate:
+            await asyncio.sleep(0.005)
+            raise RateLimitError(f"{self.name}: 429 Too Many Requests")
+        if roll < self.rate_limit_rate + self.error_rate:
+            await asyncio.sleep(0.005)
+            raise ConnectionError(f"{self.name}: connection reset")
+
+        await asyncio.sleep(self.sample_latency())
+        words = text.split()
+        return f"[{self.name}] Summary of {len(words)} words: " + " ".join(words[:30])
+
+    async def summarize_stream(self, text: str) -> AsyncIterator[str]:
+        # Spread the sampled latency over the words, like a model emitting tokens
+        summary = await self.summarize(text)
+        words = summary.split(" ")
+        first, rest = words[0], words[1:]
+        yield first
+        for word in rest:
+            await asyncio.sleep(0.002)
+            yield " " + word
@@ -0,0 +1,115 @@
+"""
+Load test for hot reads: poll GET /result for a set of completed jobs and
+look up a hot summary in the summary cache, with the in-process L1 caches
+disabled and then enabled, and report Postgres and Redis QPS for each run.
+
+Postgres QPS comes from pg_stat_database transaction counters and Redis QPS
+from INFO total_commands_processed, so run it against otherwise idle
+instances. Requests go straight into the ASGI app.
+
+Usage:
+    python -m benchmarks.load_result_polling --jobs 50 --requests 5000
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+from sqlalchemy import delete, insert, text
+
+from app.api import jobs
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, Base, async_engine
+from app.core.redis import get_async_redis, get_cache_redis
+from app.main import app
+from app.models.job import Job
+from app.services.providers import get_summarizer_service, shutdown_services, startup_services
+
+HOT_CONTENT_HASH = "0" * 64
+
+async def db_transactions() -> int:
+    async with async_engine.connect() as conn:
+        return await conn.scalar(text(
+            "SELECT xact_commit + xact_rollback FROM pg_stat_database WHERE datname = current_database()"
+        ))
+
+async def redis_commands() -> int:
+    total = 0
+    for client in (get_async_redis(), get_cache_redis()):
+        total += int((await client.info("stats"))["total_commands_processed"])
+    return total
+
+async def create_completed_jobs(count: int) -> list[uuid.UUID]:
+    job_ids = [uuid.uuid4() for _ in range(count)]
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(Job), [
+            {"id": job_id, "input_type": "text", "input_value": "load test", "status": "completed",
+             "summary": "A finished summary served to pollers.", "processing_time_ms": 1}
+            for job_id in job_ids
+        ])
+        await db.commit()
+    return job_ids
+
+async def run(job_ids: list[uuid.UUID], requests: int, concurrency: int) -> dict:
+    cache = get_summarizer_service().cache
+    slots = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://load") as client:
+        async def poll(i: int):
+            async with slots:
+                response = await client.get(f"/result/{job_ids[i % len(job_ids)]}")
+                response.raise_for_status()
+                await cache.get(HOT_CONTENT_HASH)
+
+        db_before, redis_before = await db_transactions(), await redis_commands()
+        start = time.perf_counter()
+        await asyncio.gather(*(poll(i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+        db_after, redis_after = await db_transactions(), await redis_commands()
+
+    return {
+        "requests_per_s": requests / elapsed,
+        # The counter queries themselves add a couple of transactions/commands
+        "db_qps": (db_after - db_before) / elapsed,
+        "redis_qps": (redis_after - redis_before) / elapsed,
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    job_ids = await create_completed_jobs(args.jobs)
+    l1_sizes = (settings.SUMMARY_CACHE_L1_MAX_BYTES, settings.JOB_RESULT_L1_MAX_BYTES)
+
+    try:
+        for label, enabled in (("L1 off", False), ("L1 on", True)):
+            settings.SUMMARY_CACHE_L1_MAX_BYTES = l1_sizes[0] if enabled else 0
+            settings.JOB_RESULT_L1_MAX_BYTES = l1_sizes[1] if enabled else 0
+            jobs.job_result_cache.clear()
+            await startup_services()
+            await get_summarizer_service().cache.set(HOT_CONTENT_HASH, "A hot cached summary.")
+            try:
+                result = await run(job_ids, args.requests, args.concurrency)
+            finally:
+                await shutdown_services()
+            print(
+                f"{label:>6}: {result['requests_per_s']:8.1f} req/s  "
+                f"Postgres {result['db_qps']:8.1f} tx/s  Redis {result['redis_qps']:8.1f} cmd/s"
+            )
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(Job).where(Job.id.in_(job_ids)))
+            await db.commit()
+        await get_async_redis().aclose()
+        await get_cache_redis().aclose()
+        await async_engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
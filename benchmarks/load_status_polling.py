@@ -0,0 +1,127 @@
+"""
+Load test for result delivery: clients waiting on unfinished jobs either poll
+GET /status and GET /result on an interval, or hold one GET /result?wait=
+long-poll each. A stand-in worker finishes the jobs after a delay, writing
+the final rows and publishing completion events as the real worker does.
+Reports Postgres transactions per second for each mode.
+
+Postgres QPS comes from pg_stat_database transaction counters, so run it
+against an otherwise idle instance. Requests go straight into the ASGI app.
+
+Usage:
+    python -m benchmarks.load_status_polling --jobs 200 --finish-after 5 --poll-interval 0.5
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+from sqlalchemy import delete, insert, text, update
+
+from app.api import jobs
+from app.core.database import AsyncSessionLocal, Base, async_engine
+from app.core.redis import get_async_redis, get_cache_redis
+from app.main import app
+from app.models.job import Job
+from app.services.job_events import publish_job_events
+from app.services.providers import get_job_event_broker, shutdown_services
+
+async def db_transactions() -> int:
+    async with async_engine.connect() as conn:
+        return await conn.scalar(text(
+            "SELECT xact_commit + xact_rollback FROM pg_stat_database WHERE datname = current_database()"
+        ))
+
+async def create_queued_jobs(count: int) -> list[uuid.UUID]:
+    job_ids = [uuid.uuid4() for _ in range(count)]
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(Job), [
+            {"id": job_id, "input_type": "text", "input_value": "load test", "status": "queued"}
+            for job_id in job_ids
+        ])
+        await db.commit()
+    return job_ids
+
+async def finish_jobs(job_ids: list[uuid.UUID], delay: float):
+    await asyncio.sleep(delay)
+    summary = "A finished summary delivered to waiting clients."
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(Job).where(Job.id.in_(job_ids)).values(status="completed", summary=summary, processing_time_ms=1)
+        )
+        await db.commit()
+    await publish_job_events(get_async_redis(), [
+        {"job_id": str(job_id), "status": "completed", "summary": summary,
+         "processing_time_ms": 1, "cached": False, "error_message": None}
+        for job_id in job_ids
+    ])
+
+async def run(mode: str, job_ids: list[uuid.UUID], finish_after: float, poll_interval: float) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    latencies = []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://load", timeout=None) as client:
+        async def wait_for(job_id: uuid.UUID):
+            start = time.perf_counter()
+            while True:
+                if mode == "poll":
+                    status = (await client.get(f"/status/{job_id}")).json()["status"]
+                    if status not in jobs.TERMINAL_STATUSES:
+                        await asyncio.sleep(poll_interval)
+                        continue
+                    result = (await client.get(f"/result/{job_id}")).json()
+                else:
+                    result = (await client.get(f"/result/{job_id}", params={"wait": 30})).json()
+                if result["status"] in jobs.TERMINAL_STATUSES:
+                    break
+            latencies.append(time.perf_counter() - start - finish_after)
+
+        db_before = await db_transactions()
+        start = time.perf_counter()
+        await asyncio.gather(finish_jobs(job_ids, finish_after), *(wait_for(job_id) for job_id in job_ids))
+        elapsed = time.perf_counter() - start
+        db_after = await db_transactions()
+
+    latencies.sort()
+    return {
+        # The counter queries and the stand-in worker's write add a few transactions
+        "db_qps": (db_after - db_before) / elapsed,
+        "db_transactions": db_after - db_before,
+        "p50_delivery_ms": latencies[len(latencies) // 2] * 1000,
+        "max_delivery_ms": latencies[-1] * 1000,
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--finish-after", type=float, default=5.0, help="Seconds until the jobs finish")
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    args = parser.parse_args()
+
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    get_job_event_broker().start()
+    all_job_ids = []
+
+    try:
+        for mode in ("poll", "long-poll"):
+            job_ids = await create_queued_jobs(args.jobs)
+            all_job_ids += job_ids
+            jobs.job_result_cache.clear()
+            result = await run(mode, job_ids, args.finish_after, args.poll_interval)
+            print(
+                f"{mode:>9}: Postgres {result['db_qps']:8.1f} tx/s ({result['db_transactions']} total)  "
+                f"delivery p50 {result['p50_delivery_ms']:7.1f} ms  max {result['max_delivery_ms']:7.1f} ms"
+            )
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(Job).where(Job.id.in_(all_job_ids)))
+            await db.commit()
+        await shutdown_services()
+        await get_async_redis().aclose()
+        await get_cache_redis().aclose()
+        await async_engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
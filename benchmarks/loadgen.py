@@ -0,0 +1,263 @@
+"""
+End-to-end load test of the job pipeline, fully offline: POST /submit ->
+queue -> worker -> UrlExtractorService -> LLM -> GET /result, with the LLM
+replaced by FakeLLMClient and web pages served from a local corpus origin.
+
+Replays a JSONL workload at a controlled arrival rate. Lines may be submit
+bodies ({"text": ...} or {"url": ...}), corpus references ({"url_path":
+"/articles/3"}, see benchmarks.corpus) or backlog-style records with
+"title" and "body", which are submitted as text. Without --workload a
+workload is generated from the corpus.
+
+Reports throughput, end-to-end latency percentiles, per-stage durations
+(from the jobs' stage_timings), summary cache hits, LLM calls and resource usage, and writes
+the report as JSON (--output) so runs can be compared over time.
+
+The API runs in process through ASGI and one worker runs embedded with
+WORKER_CONCURRENCY slots; pass --no-worker to drive separately started
+worker.py processes instead. Run against scratch Postgres and Redis
+instances: jobs are deleted afterwards, but queue and cache keys are shared.
+
+Usage:
+    python -m benchmarks.loadgen --requests 500 --rate 20 --output report.json
+    python -m benchmarks.loadgen --workload requests.jsonl --rate 5 --llm-latency-ms 800
+"""
+import argparse
+import asyncio
+import json
+import random
+import resource
+import statistics
+import time
+import uuid
+
+import httpx
+from sqlalchemy import delete, func, select, text
+
+import worker
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, Base, async_engine
+from app.core.metrics import STAGES
+from app.core.redis import get_async_redis, get_cache_redis
+from app.main import app
+from app.models.job import Job
+from app.services.providers import configure_services, get_job_event_broker, shutdown_services, startup_services
+from app.services.summarizer import SummarizerService
+from benchmarks.corpus import build_corpus, build_workload
+from benchmarks.fakes import FakeLLMClient
+from benchmarks.origin import start_origin
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+def percentiles(values: list[float]) -> dict:
+    if not values:
+        return {}
+    ordered = sorted(values)
+    pick = lambda pct: ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+    return {
+        "p50": round(pick(0.50), 1),
+        "p95": round(pick(0.95), 1),
+        "p99": round(pick(0.99), 1),
+        "max": round(ordered[-1], 1),
+        "mean": round(statistics.fmean(ordered), 1),
+    }
+
+def load_workload(path: str) -> list[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def to_submit_body(item: dict, base_url: str, salt: str | None) -> dict:
+    if "url_path" in item:
+        body = {"url": base_url + item["url_path"]}
+    elif "url" in item or "text" in item:
+        body = {key: item[key] for key in ("url", "text", "priority") if key in item}
+    else:
+        body = {"text": f"{item.get('title', '')}\n\n{item.get('body', '')}".strip()}
+
+    # Salted inputs are unique: text gets a suffix and the origin echoes a URL's query into
+    # the page, so the URL, summary and dedup caches miss. cache_hits in the report confirms it.
+    if salt:
+        if "url" in body:
+            body["url"] += ("&" if "?" in body["url"] else "?") + f"run={salt}"
+        else:
+            body["text"] += f"\n\n[{salt}]"
+    return body
+
+async def db_transactions() -> int:
+    async with async_engine.connect() as conn:
+        return await conn.scalar(text(
+            "SELECT xact_commit + xact_rollback FROM pg_stat_database WHERE datname = current_database()"
+        ))
+
+async def redis_commands() -> int:
+    return int((await get_async_redis().info("stats"))["total_commands_processed"])
+
+async def stage_breakdown(job_ids: list[str]) -> dict:
+    stages = {stage: [] for stage in STAGES}
+    async with AsyncSessionLocal() as db:
+        rows = await db.scalars(select(Job.stage_timings).where(Job.id.in_([uuid.UUID(i) for i in job_ids])))
+        for timings in rows:
+            for stage, ms in (timings or {}).items():
+                stages.setdefault(stage, []).append(ms)
+    # Commit time is not stored per job; it is in the worker's summarizer_stage_seconds histogram
+    return {stage: percentiles(values) for stage, values in stages.items() if values}
+
+async def cache_hits(job_ids: list[str]) -> dict:
+    """Jobs answered from the summary cache, by kind, and their share of all completed jobs."""
+    async with AsyncSessionLocal() as db:
+        rows = await db.execute(
+            select(Job.cache_hit_type, func.count())
+            .where(Job.id.in_([uuid.UUID(i) for i in job_ids]), Job.status == "completed")
+            .group_by(Job.cache_hit_type)
+        )
+        counts = {hit_type or "miss": count for hit_type, count in rows}
+    completed = sum(counts.values())
+    hits = completed - counts.get("miss", 0)
+    return {**counts, "share": round(hits / completed, 3) if completed else None}
+
+async def replay(client: httpx.AsyncClient, bodies: list[dict], rate: float, arrival: str,
+                 wait_timeout: float) -> tuple[list[dict], float]:
+    rng = random.Random(0)
+    outcomes = []
+
+    async def run_one(body: dict):
+        submitted = time.perf_counter()
+        response = await client.post("/submit", json=body)
+        if response.status_code != 200:
+            outcomes.append({"status": "rejected", "code": response.status_code})
+            return
+        job_id = response.json()["job_id"]
+
+        deadline = submitted + wait_timeout
+        status = "timeout"
+        while time.perf_counter() < deadline:
+            wait = max(1, min(30, int(deadline - time.perf_counter())))
+            result = (await client.get(f"/result/{job_id}", params={"wait": wait})).json()
+            if result["status"] in TERMINAL_STATUSES:
+                status = result["status"]
+                break
+        outcomes.append({
+            "job_id": job_id,
+            "status": status,
+            "latency_ms": (time.perf_counter() - submitted) * 1000,
+        })
+
+    start = time.perf_counter()
+    tasks = []
+    next_at = start
+    for body in bodies:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(run_one(body)))
+        interval = rng.expovariate(rate) if arrival == "poisson" else 1 / rate
+        next_at += interval
+    await asyncio.gather(*tasks)
+    return outcomes, time.perf_counter() - start
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workload", help="JSONL file to replay; generated from the corpus if omitted")
+    parser.add_argument("--requests", type=int, default=500, help="Size of a generated workload")
+    parser.add_argument("--limit", type=int, help="Replay at most this many lines")
+    parser.add_argument("--pages", type=int, default=200, help="Pages in the origin corpus")
+    parser.add_argument("--url-ratio", type=float, default=0.7)
+    parser.add_argument("--rate", type=float, default=20.0, help="Submissions per second")
+    parser.add_argument("--arrival", choices=("constant", "poisson"), default="poisson")
+    parser.add_argument("--no-salt", action="store_true", help="Let repeated inputs hit the caches")
+    parser.add_argument("--no-worker", action="store_true", help="Use separately started worker processes")
+    parser.add_argument("--worker-concurrency", type=int, default=settings.WORKER_CONCURRENCY)
+    parser.add_argument("--wait-timeout", type=float, default=300.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=500.0)
+    parser.add_argument("--llm-jitter", type=float, default=0.3)
+    parser.add_argument("--llm-tail-rate", type=float, default=0.01)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    settings.WORKER_METRICS_PORT = 0
+    settings.WORKER_CONCURRENCY = args.worker_concurrency
+
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    server, base_url = start_origin(build_corpus(args.pages))
+    items = load_workload(args.workload) if args.workload else build_workload(args.requests, args.pages, args.url_ratio)
+    items = items[:args.limit] if args.limit else items
+    run_id = uuid.uuid4().hex[:8]
+    bodies = [to_submit_body(item, base_url, None if args.no_salt else f"{run_id}-{i}") for i, item in enumerate(items)]
+
+    fake_llm = FakeLLMClient(
+        latency_ms=args.llm_latency_ms, jitter=args.llm_jitter, tail_rate=args.llm_tail_rate,
+        error_rate=args.llm_error_rate, rate_limit_rate=args.llm_rate_limit_rate, seed=0
+    )
+    configure_services(summarizer=SummarizerService(llm_client=fake_llm))
+    await startup_services()
+    get_job_event_broker().start()
+
+    stop_worker = asyncio.Event()
+    worker_task = None if args.no_worker else asyncio.create_task(worker.run_worker(stop_worker))
+
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    db_before, redis_before = await db_transactions(), await redis_commands()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://load", timeout=None) as client:
+        outcomes, elapsed = await replay(client, bodies, args.rate, args.arrival, args.wait_timeout)
+
+    usage_after = resource.getrusage(resource.RUSAGE_SELF)
+    db_after, redis_after = await db_transactions(), await redis_commands()
+    redis_memory = (await get_async_redis().info("memory")).get("used_memory")
+    job_ids = [outcome["job_id"] for outcome in outcomes if "job_id" in outcome]
+    stages = await stage_breakdown(job_ids)
+    hits = await cache_hits(job_ids)
+
+    counts = {status: sum(o["status"] == status for o in outcomes) for status in ("completed", "failed", "timeout", "rejected")}
+    report = {
+        "run_id": run_id,
+        "config": {
+            key: value for key, value in vars(args).items() if key not in ("output",)
+        },
+        "requests": len(bodies),
+        **counts,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_jobs_per_s": round(counts["completed"] / elapsed, 2) if elapsed else None,
+        "latency_ms": percentiles([o["latency_ms"] for o in outcomes if o["status"] == "completed"]),
+        "stages_ms": stages,
+        "cache_hits": hits,
+        "llm_calls": fake_llm.calls,
+        "resources": {
+            # This process only: API, embedded worker and the origin thread; parse pool processes are not included
+            "cpu_user_s": round(usage_after.ru_utime - usage_before.ru_utime, 2),
+            "cpu_system_s": round(usage_after.ru_stime - usage_before.ru_stime, 2),
+            "max_rss_mb": round(usage_after.ru_maxrss / 1024, 1),
+            "db_transactions": db_after - db_before,
+            "redis_commands": redis_after - redis_before,
+            "redis_used_memory_bytes": redis_memory,
+        },
+    }
+
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(Job).where(Job.id.in_([uuid.UUID(i) for i in job_ids])))
+            await db.commit()
+    finally:
+        server.shutdown()
+        if worker_task:
+            # The embedded worker drains, then closes the shared services and connections
+            stop_worker.set()
+            await worker_task
+        else:
+            await shutdown_services()
+            await get_async_redis().aclose()
+            await get_cache_redis().aclose()
+            await async_engine.dispose()
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,49 @@
+"""Local HTTP stand-in for news sites, served from a background thread."""
+import html
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+SAMPLE_ARTICLE = (
+    "<html><head><title>Sample article</title></head><body>"
+    "<nav>Home | World | Business</nav>"
+    "<article><h1>Sample article</h1>"
+    + "".join(
+        f"<p>Paragraph {i} of the benchmark article. It carries enough running text for readability "
+        f"to treat it as the main content of the page rather than boilerplate.</p>"
+        for i in range(40)
+    )
+    + "</article><footer>Copyright</footer></body></html>"
+).encode("utf-8")
+
+class OriginHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
+    pages: dict[str, bytes] = {}
+
+    def do_GET(self):
+        path, _, query = self.path.partition("?")
+        body = self.pages.get(path, SAMPLE_ARTICLE)
+        if query:
+            # Each query string gets its own content, so salted URLs also miss content-keyed caches
+            variant = (
+                f"<p>This edition of the article was served for {html.escape(unquote(query))}, so its text "
+                f"differs from every other edition of the same page.</p></article>"
+            ).encode("utf-8")
+            body = body.replace(b"</article>", variant, 1)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_origin(pages: dict[str, bytes] | None = None, handler: type[BaseHTTPRequestHandler] = OriginHandler,
+                 host: str = "127.0.0.1", port: int = 0) -> tuple[ThreadingHTTPServer, str]:
+    """Start serving pages (path -> body) and return the server and its base URL."""
+    handler = type("BoundOriginHandler", (handler,), {"pages": pages or {}})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
@@ -0,0 +1,64 @@
+"""
+Apply the SQL migrations in migrations/ in filename order, each in its own
+transaction, recording applied versions in schema_migrations.
+
+Usage:
+    python migrate.py           # apply pending migrations
+    python migrate.py --status  # list migrations and whether they are applied
+"""
+import argparse
+import logging
+from pathlib import Path
+
+from app.core.database import engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("migrate")
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+
+def list_migrations() -> list[Path]:
+    return sorted(MIGRATIONS_DIR.glob("*.sql"))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--status", action="store_true", help="List migrations without applying any")
+    args = parser.parse_args()
+
+    # psycopg2 runs each file, DO blocks and functions included, as one multi-statement string
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                " version VARCHAR PRIMARY KEY,"
+                " applied_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc'))"
+            )
+            cursor.execute("SELECT version FROM schema_migrations")
+            applied = {version for (version,) in cursor.fetchall()}
+        connection.commit()
+
+        pending = [path for path in list_migrations() if path.stem not in applied]
+        if args.status:
+            for path in list_migrations():
+                print(f"{'applied' if path.stem in applied else 'pending'}  {path.stem}")
+            return
+
+        for path in pending:
+            logger.info(f"Applying {path.stem}")
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(path.read_text())
+                    cursor.execute("INSERT INTO schema_migrations (version) VALUES (%s)", (path.stem,))
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                logger.exception(f"Migration {path.stem} failed and was rolled back")
+                raise SystemExit(1)
+
+        logger.info(f"{len(pending)} migration(s) applied" if pending else "Schema is up to date")
+    finally:
+        connection.close()
+
+if __name__ == "__main__":
+    main()
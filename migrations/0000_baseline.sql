@@ -0,0 +1,15 @@
+-- Jobs table as it was before the first migration, for new databases.
+-- Idempotent, so databases created earlier from the models
+-- (Base.metadata.create_all) pass through unchanged.
+CREATE TABLE IF NOT EXISTS jobs (
+    id UUID PRIMARY KEY,
+    input_type VARCHAR NOT NULL,
+    input_value TEXT NOT NULL,
+    status VARCHAR,
+    summary TEXT,
+    error_message TEXT,
+    processing_time_ms INTEGER,
+    is_cached BOOLEAN,
+    created_at TIMESTAMP WITHOUT TIME ZONE,
+    updated_at TIMESTAMP WITHOUT TIME ZONE
+);
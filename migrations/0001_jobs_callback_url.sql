@@ -0,0 +1,2 @@
+-- Webhook notified when a job finishes (POST /submit callback_url).
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS callback_url TEXT;
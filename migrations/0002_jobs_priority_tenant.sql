@@ -0,0 +1,3 @@
+-- Queue lane and tenant (hash of the submitting API key) of each job.
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS priority VARCHAR;
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS tenant_id VARCHAR;
@@ -0,0 +1,2 @@
+-- Milliseconds spent in each processing stage of a job.
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS stage_timings JSONB;
@@ -0,0 +1,12 @@
+-- content_hash: sha256 of the text summarized. Known at submit time for text
+-- jobs (backfilled here); URL jobs get it once the worker has extracted the page.
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+
+UPDATE jobs
+SET content_hash = encode(sha256(convert_to(input_value, 'UTF8')), 'hex')
+WHERE input_type = 'text' AND content_hash IS NULL;
+
+CREATE INDEX IF NOT EXISTS ix_jobs_content_hash ON jobs (content_hash);
+
+-- Status scans ("queued for more than 10 minutes", "failed today") and retention
+CREATE INDEX IF NOT EXISTS ix_jobs_status_created_at ON jobs (status, created_at);
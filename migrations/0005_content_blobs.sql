@@ -0,0 +1,15 @@
+-- Large inputs and summaries are stored once per distinct text and referenced
+-- from jobs by hash: input text under content_hash (input_value is then NULL),
+-- summaries under summary_hash (summary is then NULL).
+CREATE TABLE IF NOT EXISTS content_blobs (
+    hash VARCHAR(64) PRIMARY KEY,
+    body TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT (now() AT TIME ZONE 'utc'),
+    last_referenced_at TIMESTAMP WITHOUT TIME ZONE DEFAULT (now() AT TIME ZONE 'utc')
+);
+
+CREATE INDEX IF NOT EXISTS ix_content_blobs_last_referenced_at ON content_blobs (last_referenced_at);
+
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS summary_hash VARCHAR(64);
+ALTER TABLE jobs ALTER COLUMN input_value DROP NOT NULL;
@@ -0,0 +1,82 @@
+-- Range-partition jobs by month on created_at, so retention drops or archives
+-- whole partitions instead of deleting rows, and queries bounded by created_at
+-- only touch the months they need.
+--
+-- The table is rebuilt and every row copied inside this migration's
+-- transaction, which holds an exclusive lock on jobs until it commits: on a
+-- large table, run it with the API and workers stopped.
+
+CREATE OR REPLACE FUNCTION jobs_ensure_partitions(months_ahead INTEGER, from_month DATE DEFAULT NULL)
+RETURNS INTEGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    current_month DATE := date_trunc('month', now() AT TIME ZONE 'utc')::DATE;
+    partition_month DATE := date_trunc('month', COALESCE(from_month, current_month))::DATE;
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    WHILE partition_month <= (current_month + make_interval(months => months_ahead))::DATE LOOP
+        partition_name := 'jobs_' || to_char(partition_month, 'YYYY_MM');
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF jobs FOR VALUES FROM (%L) TO (%L)',
+                partition_name, partition_month, (partition_month + INTERVAL '1 month')::DATE
+            );
+            created := created + 1;
+        END IF;
+        partition_month := (partition_month + INTERVAL '1 month')::DATE;
+    END LOOP;
+    RETURN created;
+END $$;
+
+DO $$
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'jobs'::regclass) = 'p' THEN
+        RETURN;
+    END IF;
+
+    ALTER TABLE jobs RENAME TO jobs_unpartitioned;
+    DROP INDEX IF EXISTS ix_jobs_content_hash;
+    DROP INDEX IF EXISTS ix_jobs_status_created_at;
+
+    -- The partition key has to be part of the primary key
+    CREATE TABLE jobs (
+        id UUID NOT NULL,
+        input_type VARCHAR NOT NULL,
+        input_value TEXT,
+        content_hash VARCHAR(64),
+        status VARCHAR,
+        summary TEXT,
+        summary_hash VARCHAR(64),
+        error_message TEXT,
+        processing_time_ms INTEGER,
+        stage_timings JSONB,
+        is_cached BOOLEAN,
+        callback_url TEXT,
+        priority VARCHAR,
+        tenant_id VARCHAR,
+        created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+        updated_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id, created_at)
+    ) PARTITION BY RANGE (created_at);
+
+    -- Rows outside every monthly partition; kept empty by jobs_ensure_partitions
+    CREATE TABLE jobs_default PARTITION OF jobs DEFAULT;
+
+    PERFORM jobs_ensure_partitions(3, (SELECT min(created_at)::DATE FROM jobs_unpartitioned));
+
+    INSERT INTO jobs (
+        id, input_type, input_value, content_hash, status, summary, summary_hash, error_message,
+        processing_time_ms, stage_timings, is_cached, callback_url, priority, tenant_id, created_at, updated_at
+    )
+    SELECT
+        id, input_type, input_value, content_hash, status, summary, summary_hash, error_message,
+        processing_time_ms, stage_timings, is_cached, callback_url, priority, tenant_id,
+        COALESCE(created_at, updated_at, now() AT TIME ZONE 'utc'), updated_at
+    FROM jobs_unpartitioned;
+
+    DROP TABLE jobs_unpartitioned;
+
+    CREATE INDEX ix_jobs_content_hash ON jobs (content_hash);
+    CREATE INDEX ix_jobs_status_created_at ON jobs (status, created_at);
+END $$;
@@ -0,0 +1,5 @@
+-- Which cache answered a cached job: exact (same content hash) or near
+-- (summary of a near-duplicate document, see SIMILARITY_CACHE_ENABLED).
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS cache_hit_type VARCHAR;
+
+UPDATE jobs SET cache_hit_type = 'exact' WHERE is_cached AND cache_hit_type IS NULL;
@@ -0,0 +1,167 @@
+"""
+Retention for the partitioned jobs table; run it daily (cron, Kubernetes
+CronJob). Each run:
+
+1. creates the monthly partitions for the next JOBS_PARTITIONS_AHEAD months,
+2. detaches every partition that lies entirely before the retention cutoff
+   (JOBS_RETENTION_DAYS) and archives it into the jobs_archive schema or drops
+   it (JOBS_RETENTION_MODE), optionally exporting it to CSV first,
+3. moves or deletes expired rows that landed in the default partition,
+4. deletes content blobs no remaining job can reference.
+
+Archived and exported rows get their large texts copied back inline, so they
+stay readable after the blobs are collected.
+
+Usage:
+    python retention.py [--dry-run] [--mode archive|drop] [--export-dir DIR]
+"""
+import argparse
+import asyncio
+import logging
+import re
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import settings
+from app.core.database import async_engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("retention")
+
+ARCHIVE_SCHEMA = "jobs_archive"
+PARTITION_NAME = re.compile(r"^jobs_(\d{4})_(\d{2})$")
+BLOB_DELETE_BATCH = 10_000
+
+def month_after(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+async def monthly_partitions(conn: AsyncConnection) -> dict[str, date]:
+    """Partition name -> first day of its month, oldest first."""
+    rows = await conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'jobs'::regclass"
+    ))
+    partitions = {}
+    for (name,) in rows:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions[name] = date(int(match[1]), int(match[2]), 1)
+    return dict(sorted(partitions.items(), key=lambda item: item[1]))
+
+async def inline_blobs(conn: AsyncConnection, table: str, condition: str = "TRUE", params: dict | None = None):
+    """Copy large texts stored in content_blobs back into the rows of `table`."""
+    for column, hash_column in (("input_value", "content_hash"), ("summary", "summary_hash")):
+        await conn.execute(text(
+            f"UPDATE {table} AS j SET {column} = b.body FROM content_blobs b "
+            f"WHERE j.{column} IS NULL AND j.{hash_column} = b.hash AND {condition}"
+        ), params or {})
+
+async def export_csv(conn: AsyncConnection, table: str, export_dir: Path):
+    path = export_dir / f"{table}.csv"
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.copy_from_table(table, output=str(path), format="csv", header=True)
+    logger.info(f"Exported {table} to {path}")
+
+async def expire_partition(conn: AsyncConnection, name: str, mode: str, export_dir: Path | None):
+    if mode == "archive" or export_dir:
+        await inline_blobs(conn, name)
+    if export_dir:
+        await export_csv(conn, name, export_dir)
+
+    await conn.execute(text(f"ALTER TABLE jobs DETACH PARTITION {name}"))
+    if mode == "archive":
+        await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+        await conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+    else:
+        await conn.execute(text(f"DROP TABLE {name}"))
+    logger.info(f"{'Archived' if mode == 'archive' else 'Dropped'} partition {name}")
+
+async def expire_default_rows(conn: AsyncConnection, cutoff: datetime, mode: str) -> int:
+    params = {"cutoff": cutoff}
+    if mode == "archive":
+        await inline_blobs(conn, "jobs_default", "j.created_at < :cutoff", params)
+        await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+        await conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.jobs_default_rows (LIKE jobs INCLUDING DEFAULTS)"
+        ))
+        result = await conn.execute(text(
+            "WITH moved AS (DELETE FROM jobs_default WHERE created_at < :cutoff RETURNING *) "
+            f"INSERT INTO {ARCHIVE_SCHEMA}.jobs_default_rows SELECT * FROM moved"
+        ), params)
+    else:
+        result = await conn.execute(text("DELETE FROM jobs_default WHERE created_at < :cutoff"), params)
+    return result.rowcount
+
+async def collect_blobs(conn: AsyncConnection) -> int:
+    """
+    A blob's last_referenced_at is at least the created_at of every job that
+    references it, so blobs last referenced before the oldest remaining job
+    are unreachable.
+    """
+    partitions = await monthly_partitions(conn)
+    oldest = [datetime.combine(next(iter(partitions.values())), datetime.min.time())] if partitions else []
+    default_oldest = await conn.scalar(text("SELECT min(created_at) FROM jobs_default"))
+    if default_oldest:
+        oldest.append(default_oldest)
+    if not oldest:
+        return 0
+
+    deleted = 0
+    while True:
+        result = await conn.execute(text(
+            "DELETE FROM content_blobs WHERE hash IN ("
+            " SELECT hash FROM content_blobs WHERE last_referenced_at < :cutoff LIMIT :limit)"
+        ), {"cutoff": min(oldest), "limit": BLOB_DELETE_BATCH})
+        await conn.commit()
+        deleted += result.rowcount
+        if result.rowcount < BLOB_DELETE_BATCH:
+            return deleted
+
+async def run_retention(mode: str, export_dir: Path | None, dry_run: bool):
+    cutoff = datetime.utcnow() - timedelta(days=settings.JOBS_RETENTION_DAYS)
+    async with async_engine.connect() as conn:
+        created = await conn.scalar(
+            text("SELECT jobs_ensure_partitions(:ahead)"), {"ahead": settings.JOBS_PARTITIONS_AHEAD}
+        )
+        await conn.commit()
+        logger.info(f"Created {created} partition(s)")
+
+        expired = [
+            name for name, month in (await monthly_partitions(conn)).items()
+            if month_after(month) <= cutoff.date()
+        ]
+        if dry_run:
+            logger.info(f"Would {mode} {len(expired)} partition(s) before {cutoff:%Y-%m-%d}: {', '.join(expired) or '-'}")
+            return
+
+        # One transaction per partition: a failure leaves the rest attached for the next run
+        for name in expired:
+            await expire_partition(conn, name, mode, export_dir)
+            await conn.commit()
+
+        rows = await expire_default_rows(conn, cutoff, mode)
+        await conn.commit()
+        if rows:
+            logger.info(f"Expired {rows} row(s) from the default partition")
+
+        logger.info(f"Deleted {await collect_blobs(conn)} unreferenced content blob(s)")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("archive", "drop"), default=settings.JOBS_RETENTION_MODE)
+    parser.add_argument("--export-dir", type=Path, help="Write each expired partition to DIR/<partition>.csv first")
+    parser.add_argument("--dry-run", action="store_true", help="Create partitions and list expired ones only")
+    args = parser.parse_args()
+
+    if args.export_dir:
+        args.export_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        await run_retention(args.mode, args.export_dir, args.dry_run)
+    finally:
+        await async_engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,360 @@
+"""
+Run several worker processes and keep them running: crashed workers are
+restarted with backoff, and the process count is scaled between
+SUPERVISOR_MIN_PROCESSES and SUPERVISOR_MAX_PROCESSES from the queue depth and
+the per-job latency the workers report. Each worker serves its Prometheus
+metrics on WORKER_METRICS_PORT + its index.
+
+Health and throughput stats are served as JSON on SUPERVISOR_STATS_PORT
+(GET /stats; GET /health answers 503 while fewer than the minimum workers run).
+
+SIGTERM/SIGINT stops every worker, which drain their in-flight jobs as they
+do when run alone.
+
+Usage:
+    python supervisor.py [--min 2] [--max 8]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from queue import Empty
+
+from app.core.config import settings
+from app.core.job_queue import queue_depth
+from app.core.redis import get_async_redis
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("supervisor")
+
+# Workers start from a fresh interpreter rather than inheriting the supervisor's event loop and connections
+CONTEXT = multiprocessing.get_context("spawn")
+
+# A worker that ran this long before exiting counts as healthy; its restart backoff starts over
+HEALTHY_RUN_SECONDS = 60.0
+
+def run_child(index: int, reports):
+    """Entry point of a worker process."""
+    import worker
+
+    if settings.WORKER_METRICS_PORT > 0:
+        settings.WORKER_METRICS_PORT += index
+    pid = os.getpid()
+
+    def report_job(seconds: float, ok: bool):
+        reports.put_nowait((index, pid, 1, seconds, ok))
+
+    asyncio.run(worker.run_worker(report_job=report_job))
+
+@dataclass
+class Child:
+    index: int
+    process: multiprocessing.process.BaseProcess
+    started_at: float
+    stopping: bool = False
+    jobs: int = 0
+    failed_jobs: int = 0
+
+class Supervisor:
+    def __init__(self, min_processes: int, max_processes: int):
+        self.min_processes = min_processes
+        self.max_processes = max_processes
+        self.target = min_processes
+        self.children: dict[int, Child] = {}
+        self.reports = CONTEXT.Queue()
+        # (time, jobs, seconds) per finished job, within the stats window
+        self.samples: deque[tuple[float, int, float]] = deque()
+        self.restart_at: dict[int, float] = {}  # index -> when to start its replacement
+        self.crashes: dict[int, int] = {}  # index -> consecutive short-lived runs
+        self.totals = {"jobs": 0, "failed_jobs": 0, "restarts": 0}
+        self.low_since: float | None = None
+        self.decision = {"target": min_processes, "reason": "starting"}
+        self.queue_depth: dict[str, int] = {}
+        self.started_at = time.time()
+        self.snapshot: dict = {}
+
+    # --- processes ---
+
+    def active(self) -> list[Child]:
+        return [child for child in self.children.values() if not child.stopping]
+
+    def spawn(self, index: int):
+        process = CONTEXT.Process(target=run_child, args=(index, self.reports), name=f"worker-{index}")
+        process.start()
+        self.children[index] = Child(index, process, time.monotonic())
+        logger.info(f"Started worker {index} (pid {process.pid})")
+
+    def stop_child(self, child: Child):
+        # SIGTERM: the worker stops popping, drains in-flight jobs and returns the rest to the queue
+        child.stopping = True
+        if child.process.is_alive():
+            child.process.terminate()
+        logger.info(f"Stopping worker {child.index} (pid {child.process.pid})")
+
+    def scale_to(self, count: int):
+        count = max(self.min_processes, min(self.max_processes, count))
+        self.target = count
+        planned = sorted({child.index for child in self.active()} | set(self.restart_at))
+
+        # Fill the lowest free indexes so metrics ports stay in a predictable range
+        index = 0
+        while len(planned) < count:
+            if index not in planned and index not in self.children:
+                self.spawn(index)
+                planned.append(index)
+            index += 1
+
+        for index in sorted(planned, reverse=True)[:max(0, len(planned) - count)]:
+            if index in self.restart_at:
+                del self.restart_at[index]
+            else:
+                self.stop_child(self.children[index])
+
+    def check_children(self):
+        now = time.monotonic()
+        for child in list(self.children.values()):
+            if child.process.is_alive():
+                continue
+            child.process.join()
+            del self.children[child.index]
+            if child.stopping:
+                logger.info(f"Worker {child.index} stopped (exit code {child.process.exitcode})")
+                continue
+
+            # Crashed: restart with exponential backoff while it keeps dying young
+            crashes = self.crashes[child.index] = (
+                self.crashes.get(child.index, 0) + 1 if now - child.started_at < HEALTHY_RUN_SECONDS else 1
+            )
+            delay = min(settings.SUPERVISOR_RESTART_MAX_DELAY_SECONDS, 2 ** (crashes - 1))
+            self.restart_at[child.index] = now + delay
+            logger.error(f"Worker {child.index} exited with code {child.process.exitcode}; restarting in {delay:.0f}s")
+
+        for index, restart_at in list(self.restart_at.items()):
+            if now >= restart_at and index not in self.children:
+                del self.restart_at[index]
+                self.totals["restarts"] += 1
+                self.spawn(index)
+
+    # --- measurements ---
+
+    def collect_reports(self):
+        now = time.monotonic()
+        while True:
+            try:
+                index, pid, jobs, seconds, ok = self.reports.get_nowait()
+            except Empty:
+                break
+            self.samples.append((now, jobs, seconds))
+            self.totals["jobs"] += jobs
+            self.totals["failed_jobs"] += not ok
+            child = self.children.get(index)
+            if child and child.process.pid == pid:
+                child.jobs += jobs
+                child.failed_jobs += not ok
+
+        while self.samples and now - self.samples[0][0] > settings.SUPERVISOR_STATS_WINDOW_SECONDS:
+            self.samples.popleft()
+
+    def window_stats(self) -> dict:
+        """Jobs per second and mean per-job latency over the stats window."""
+        jobs = sum(sample_jobs for _, sample_jobs, _ in self.samples)
+        if not jobs:
+            return {"jobs": 0, "throughput_jobs_per_s": 0.0, "job_latency_s": None}
+        latency = sum(sample_jobs * seconds for _, sample_jobs, seconds in self.samples) / jobs
+        return {
+            "jobs": jobs,
+            "throughput_jobs_per_s": round(jobs / settings.SUPERVISOR_STATS_WINDOW_SECONDS, 3),
+            "job_latency_s": round(latency, 3),
+        }
+
+    # --- autoscaling ---
+
+    async def autoscale(self):
+        try:
+            self.queue_depth = await queue_depth(get_async_redis())
+        except Exception as e:
+            logger.warning(f"Could not read queue depth, keeping {self.target} worker(s): {e}")
+            return
+        depth = sum(self.queue_depth.values())
+        stats = self.window_stats()
+        current = self.target
+
+        if depth == 0 and not stats["jobs"]:
+            desired, reason = self.min_processes, "idle"
+        elif stats["job_latency_s"] is None:
+            # Jobs are waiting but nothing finished lately: starting up, or the LLM circuit is open
+            desired, reason = current, f"{depth} queued, no job latency measured yet"
+        else:
+            # Little's law: each process finishes WORKER_CONCURRENCY jobs per job latency. Keep up
+            # with the current rate and clear the backlog within SUPERVISOR_TARGET_DRAIN_SECONDS.
+            per_process = settings.WORKER_CONCURRENCY / max(stats["job_latency_s"], 0.001)
+            needed = stats["throughput_jobs_per_s"] + depth / settings.SUPERVISOR_TARGET_DRAIN_SECONDS
+            desired = math.ceil(needed / per_process)
+            reason = (
+                f"{depth} queued, {stats['throughput_jobs_per_s']} jobs/s, "
+                f"{stats['job_latency_s']}s per job, {per_process:.2f} jobs/s per process"
+            )
+        desired = max(self.min_processes, min(self.max_processes, desired))
+
+        now = time.monotonic()
+        if desired > current:
+            self.low_since = None
+            logger.info(f"Scaling up to {desired} worker(s): {reason}")
+            self.scale_to(desired)
+        elif desired < current:
+            # Scale down one process at a time, and only after spare capacity has lasted a while
+            if self.low_since is None:
+                self.low_since = now
+            elif now - self.low_since >= settings.SUPERVISOR_SCALE_DOWN_DELAY_SECONDS:
+                self.low_since = now
+                logger.info(f"Scaling down to {current - 1} worker(s): {reason}")
+                self.scale_to(current - 1)
+        else:
+            self.low_since = None
+        self.decision = {"target": self.target, "desired": desired, "reason": reason}
+
+    # --- stats ---
+
+    def publish_snapshot(self):
+        now = time.monotonic()
+        # Replaced whole, so the stats server thread always reads a consistent snapshot
+        self.snapshot = {
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "processes": {
+                "running": len(self.active()),
+                "stopping": len(self.children) - len(self.active()),
+                "restarting": len(self.restart_at),
+                "target": self.target,
+                "min": self.min_processes,
+                "max": self.max_processes,
+            },
+            "scaling": self.decision,
+            "queue_depth": self.queue_depth,
+            "window": {"seconds": settings.SUPERVISOR_STATS_WINDOW_SECONDS, **self.window_stats()},
+            "totals": dict(self.totals),
+            "workers": [
+                {
+                    "index": child.index,
+                    "pid": child.process.pid,
+                    "state": "stopping" if child.stopping else "running",
+                    "uptime_s": round(now - child.started_at, 1),
+                    "jobs": child.jobs,
+                    "failed_jobs": child.failed_jobs,
+                    "metrics_port": settings.WORKER_METRICS_PORT + child.index if settings.WORKER_METRICS_PORT > 0 else None,
+                }
+                for child in sorted(self.children.values(), key=lambda child: child.index)
+            ],
+        }
+
+    def healthy(self) -> bool:
+        return len(self.active()) >= self.min_processes
+
+    def start_stats_server(self) -> ThreadingHTTPServer | None:
+        if settings.SUPERVISOR_STATS_PORT <= 0:
+            return None
+        supervisor = self
+
+        class StatsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/stats":
+                    code, body = 200, supervisor.snapshot
+                elif self.path == "/health":
+                    healthy = supervisor.healthy()
+                    code, body = (200 if healthy else 503), {"healthy": healthy, **supervisor.snapshot["processes"]}
+                else:
+                    code, body = 404, {"detail": "Not found"}
+                payload = json.dumps(body).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            server = ThreadingHTTPServer(("", settings.SUPERVISOR_STATS_PORT), StatsHandler)
+        except OSError as e:
+            logger.warning(f"Could not serve stats on port {settings.SUPERVISOR_STATS_PORT}: {e}")
+            return None
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        logger.info(f"Serving supervisor stats on port {settings.SUPERVISOR_STATS_PORT}")
+        return server
+
+    # --- main loop ---
+
+    async def run(self):
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, stop_event.set)
+            except NotImplementedError:
+                # Signal handlers are not available on Windows event loops
+                pass
+
+        self.scale_to(self.min_processes)
+        self.publish_snapshot()
+        server = self.start_stats_server()
+        last_scale = time.monotonic()
+
+        while not stop_event.is_set():
+            self.collect_reports()
+            self.check_children()
+            if time.monotonic() - last_scale >= settings.SUPERVISOR_SCALE_INTERVAL_SECONDS:
+                last_scale = time.monotonic()
+                await self.autoscale()
+            self.publish_snapshot()
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=1)
+            except asyncio.TimeoutError:
+                pass
+
+        await self.shutdown()
+        if server:
+            server.shutdown()
+        await get_async_redis().aclose()
+
+    async def shutdown(self):
+        """Stop every worker and wait for them to drain, killing any that outlive the drain timeout."""
+        self.restart_at.clear()
+        for child in self.children.values():
+            self.stop_child(child)
+
+        # Workers cancel jobs at WORKER_DRAIN_TIMEOUT_SECONDS; allow time to requeue and close connections
+        deadline = time.monotonic() + settings.WORKER_DRAIN_TIMEOUT_SECONDS + 15
+        while self.children and time.monotonic() < deadline:
+            self.collect_reports()
+            self.check_children()
+            self.publish_snapshot()
+            await asyncio.sleep(0.5)
+
+        for child in self.children.values():
+            logger.warning(f"Worker {child.index} did not stop in time; killing it")
+            child.process.kill()
+            child.process.join()
+        self.children.clear()
+        logger.info(f"Supervisor stopped after {self.totals['jobs']} job(s)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min", type=int, default=settings.SUPERVISOR_MIN_PROCESSES, help="Minimum worker processes")
+    parser.add_argument("--max", type=int, default=settings.SUPERVISOR_MAX_PROCESSES, help="Maximum worker processes")
+    args = parser.parse_args()
+    if not 1 <= args.min <= args.max:
+        parser.error("--min must be at least 1 and at most --max")
+
+    asyncio.run(Supervisor(args.min, args.max).run())
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,29 @@
-import time, redis
+import time
 import asyncio
-import hashlib
 import json
 import logging
+import signal
+from typing import Callable
 from uuid import UUID
 from datetime import datetime
 
-from app.core.database import SessionLocal
-from app.core.redis import get_redis, JOB_QUEUE_KEY
+import redis.exceptions
+from prometheus_client import start_http_server
+from sqlalchemy import bindparam, func, select, update
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, async_engine
+from app.core.job_queue import ANONYMOUS_TENANT, LANE_NAMES, JobQueue, enqueue_jobs
+from app.core.metrics import JOBS_FINISHED, JOBS_IN_FLIGHT, observe_stage, refresh_queue_depth, time_stage
+from app.core.redis import get_async_redis, get_cache_redis
 from app.models.job import Job
+from app.services.content_store import BlobWriter, load_blobs
+from app.services.deduplication import JobCoalescer, get_content_hash
+from app.services.job_events import JobProgressWriter, clear_job_progress, publish_job_events
+from app.services.llm_client import CircuitOpenError
+from app.services.providers import (
+    get_summarizer_service, get_url_extractor_service, get_webhook_dispatcher, startup_services, shutdown_services
+)
 from app.services.summarizer import SummarizerService
 from app.services.url_extractor import UrlExtractorService
 
@@ -16,111 +31,641 @@ from app.services.url_extractor import UrlExtractorService
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("worker")
 
-def get_content_hash(text: str) -> str:
-    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+FINAL_STATE_COLUMNS = (
+    "status", "summary", "summary_hash", "error_message", "is_cached", "cache_hit_type", "processing_time_ms",
+    "stage_timings", "updated_at"
+)
 
-async def process_job(job_id_str: str, summarizer: SummarizerService, extractor: UrlExtractorService):
-    db = SessionLocal()
-    redis_client = get_redis()
-    
-    try:
-        job_id = UUID(job_id_str)
-        job = db.query(Job).filter(Job.id == job_id).first()
-        
-        if not job:
-            logger.error(f"Job {job_id} not found in database")
-            return
+# Core executemany keyed on id: rows that vanished meanwhile are skipped instead of failing the batch
+jobs_table = Job.__table__
+FINAL_STATE_UPDATE = (
+    update(jobs_table)
+    .where(jobs_table.c.id == bindparam("b_id"))
+    .values({
+        **{column: bindparam(f"b_{column}") for column in FINAL_STATE_COLUMNS},
+        # Never cleared: for large text inputs it is the only reference to the input blob
+        "content_hash": func.coalesce(bindparam("b_content_hash"), jobs_table.c.content_hash)
+    })
+)
 
-        # Update status to processing
-        job.status = "processing"
-        job.updated_at = datetime.utcnow()
-        db.commit()
-        
-        start_time = time.perf_counter()
-        
+def job_lane(priority: str | None) -> str:
+    """Queue lane of a job's priority; rows from before lanes existed use the default lane."""
+    return priority if priority in LANE_NAMES else settings.QUEUE_DEFAULT_LANE
+
+def _final_state(job: Job, status: str, summary: str | None = None, error_message: str | None = None,
+                 cache_hit_type: str | None = None, processing_time_ms: int | None = None,
+                 stage_timings: dict | None = None, content_hash: str | None = None) -> dict:
+    # Every row carries the same keys so the bulk UPDATE runs as a single executemany
+    return {
+        "id": job.id,
+        "status": status,
+        "summary": summary,
+        "content_hash": content_hash,
+        "error_message": error_message,
+        "is_cached": cache_hit_type is not None,
+        "cache_hit_type": cache_hit_type,
+        "processing_time_ms": processing_time_ms,
+        "stage_timings": stage_timings,
+        "updated_at": datetime.utcnow()
+    }
+
+def _result_event(state: dict) -> dict:
+    # Same fields as GET /result, so waiters can answer without reading the row back
+    return {
+        "job_id": str(state["id"]),
+        "status": state["status"],
+        "summary": state["summary"],
+        "processing_time_ms": state["processing_time_ms"],
+        "cached": state["is_cached"],
+        "cache_hit_type": state["cache_hit_type"],
+        "error_message": state["error_message"]
+    }
+
+async def notify_finished(final_states: list[dict], callback_urls: dict):
+    """Push final states to API waiters over pub/sub and to any registered webhooks."""
+    events = [_result_event(state) for state in final_states]
+    await publish_job_events(get_async_redis(), events)
+
+    dispatcher = get_webhook_dispatcher()
+    for event in events:
+        callback_url = callback_urls.get(event["job_id"])
+        if callback_url:
+            dispatcher.dispatch(callback_url, event)
+
+async def fail_dead_lettered(job_ids: list[str]):
+    """
+    Mark jobs the queue gave up on as failed, together with any followers
+    coalesced onto them, so clients stop waiting on them.
+    """
+    ids = []
+    for job_id_str in job_ids:
+        try:
+            ids.append(UUID(job_id_str))
+        except ValueError:
+            pass
+    if not ids:
+        return
+
+    # Followers share their leader's fate, as they would its result
+    followers = {}
+    if settings.SUBMIT_DEDUP_ENABLED:
+        async with AsyncSessionLocal() as db:
+            leaders = (await db.scalars(select(Job).where(Job.id.in_(ids)))).all()
+            await load_blobs(db, leaders, inputs=True)
+        coalescer = JobCoalescer(get_async_redis())
+        followers = await coalescer.detach_followers(
+            [(str(job.id), job.input_type, job.input_value, job_lane(job.priority)) for job in leaders]
+        )
+    failed_ids = ids + [UUID(follower_id) for follower_ids in followers.values() for follower_id in follower_ids]
+
+    error_message = f"Job failed {settings.QUEUE_MAX_DELIVERIES} deliveries and was abandoned"
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            update(Job)
+            .where(Job.id.in_(failed_ids), Job.status.not_in(("completed", "failed")))
+            .values(status="failed", error_message=error_message, updated_at=datetime.utcnow())
+            .returning(Job.id, Job.callback_url)
+        )).all()
+        await db.commit()
+
+    final_states = [
+        {"id": job_id, "status": "failed", "summary": None, "processing_time_ms": None,
+         "is_cached": False, "cache_hit_type": None, "error_message": error_message}
+        for job_id, _ in rows
+    ]
+    if followers:
+        await coalescer.clear_followers(list(followers))
+    JOBS_FINISHED.labels("failed", "false").inc(len(final_states))
+    await notify_finished(final_states, {str(job_id): url for job_id, url in rows if url})
+
+async def summarize_with_progress(job: Job, content: str, summarizer: SummarizerService) -> str:
+    """Stream the summary, recording partial output so /stream clients can watch it build up."""
+    if not settings.JOB_PROGRESS_ENABLED:
+        return await summarizer.summarize(content)
+
+    progress = JobProgressWriter(get_async_redis(), str(job.id))
+    await progress.reset()
+    pieces = []
+    async for piece in summarizer.summarize_stream(content):
+        pieces.append(piece)
+        await progress.add(piece)
+    await progress.flush()
+    return "".join(pieces).strip()
+
+async def resolve_job(job: Job, summarizer: SummarizerService, extractor: UrlExtractorService,
+                      timings: dict | None = None) -> dict:
+    """
+    Run a loaded job to completion and return the column values of its final
+    state. Stage durations are added to `timings` (ms) and stored with the job.
+    """
+    start_time = time.perf_counter()
+    timings = timings if timings is not None else {}
+
+    def elapsed_ms() -> int:
+        return int((time.perf_counter() - start_time) * 1000)
+
+    try:
         # 1. Resolve content
         try:
             if job.input_type == "url":
-                content = await extractor.extract(job.input_value)
+                content = await extractor.extract(job.input_value, timings=timings)
             else:
                 content = job.input_value
         except Exception as e:
-             # Extraction failed
-             logger.error(f"Extraction failed for job {job_id}: {e}")
-             job.status = "failed"
-             job.error_message = f"Extraction failed: {str(e)}"
-             job.updated_at = datetime.utcnow()
-             db.commit()
-             return
-
-        # 2. Hash and Check Cache
+            # Extraction failed
+            logger.error(f"Extraction failed for job {job.id}: {e}")
+            return _final_state(job, "failed", error_message=f"Extraction failed: {str(e)}",
+                                processing_time_ms=elapsed_ms(), stage_timings=timings)
+
+        # 2. Hash and Check Cache, exactly and then for a near-duplicate
         content_hash = get_content_hash(content)
-        cache_key = f"summary_cache:{content_hash}"
-        cached_summary = redis_client.get(cache_key)
-        
+        fingerprint, cache_hit_type = None, None
+        with time_stage("cache_lookup", timings):
+            cached_summary = await summarizer.cache.get(content_hash)
+            if cached_summary:
+                cache_hit_type = "exact"
+            elif settings.SIMILARITY_CACHE_ENABLED:
+                fingerprint = await summarizer.similarity_cache.fingerprint(content)
+                near = await summarizer.similarity_cache.lookup(fingerprint) if fingerprint is not None else None
+                if near:
+                    cached_summary, score = near
+                    cache_hit_type = "near"
+                    logger.info(f"Near-duplicate cache hit for job {job.id} (similarity {score:.3f})")
+
         if cached_summary:
-            logger.info(f"Cache hit for job {job_id}")
-            job.summary = cached_summary
-            job.status = "completed"
-            job.is_cached = True
-            job.processing_time_ms = 0 # Instant
-        else:
-            logger.info(f"Cache miss for job {job_id}. Calling LLM.")
-            # 3. Call LLM
-            try:
-                summary = await summarizer.summarize(content)
-                
-                # Cache the result
-                redis_client.set(cache_key, summary)
-                
-                job.summary = summary
-                job.status = "completed"
-                job.is_cached = False
-                
-                end_time = time.perf_counter()
-                job.processing_time_ms = int((end_time - start_time) * 1000)
-                
-            except Exception as e:
-                logger.error(f"Summarization failed for job {job_id}: {e}")
-                job.status = "failed"
-                job.error_message = f"Summarization failed: {str(e)}"
-        
-        job.updated_at = datetime.utcnow()
-        db.commit()
-
-    except Exception as e:
-        logger.exception(f"Unexpected error processing job {job_id_str}")
+            logger.info(f"Cache hit for job {job.id}")
+            return _final_state(job, "completed", summary=cached_summary, cache_hit_type=cache_hit_type,
+                                processing_time_ms=elapsed_ms(), stage_timings=timings,
+                                content_hash=content_hash)
+
+        logger.info(f"Cache miss for job {job.id}. Calling LLM.")
+        # 3. Call LLM
         try:
-            if 'job' in locals() and job:
-                job.status = "failed"
-                job.error_message = "Internal worker error"
-                db.commit()
-        except:
-            pass
+            with time_stage("llm", timings):
+                summary = await summarize_with_progress(job, content, summarizer)
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            logger.error(f"Summarization failed for job {job.id}: {e}")
+            return _final_state(job, "failed", error_message=f"Summarization failed: {str(e)}",
+                                processing_time_ms=elapsed_ms(), stage_timings=timings,
+                                content_hash=content_hash)
+
+        # Cache the result
+        await summarizer.cache.set(content_hash, summary)
+        if fingerprint is not None:
+            await summarizer.similarity_cache.add(fingerprint, content_hash)
+
+        return _final_state(job, "completed", summary=summary,
+                            processing_time_ms=elapsed_ms(), stage_timings=timings,
+                            content_hash=content_hash)
+
+    except CircuitOpenError:
+        # The provider is down, not this job: run_job puts it back on the queue
+        raise
+    except Exception:
+        logger.exception(f"Unexpected error processing job {job.id}")
+        return _final_state(job, "failed", error_message="Internal worker error",
+                            processing_time_ms=elapsed_ms(), stage_timings=timings)
+
+async def load_batch(job_ids: list[str]) -> dict[str, tuple[Job, dict]]:
+    """
+    Load a popped batch with one SELECT and mark it processing with one
+    UPDATE. Returns the jobs still to run, with their stage timings so far,
+    by queued job ID; missing, malformed and already finished IDs are left out.
+    """
+    ids = {}
+    for job_id_str in job_ids:
+        try:
+            ids[UUID(job_id_str)] = job_id_str
+        except ValueError:
+            logger.error(f"Discarding malformed job ID {job_id_str!r}")
+
+    if not ids:
+        return {}
+
+    load_start = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        jobs = (await db.scalars(select(Job).where(Job.id.in_(list(ids))))).all()
+        await load_blobs(db, jobs, inputs=True)
+        loaded_at = datetime.utcnow()
+
+        for missing_id in set(ids) - {job.id for job in jobs}:
+            logger.error(f"Job {missing_id} not found in database")
+
+        # Redelivered after a crash but already finished
+        pending = [job for job in jobs if job.status not in ("completed", "failed")]
+        if not pending:
+            return {}
+
+        # Update status to processing
+        await db.execute(
+            update(Job)
+            .where(Job.id.in_([job.id for job in pending]))
+            .values(status="processing", updated_at=datetime.utcnow())
+        )
+        await db.commit()
+
+    # Loading is shared by the batch; queue wait is each job's own
+    db_load_seconds = time.perf_counter() - load_start
+    loaded = {}
+    for job in pending:
+        timings = {}
+        observe_stage("db_load", db_load_seconds, timings)
+        if job.created_at:
+            observe_stage("queue_wait", max(0.0, (loaded_at - job.created_at).total_seconds()), timings)
+        loaded[ids[job.id]] = (job, timings)
+    return loaded
+
+async def write_final_states(finished: list[tuple[Job, dict]]):
+    """
+    Store the final states of finished jobs and of any followers coalesced
+    onto them with one bulk UPDATE, then notify waiters and webhooks.
+    """
+    jobs = [job for job, _ in finished]
+    final_states = [state for _, state in finished]
+
+    # Jobs coalesced onto these leaders at submit time share their result
+    followers = {}
+    if settings.SUBMIT_DEDUP_ENABLED:
+        coalescer = JobCoalescer(get_async_redis())
+        followers = await coalescer.detach_followers(
+            [(str(job.id), job.input_type, job.input_value, job_lane(job.priority)) for job in jobs]
+        )
+        for state in list(final_states):
+            for follower_id in followers.get(str(state["id"]), []):
+                final_states.append({
+                    **state,
+                    "id": UUID(follower_id),
+                    # Inputs only match up to surrounding whitespace, so a follower keeps its own
+                    # hash: for a large text input it is the reference to the follower's blob
+                    "content_hash": None,
+                    "is_cached": state["status"] == "completed",
+                    # A follower's input is the same text as its leader's
+                    "cache_hit_type": (state["cache_hit_type"] or "exact") if state["status"] == "completed" else None
+                })
+
+    # Large summaries are stored once and referenced by hash; events still carry the text
+    blobs = BlobWriter()
+    params = []
+    for state in final_states:
+        summary_hash = blobs.put(state["summary"])
+        params.append({
+            **{f"b_{key}": value for key, value in state.items()},
+            "b_summary": None if summary_hash else state["summary"],
+            "b_summary_hash": summary_hash
+        })
+
+    async with AsyncSessionLocal() as db:
+        # Commit time is only known after the row is written, so it goes to the histogram alone
+        with time_stage("commit"):
+            await blobs.write(db)
+            await db.execute(FINAL_STATE_UPDATE, params)
+            await db.commit()
+        for state in final_states:
+            JOBS_FINISHED.labels(state["status"], str(state["is_cached"]).lower()).inc()
+
+        callback_urls = {str(job.id): job.callback_url for job in jobs if job.callback_url}
+        follower_ids = [UUID(follower_id) for ids in followers.values() for follower_id in ids]
+        if follower_ids:
+            rows = await db.execute(
+                select(Job.id, Job.callback_url)
+                .where(Job.id.in_(follower_ids), Job.callback_url.is_not(None))
+            )
+            callback_urls.update({str(job_id): url for job_id, url in rows})
+
+    if followers:
+        await coalescer.clear_followers(list(followers))
+
+    await notify_finished(final_states, callback_urls)
+    if settings.JOB_PROGRESS_ENABLED:
+        # Finished jobs are served from the database; partial output is no longer needed
+        await clear_job_progress(get_async_redis(), [str(job.id) for job in jobs])
+
+class FinalStateWriter:
+    """
+    Groups final states of jobs that finish close together into one write.
+    A write starts once max_batch states are waiting or `window` seconds
+    after the first of them, so a job is stored within a short window of
+    finishing instead of waiting for the slowest job popped with it.
+    """
+
+    def __init__(self, max_batch: int | None = None, window: float | None = None):
+        self.max_batch = max_batch or settings.WORKER_BATCH_SIZE
+        self.window = settings.WORKER_COMMIT_WINDOW_SECONDS if window is None else window
+        self._waiting: list[tuple[Job, dict, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._writes: set[asyncio.Task] = set()
+
+    async def write(self, job: Job, state: dict):
+        """Return once the state is committed; raises if its write failed."""
+        loop = asyncio.get_running_loop()
+        written = loop.create_future()
+        self._waiting.append((job, state, written))
+        if len(self._waiting) >= self.max_batch or self.window <= 0:
+            self._start_write()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._start_write)
+        await written
+
+    def _start_write(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        waiting, self._waiting = self._waiting, []
+        if waiting:
+            task = asyncio.create_task(self._write(waiting))
+            self._writes.add(task)
+            task.add_done_callback(self._writes.discard)
+
+    async def _write(self, waiting: list[tuple[Job, dict, asyncio.Future]]):
+        try:
+            await write_final_states([(job, state) for job, state, _ in waiting])
+        except Exception as e:
+            logger.error(f"Writing final states of {len(waiting)} job(s) failed: {e}")
+            for *_, written in waiting:
+                if not written.done():
+                    written.set_exception(e)
+            return
+        for *_, written in waiting:
+            if not written.done():
+                written.set_result(None)
+
+    async def flush(self):
+        """Write whatever is waiting and wait for writes in progress (used on shutdown)."""
+        self._start_write()
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+
+async def requeue_jobs(job_ids: list[str], queue: JobQueue):
+    """Return jobs to the queue, failing any that used up their deliveries."""
+    await fail_dead_lettered(await queue.nack(job_ids))
+
+async def run_job(job_id: str, job: Job, timings: dict, queue: JobQueue, summarizer: SummarizerService,
+                  extractor: UrlExtractorService, writer: FinalStateWriter) -> bool:
+    """Run one loaded job, store its final state and ack it; False if it went back to the queue."""
+    try:
+        state = await resolve_job(job, summarizer, extractor, timings)
+        await writer.write(job, state)
+    except asyncio.CancelledError:
+        # Cancelled during drain: leave the job on our processing list for release()
+        raise
+    except CircuitOpenError as e:
+        logger.warning(f"Job {job_id} deferred, returning it to the queue: {e}")
+        await queue.nack([job_id], failed=False)
+        return False
+    except Exception:
+        logger.exception(f"Job {job_id} failed, returning it to the queue")
+        await requeue_jobs([job_id], queue)
+        return False
+    await queue.ack([job_id])
+    return True
+
+async def run_batch(job_ids: list[str], queue: JobQueue, summarizer: SummarizerService,
+                    extractor: UrlExtractorService, writer: FinalStateWriter,
+                    job_done: Callable[[float, bool], None] | None = None):
+    """
+    Load a popped batch together, then run, store and ack each job on its own.
+    job_done(seconds, ok) is called once per popped job as it is acked or
+    requeued, so a slow job holds only its own slot.
+    """
+    started = time.perf_counter()
+    reported = set()
+
+    def done(job_id: str, ok: bool):
+        if job_id not in reported:
+            reported.add(job_id)
+            if job_done:
+                job_done(time.perf_counter() - started, ok)
+
+    async def run_one(job_id: str, job: Job, timings: dict):
+        done(job_id, await run_job(job_id, job, timings, queue, summarizer, extractor, writer))
+
+    try:
+        try:
+            loaded = await load_batch(job_ids)
+        except Exception:
+            logger.exception(f"Loading a batch of {len(job_ids)} job(s) failed, returning it to the queue")
+            await requeue_jobs(job_ids, queue)
+            for job_id in job_ids:
+                done(job_id, False)
+            return
+
+        # Missing, malformed or already finished: nothing left to do
+        skipped = [job_id for job_id in job_ids if job_id not in loaded]
+        if skipped:
+            await queue.ack(skipped)
+            for job_id in skipped:
+                done(job_id, True)
+
+        results = await asyncio.gather(
+            *(run_one(job_id, job, timings) for job_id, (job, timings) in loaded.items()),
+            return_exceptions=True
+        )
+        for result in results:
+            # e.g. Redis failing an ack: the job stays on the processing list and is skipped on redelivery
+            if isinstance(result, Exception):
+                logger.error(f"Finishing a job failed: {result}")
     finally:
-        db.close()
+        # Cancelled or failed before reporting: the slots are still freed
+        for job_id in job_ids:
+            done(job_id, False)
 
-async def run_worker():
-    print("Worker started. Waiting for jobs...")
-    redis_client = get_redis()
-    summarizer = SummarizerService()
-    extractor = UrlExtractorService()
-    
+async def requeue_orphaned_followers():
+    """
+    Enqueue followers whose leader finished or vanished without copying its
+    result onto them, e.g. because it was dead-lettered or its row deleted.
+    Leaders are checked once they have had followers for DEDUP_INFLIGHT_TTL_SECONDS.
+    """
+    redis_client = get_async_redis()
+    coalescer = JobCoalescer(redis_client)
+    leader_ids = await coalescer.leaders_to_check(settings.DEDUP_INFLIGHT_TTL_SECONDS)
+    ids = {}
+    for leader_id in leader_ids:
+        try:
+            ids[UUID(leader_id)] = leader_id
+        except ValueError:
+            pass
+    if not ids:
+        return
+
+    async with AsyncSessionLocal() as db:
+        leaders = (await db.scalars(select(Job).where(Job.id.in_(list(ids))))).all()
+        await load_blobs(db, leaders, inputs=True)
+    found = {ids[job.id]: job for job in leaders}
+    gone = [
+        leader_id for leader_id in ids.values()
+        if leader_id not in found or found[leader_id].status in ("completed", "failed")
+    ]
+    await coalescer.mark_checked([leader_id for leader_id in ids.values() if leader_id not in gone])
+    if not gone:
+        return
+
+    # Close any in-flight claim still naming these leaders before taking their followers
+    await coalescer.detach_followers([
+        (leader_id, found[leader_id].input_type, found[leader_id].input_value, job_lane(found[leader_id].priority))
+        for leader_id in gone if leader_id in found
+    ])
+    follower_ids = []
+    for leader_id in gone:
+        follower_ids += await coalescer.take_followers(leader_id)
+    follower_ids = [UUID(follower_id) for follower_id in follower_ids]
+    if not follower_ids:
+        return
+
+    async with AsyncSessionLocal() as db:
+        rows = await db.execute(
+            select(Job.id, Job.priority, Job.tenant_id)
+            .where(Job.id.in_(follower_ids), Job.status == "queued")
+        )
+    queues = {}
+    for job_id, priority, tenant_id in rows:
+        queues.setdefault((job_lane(priority), tenant_id or ANONYMOUS_TENANT), []).append(str(job_id))
+    for (lane, tenant_id), job_ids in queues.items():
+        await enqueue_jobs(redis_client, job_ids, lane, tenant_id)
+    requeued = sum(len(job_ids) for job_ids in queues.values())
+    if requeued:
+        logger.warning(f"Enqueued {requeued} follower job(s) of {len(gone)} leader(s) that finished without them")
+
+async def maintain_queue(queue: JobQueue):
+    """Heartbeat for this worker, refresh queue metrics and periodically requeue jobs of dead workers."""
+    last_reap = 0.0
     while True:
         try:
-            item = redis_client.brpop(JOB_QUEUE_KEY, timeout=5)
-            
-            if item:
-                _, job_id = item
-                logger.info(f"Picked up job: {job_id}")
-                await process_job(job_id, summarizer, extractor)
-            
+            await queue.heartbeat()
+            await refresh_queue_depth(queue.redis)
+            if queue.reliable and time.monotonic() - last_reap >= settings.QUEUE_REAPER_INTERVAL_SECONDS:
+                last_reap = time.monotonic()
+                _, dead = await queue.reap()
+                await fail_dead_lettered(dead)
+                if settings.SUBMIT_DEDUP_ENABLED:
+                    await requeue_orphaned_followers()
+        except Exception as e:
+            logger.error(f"Queue maintenance error: {e}")
+        await asyncio.sleep(settings.QUEUE_HEARTBEAT_INTERVAL_SECONDS)
+
+async def drain_in_flight(in_flight: set):
+    """Wait for in-flight jobs to finish, cancelling any that outlive the drain timeout."""
+    if not in_flight:
+        return
+
+    logger.info(f"Draining {len(in_flight)} in-flight job(s)...")
+    done, pending = await asyncio.wait(in_flight, timeout=settings.WORKER_DRAIN_TIMEOUT_SECONDS)
+
+    if pending:
+        logger.warning(f"Drain timeout reached. Cancelling {len(pending)} job(s).")
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+def start_metrics_exporter():
+    if settings.WORKER_METRICS_PORT <= 0:
+        return
+    try:
+        start_http_server(settings.WORKER_METRICS_PORT)
+        logger.info(f"Serving worker metrics on port {settings.WORKER_METRICS_PORT}")
+    except OSError as e:
+        # Another worker on this host already has the port; metrics are optional
+        logger.warning(f"Could not serve metrics on port {settings.WORKER_METRICS_PORT}: {e}")
+
+async def run_worker(stop_event: asyncio.Event | None = None,
+                     report_job: Callable[[float, bool], None] | None = None):
+    """
+    Run until SIGTERM/SIGINT, or until stop_event is set when running embedded
+    (e.g. benchmarks). report_job(seconds, ok) is called as each job is acked
+    or requeued; supervisor.py uses it to measure per-job latency.
+    """
+    print("Worker started. Waiting for jobs...")
+    start_metrics_exporter()
+    redis_client = get_async_redis()
+    await startup_services()
+    summarizer = get_summarizer_service()
+    extractor = get_url_extractor_service()
+
+    queue = JobQueue(redis_client)
+    writer = FinalStateWriter()
+    await queue.heartbeat()
+    maintenance = asyncio.create_task(maintain_queue(queue))
+
+    # Stop pulling new jobs on SIGTERM/SIGINT, then drain what is in flight
+    stop_event = stop_event or asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            # Signal handlers are not available on Windows event loops
+            pass
+
+    # Each slot is one job in flight; a full pool stops us from popping more
+    slots = asyncio.Semaphore(settings.WORKER_CONCURRENCY)
+    in_flight = set()
+    jobs_in_flight = 0
+
+    def release_slots(count: int):
+        for _ in range(count):
+            slots.release()
+
+    def on_job_done(seconds: float, ok: bool):
+        nonlocal jobs_in_flight
+        jobs_in_flight -= 1
+        JOBS_IN_FLIGHT.set(jobs_in_flight)
+        slots.release()
+        if report_job:
+            report_job(seconds, ok)
+
+    while not stop_event.is_set():
+        await slots.acquire()
+        if stop_event.is_set():
+            slots.release()
+            break
+
+        # Provider circuit is open: leave jobs queued until it recovers
+        if not await summarizer.llm_client.is_available():
+            slots.release()
+            await asyncio.sleep(1)
+            continue
+
+        # Grow the batch with whatever other slots are free right now
+        reserved = 1
+        while reserved < settings.WORKER_BATCH_SIZE and not slots.locked():
+            await slots.acquire()
+            reserved += 1
+
+        try:
+            job_ids = await queue.pop_many(reserved, timeout=settings.WORKER_POLL_TIMEOUT_SECONDS)
+            release_slots(reserved - len(job_ids))
+
+            if not job_ids:
+                continue
+
+            jobs_in_flight += len(job_ids)
+            JOBS_IN_FLIGHT.set(jobs_in_flight)
+            logger.info(f"Picked up {len(job_ids)} job(s) ({jobs_in_flight}/{settings.WORKER_CONCURRENCY} in flight)")
+            task = asyncio.create_task(run_batch(job_ids, queue, summarizer, extractor, writer, on_job_done))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+
         except redis.exceptions.ConnectionError:
+            release_slots(reserved)
             logger.error("Redis connection lost. Retrying in 5s...")
             await asyncio.sleep(5)
         except Exception as e:
+            release_slots(reserved)
             logger.error(f"Worker loop error: {e}")
             await asyncio.sleep(1)
 
+    await drain_in_flight(in_flight)
+    await writer.flush()
+    maintenance.cancel()
+    requeued = await queue.release()
+    if requeued:
+        logger.info(f"Returned {requeued} unfinished job(s) to the queue")
+    await shutdown_services()
+    await redis_client.aclose()
+    await get_cache_redis().aclose()
+    await async_engine.dispose()
+    print("Worker stopped.")
+
 if __name__ == "__main__":
     asyncio.run(run_worker())